@@ -31,11 +31,14 @@ from crowddynamics.core.vector.vector2D import rotate270, wrap_to_pi
 Attribute = namedtuple('Attribute', ('name', 'numba_type', 'resizable'))
 AGENT_ATTRS = (
     Attribute('size', int64, False),
+    Attribute('max_size', int64, False),
     Attribute('shape', UniTuple(int64, 2), False),
     Attribute('circular', boolean, False),
     Attribute('three_circle', boolean, False),
+    Attribute('mixed', boolean, False),
     Attribute('orientable', boolean, False),
     Attribute('active', boolean[:], True),
+    Attribute('is_three_circle', boolean[:], False),
     Attribute('mass', float64[:, :], False),
     Attribute('radius', float64[:], False),
     Attribute('r_t', float64[:], False),
@@ -45,6 +48,7 @@ AGENT_ATTRS = (
     Attribute('velocity', float64[:, :], True),
     Attribute('target_velocity', float64[:, :], True),
     Attribute('target_direction', float64[:, :], True),
+    Attribute('target_exit', int64[:], True),
     Attribute('force', float64[:, :], True),
     Attribute('inertia_rot', float64[:], True),
     Attribute('orientation', float64[:], True),
@@ -65,6 +69,18 @@ AGENT_ATTRS = (
     Attribute('f_soc_iw_max', float64, False),
     Attribute('sight_soc', float64, False),
     Attribute('sight_wall', float64, False),
+    Attribute('vision_cone', float64, False),
+    Attribute('neighbor_radius', float64, False),
+    Attribute('neighborhood_size', int64, False),
+    Attribute('neighbors', int64[:, :], False),
+    Attribute('neighbor_distances', float64[:, :], False),
+    Attribute('neighbor_distances_max', float64[:], False),
+    Attribute('density_radius', float64, False),
+    Attribute('density', float64[:], True),
+    Attribute('pressure', float64[:], True),
+    Attribute('density_velocity', float64[:, :], False),
+    Attribute('density_velocity_square', float64[:], False),
+    Attribute('ttc_cache', int64[:, :], False),
 )
 
 
@@ -105,22 +121,72 @@ def positions(position, orientation, radius_ts):
         raise Exception()
 
 
+@numba.jit(nopython=True, nogil=True)
+def resize_vector(array, size, fill):
+    """Copy of one dimensional array resized to ``size``. Existing values are
+    kept in their indices and new elements are set to ``fill``.
+
+    Args:
+        array (numpy.ndarray):
+        size (int):
+        fill:
+
+    Returns:
+        numpy.ndarray:
+    """
+    n = min(array.shape[0], size)
+    out = np.empty(size, array.dtype)
+    out[:n] = array[:n]
+    out[n:] = fill
+    return out
+
+
+@numba.jit(nopython=True, nogil=True)
+def resize_matrix(array, size, fill):
+    """Copy of two dimensional array with the first dimension resized to
+    ``size``. Existing rows are kept in their indices and new rows are set to
+    ``fill``.
+
+    Args:
+        array (numpy.ndarray):
+        size (int):
+        fill:
+
+    Returns:
+        numpy.ndarray:
+    """
+    n = min(array.shape[0], size)
+    out = np.empty((size, array.shape[1]), array.dtype)
+    out[:n, :] = array[:n, :]
+    out[n:, :] = fill
+    return out
+
+
 @numba.jitclass(tuple((p.name, p.numba_type) for p in AGENT_ATTRS))
 class Agent(object):
     r"""Structure for agent parameters and variables.
 
     Args:
         size (int):
-            Maximum number of agents :math:`N`.
+            Capacity of the structure :math:`N`. Grows when new agents are
+            added to a full structure.
+        max_size (int):
+            Hard limit for the capacity. Zero means that capacity is unlimited.
         shape (tuple):
             Shape of 2D arrays :math:`(N, 2)`.
         circular (bool):
             Boolean indicating if agent is modeled as a circle
         three_circle (bool):
             Boolean indicating if agent is modeled as three circles
+        mixed (bool):
+            Boolean indicating if model is selected per agent by
+            ``is_three_circle``.
         orientable (bool):
             Boolean indicating if agent is orientable (has rotational motion).
         active:
+        is_three_circle:
+            Boolean indicating if agent is modeled as three circles when
+            models are mixed. Otherwise agent is modeled as a circle.
         radius:
             Radius :math:`r > 0`
         r_t:
@@ -141,6 +207,8 @@ class Agent(object):
             Target velocity :math:`v_{0}`
         target_direction:
             Target direction :math:`\mathbf{e}_0`
+        target_exit:
+            Index of the exit selected by the agent or ``-1`` if not selected.
         force:
             Force :math:`\mathbf{f}`
         orientation:
@@ -181,6 +249,38 @@ class Agent(object):
             Maximum distance for social force to effect
         sight_wall:
             Maximum distance for social force to effect
+        vision_cone:
+            Half-angle :math:`\theta \in [0, \pi]` of the vision cone for
+            social force between agents. Agent does not react to agents
+            outside its vision cone. Value of :math:`\pi` disables the cone.
+        neighbor_radius:
+            Maximum distance between the centers of mass of neighbouring
+            agents. Zero disables tracking of the neighbours.
+        neighborhood_size:
+            Maximum number of neighbours :math:`k` tracked for each agent.
+        neighbors:
+            Indices of the :math:`k` nearest neighbours of each agent found by
+            the interaction pass. Missing neighbours are marked with ``-1``.
+        neighbor_distances:
+            Distances to the neighbours in ``neighbors``.
+        neighbor_distances_max:
+            Largest distance in ``neighbor_distances`` for each agent.
+        density_radius:
+            Radius :math:`R` of the Gaussian kernel for local density. Zero
+            disables computing the local density.
+        density:
+            Local density :math:`\rho` [1/m^2]
+        pressure:
+            Crowd pressure :math:`\rho \operatorname{Var}(\mathbf{v})` from
+            the kernel weighted variance of the local velocities.
+        density_velocity:
+            Kernel weighted sum of the velocities of the neighbours.
+        density_velocity_square:
+            Kernel weighted sum of the squared speeds of the neighbours.
+        ttc_cache:
+            Direct mapped cache of rows ``(i, j, part_i, part_j)`` storing the
+            parts of three circle agents that were first in contact in the
+            previous timestep. Empty cache disables caching.
 
     """
 
@@ -189,16 +289,19 @@ class Agent(object):
 
         Args:
             size (int):
-                Maximum number of agents that can be placed into the structure.
+                Initial capacity of the structure.
         """
         self.size = size
+        self.max_size = 0
         self.shape = (self.size, 2)
 
         # Flags
         self.circular = True
         self.three_circle = False
+        self.mixed = False
         self.orientable = False
         self.active = np.zeros(self.size, np.bool8)
+        self.is_three_circle = np.zeros(self.size, np.bool8)
 
         # Agent properties
         self.radius = np.zeros(self.size)
@@ -213,6 +316,7 @@ class Agent(object):
         self.velocity = np.zeros(self.shape)
         self.target_velocity = np.zeros((size, 1))
         self.target_direction = np.zeros(self.shape)
+        self.target_exit = np.zeros(self.size, np.int64) - 1
         self.force = np.zeros(self.shape)
 
         # Rotational motion
@@ -236,9 +340,27 @@ class Agent(object):
         # Limits
         self.sight_soc = 3.0
         self.sight_wall = 3.0
+        self.vision_cone = np.pi
         self.f_soc_ij_max = 2e3
         self.f_soc_iw_max = 2e3
 
+        # Neighborhood
+        self.neighbor_radius = 0.0
+        self.neighborhood_size = 0
+        self.neighbors = np.zeros((self.size, 0), np.int64)
+        self.neighbor_distances = np.zeros((self.size, 0))
+        self.neighbor_distances_max = np.zeros(self.size)
+
+        # Local density
+        self.density_radius = 0.0
+        self.density = np.zeros(self.size)
+        self.pressure = np.zeros(self.size)
+        self.density_velocity = np.zeros(self.shape)
+        self.density_velocity_square = np.zeros(self.size)
+
+        # Time-to-collision cache
+        self.ttc_cache = np.zeros((0, 4), np.int64)
+
     def add(self, position, mass, radius, r_t, r_s, r_ts,
             inertia_rot, max_velocity, max_angular_velocity):
         r"""Add new agent to next free index if there is space left.
@@ -270,29 +392,106 @@ class Agent(object):
 
         Returns:
             int: Integer indicating the index of agent that was added.
-                 Returns -1 if addition was unsuccessful.
+                 Returns -1 if the structure is full and capacity has reached
+                 ``max_size``.
 
         """
         # mass, radius, ratio_rt, ratio_rs, ratio_ts,
         # inertia_rot, target_velocity, target_angular_velocity
 
         # Find first inactive agent
-        for i, state in enumerate(self.active):
-            if state:
-                continue
-            else:
-                self.active[i] = True
-                self.position[i] = position
-                self.mass[i] = mass
-                self.radius[i] = radius
-                self.r_t[i] = r_t
-                self.r_s[i] = r_s
-                self.r_ts[i] = r_ts
-                self.inertia_rot[i] = inertia_rot
-                self.target_velocity[i] = max_velocity
-                self.target_angular_velocity[i] = max_angular_velocity
-                return i
-        return -1
+        i = -1
+        for k, state in enumerate(self.active):
+            if not state:
+                i = k
+                break
+
+        if i < 0:
+            # Structure is full. Grow geometrically unless hard limit is set.
+            if 0 < self.max_size <= self.size:
+                return -1
+            i = self.size
+            size = max(2 * self.size, 1)
+            if self.max_size > 0:
+                size = min(size, self.max_size)
+            self.resize(size)
+
+        self.active[i] = True
+        self.is_three_circle[i] = False
+        self.target_exit[i] = -1
+        self.position[i] = position
+        self.mass[i] = mass
+        self.radius[i] = radius
+        self.r_t[i] = r_t
+        self.r_s[i] = r_s
+        self.r_ts[i] = r_ts
+        self.inertia_rot[i] = inertia_rot
+        self.target_velocity[i] = max_velocity
+        self.target_angular_velocity[i] = max_angular_velocity
+        return i
+
+    def resize(self, size):
+        r"""Reallocate all attribute arrays to capacity of ``size``. Agents
+        keep their indices. New slots are inactive and parameters are set to
+        default values.
+
+        Args:
+            size (int):
+                New capacity. Should not be smaller than the largest index of
+                an active agent.
+        """
+        self.size = size
+        self.shape = (self.size, 2)
+
+        self.active = resize_vector(self.active, size, False)
+        self.is_three_circle = resize_vector(self.is_three_circle, size, False)
+
+        # Agent properties
+        self.radius = resize_vector(self.radius, size, 0.0)
+        self.r_t = resize_vector(self.r_t, size, 0.0)
+        self.r_s = resize_vector(self.r_s, size, 0.0)
+        self.r_ts = resize_vector(self.r_ts, size, 0.0)
+        self.mass = resize_matrix(self.mass, size, 0.0)
+        self.inertia_rot = resize_vector(self.inertia_rot, size, 0.0)
+
+        # Translational motion
+        self.position = resize_matrix(self.position, size, 0.0)
+        self.velocity = resize_matrix(self.velocity, size, 0.0)
+        self.target_velocity = resize_matrix(self.target_velocity, size, 0.0)
+        self.target_direction = resize_matrix(self.target_direction, size, 0.0)
+        self.target_exit = resize_vector(self.target_exit, size, -1)
+        self.force = resize_matrix(self.force, size, 0.0)
+
+        # Rotational motion
+        self.orientation = resize_vector(self.orientation, size, 0.0)
+        self.angular_velocity = resize_vector(self.angular_velocity, size, 0.0)
+        self.target_orientation = resize_vector(self.target_orientation, size,
+                                                0.0)
+        self.target_angular_velocity = resize_vector(
+            self.target_angular_velocity, size, 0.0)
+        self.torque = resize_vector(self.torque, size, 0.0)
+
+        # Motion related parameters
+        self.tau_adj = resize_matrix(self.tau_adj, size, 0.5)
+        self.tau_rot = resize_vector(self.tau_rot, size, 0.2)
+        self.k_soc = resize_vector(self.k_soc, size, 1.5)
+        self.tau_0 = resize_vector(self.tau_0, size, 3.0)
+        self.mu = resize_vector(self.mu, size, 1.2e5)
+        self.kappa = resize_vector(self.kappa, size, 4e4)
+        self.damping = resize_vector(self.damping, size, 500)
+        self.std_rand_force = resize_vector(self.std_rand_force, size, 0.1)
+        self.std_rand_torque = resize_vector(self.std_rand_torque, size, 0.1)
+        self.neighbors = resize_matrix(self.neighbors, size, -1)
+        self.neighbor_distances = resize_matrix(
+            self.neighbor_distances, size, np.inf)
+        self.neighbor_distances_max = resize_vector(
+            self.neighbor_distances_max, size, np.inf)
+        self.density = resize_vector(self.density, size, 0.0)
+        self.pressure = resize_vector(self.pressure, size, 0.0)
+        self.density_velocity = resize_matrix(
+            self.density_velocity, size, 0.0)
+        self.density_velocity_square = resize_vector(
+            self.density_velocity_square, size, 0.0)
 
     def remove(self, i):
         r"""
@@ -307,13 +506,32 @@ class Agent(object):
     def set_circular(self):
         self.circular = True
         self.three_circle = False
+        self.mixed = False
         self.orientable = self.three_circle
 
     def set_three_circle(self):
         self.circular = False
         self.three_circle = True
+        self.mixed = False
         self.orientable = self.three_circle
 
+    def set_mixed(self):
+        """Select model per agent using ``is_three_circle``. All agents are
+        orientable."""
+        self.circular = False
+        self.three_circle = False
+        self.mixed = True
+        self.orientable = True
+
+    def set_agent_model(self, i, three_circle):
+        """Set model of agent ``i`` when models are mixed.
+
+        Args:
+            i (int):
+            three_circle (bool): Three circle model if true, otherwise circle.
+        """
+        self.is_three_circle[i] = three_circle
+
     def set_motion(self, i, orientation, velocity, angular_velocity,
                    target_direction, target_orientation):
         r"""Set motion parameters for agent.
@@ -385,6 +603,72 @@ class Agent(object):
         self.force[:] = 0
         self.torque[:] = 0
 
+    def set_neighborhood(self, neighborhood_size, neighbor_radius):
+        r"""Enable tracking of :math:`k` nearest neighbours of the agents
+        during the agent-agent interaction pass.
+
+        Only pairs that are visited by the interaction pass can be neighbours,
+        therefore ``neighbor_radius`` larger than ``sight_soc`` has no effect.
+
+        Args:
+            neighborhood_size (int):
+                Maximum number of neighbours :math:`k > 0` for each agent.
+            neighbor_radius (float):
+                Maximum distance between centers of mass of neighbours.
+                Zero disables tracking.
+        """
+        self.neighborhood_size = neighborhood_size
+        self.neighbor_radius = neighbor_radius
+        self.neighbors = np.zeros((self.size, neighborhood_size), np.int64)
+        self.neighbor_distances = np.zeros((self.size, neighborhood_size))
+        self.neighbor_distances_max = np.zeros(self.size)
+        self.reset_neighbor()
+
+    def reset_neighbor(self):
+        """Mark all neighbours missing."""
+        self.neighbors[:, :] = -1
+        self.neighbor_distances[:, :] = np.inf
+        self.neighbor_distances_max[:] = np.inf
+
+    def add_neighbor(self, i, j, distance):
+        r"""Add agent ``j`` to the neighbours of agent ``i`` if it is closer
+        than the farthest current neighbour.
+
+        Args:
+            i (int):
+            j (int):
+            distance (float):
+        """
+        if distance >= self.neighbor_distances_max[i]:
+            return
+        k = np.argmax(self.neighbor_distances[i])
+        self.neighbors[i, k] = j
+        self.neighbor_distances[i, k] = distance
+        self.neighbor_distances_max[i] = np.max(self.neighbor_distances[i])
+
+    def set_ttc_cache(self, size):
+        r"""Enable caching the parts of three circle agents that are first in
+        contact between consecutive timesteps. Cache is keyed by agent pair
+        and collisions overwrite the previous pair, therefore cache is only a
+        hint and never changes the forces.
+
+        Args:
+            size (int):
+                Number of slots rounded up to power of two. Should be larger
+                than the number of pairs within ``sight_soc``. Zero disables
+                caching.
+        """
+        if size > 0:
+            size = 1 << np.int64(np.ceil(np.log2(size)))
+        self.ttc_cache = np.zeros((size, 4), np.int64)
+        self.ttc_cache[:, :] = -1
+
+    def reset_density(self):
+        """Reset accumulators of the local density."""
+        self.density[:] = 0
+        self.density_velocity[:, :] = 0
+        self.density_velocity_square[:] = 0
+
     def indices(self):
         """Indices of active agents."""
         return np.arange(self.size)[self.active]
@@ -253,9 +253,25 @@ def create_random_agent_attributes():
 
 
 class AgentManager(object):
-    """Class for initialising new agents."""
+    """Class for initialising new agents.
 
-    def __init__(self, size, model):
+    Agents are stored in a structured array which grows geometrically when it
+    fills up. Indices of the agents are stable over the reallocation.
+    """
+
+    def __init__(self, size, model, max_size=None):
+        """Agent manager
+
+        Args:
+            size (int):
+                Initial capacity of the agent array.
+
+            model (AgentModels):
+                Agent model.
+
+            max_size (int, optional):
+                Hard limit for the capacity. ``None`` means unlimited.
+        """
         if model is AgentModels.CIRCULAR:
             self.agents = np.zeros(size, dtype=agent_type_circular)
         elif model is AgentModels.THREE_CIRCLE:
@@ -266,6 +282,7 @@ class AgentManager(object):
             ))
 
         self.size = size
+        self.max_size = max_size
         self.model = model
 
         # Keeps track of which agents are active and which in active. Stores
@@ -277,6 +294,35 @@ class AgentManager(object):
         # random positions.
         self.grid = MutableBlockList(cell_size=MAX_AGENT_RADIUS)
 
+    def resize(self, size):
+        """Reallocate the agent array to capacity of ``size``. Existing agents
+        keep their indices and new slots are inactive.
+
+        Args:
+            size (int):
+                New capacity. Must be larger than current size.
+        """
+        agents = np.zeros(size, dtype=self.agents.dtype)
+        agents[:self.size] = self.agents
+        self.agents = agents
+        self.inactive.update(range(self.size, size))
+        self.size = size
+
+    def grow(self):
+        """Grow the capacity geometrically.
+
+        Raises:
+            AgentStructureFull: If capacity has reached ``max_size``.
+        """
+        if self.max_size is not None and self.size >= self.max_size:
+            raise AgentStructureFull(
+                'Agent structure has reached maximum size of {}'.format(
+                    self.max_size))
+        size = max(2 * self.size, 1)
+        if self.max_size is not None:
+            size = min(size, self.max_size)
+        self.resize(size)
+
     def add(self, check_overlapping=True, **attributes):
         """Add new agent
 
@@ -320,10 +366,16 @@ class AgentManager(object):
                     Unit vector to desired direction
 
         Raises:
+            AgentStructureFull:
+                If there is no space left and capacity has reached
+                ``max_size``.
 
         Returns:
-
+            int: Index of the new agent.
         """
+        if not self.inactive:
+            self.grow()
+
         if self.inactive:
             index = self.inactive.pop(0)
 
@@ -362,7 +414,7 @@ class AgentManager(object):
             self.active.add(index)
             return index
         else:
-            return AgentStructureFull()
+            raise AgentStructureFull()
 
     def remove(self, index):
         """Remove agent"""
@@ -82,6 +82,7 @@ def test_positions(data):
 def test_agent(data):
     size = 10
     agent = Agent(size=size)
+    agent.max_size = size
     agent.set_circular()
     agent.set_three_circle()
 
@@ -129,3 +130,20 @@ def test_agent(data):
 
     out = agent.front(0)
     assert isinstance(out, np.ndarray)
+
+
+@given(data())
+def test_agent_resize(data):
+    size = 2
+    agent = Agent(size=size)
+
+    indices = [add_agent(agent, data) for _ in range(3 * size)]
+    assert indices == list(range(3 * size))
+    assert agent.size >= 3 * size
+    assert agent.position.shape == (agent.size, 2)
+    assert np.sum(agent.active) == 3 * size
+
+    agent.max_size = agent.size
+    while np.sum(agent.active) < agent.size:
+        assert add_agent(agent, data) >= 0
+    assert add_agent(agent, data) == -1
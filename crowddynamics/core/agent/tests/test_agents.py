@@ -3,7 +3,8 @@ import pytest
 
 from crowddynamics.core.agent.agents import AgentManager, AgentModels, \
     reset_motion, shoulders, front, overlapping_circle_circle, \
-    overlapping_three_circle
+    overlapping_three_circle, create_random_agent_attributes
+from crowddynamics.exceptions import AgentStructureFull
 from crowddynamics.core.vector.vector2D import unit_vector
 
 
@@ -58,6 +59,18 @@ def test_overlapping_three_circle(agent_three_circle):
     assert True
 
 
+def test_resize():
+    agent = AgentManager(1, AgentModels.CIRCULAR, max_size=4)
+    indices = [agent.add(check_overlapping=False,
+                         **create_random_agent_attributes())
+               for _ in range(4)]
+    assert indices == [0, 1, 2, 3]
+    assert agent.size == 4
+    assert len(agent.agents) == 4
+    with pytest.raises(AgentStructureFull):
+        agent.add(check_overlapping=False, **create_random_agent_attributes())
+
+
 def test_linear_obstacle():
     assert True
 
@@ -109,3 +109,43 @@ def agent_closer_to_exit(c_door, position):
     d_sorted = np.argsort(distances)
     num = np.argsort(d_sorted)
     return num
+
+
+def exit_selection(distance, target_exit, capacity, target_velocity):
+    r"""Select exits that minimize the estimated evacuation time.
+
+    Estimated time for agent :math:`i` to evacuate through exit :math:`e` is
+    the sum of the walking time and the queueing time
+
+    .. math::
+       T_{i,e} = \frac{d_{i,e}}{v_{0,i}} + \frac{\lambda_{i,e}}{\beta_{e}}
+
+    where :math:`d_{i,e}` is the distance to the exit along the distance map,
+    :math:`\lambda_{i,e}` is the number of agents that have selected the exit
+    and are closer to it than agent :math:`i` and :math:`\beta_{e}` is the
+    capacity of the exit from ``narrow_exit_capacity``. Queues are counted by
+    sorting the distances of the agents that have selected the exit, similar
+    to ``agent_closer_to_exit``.
+
+    Args:
+        distance (numpy.ndarray):
+            Distances to the exits :math:`d_{i,e}` of shape ``(exits, n)``.
+        target_exit (numpy.ndarray):
+            Exits currently selected by the agents. ``-1`` for none.
+        capacity (numpy.ndarray):
+            Capacities of the exits :math:`\beta_{e}` in agents per second.
+        target_velocity (numpy.ndarray):
+            Target velocities :math:`v_{0,i} > 0` of the agents.
+
+    Returns:
+        numpy.ndarray: Indices of the selected exits.
+    """
+    time = np.empty(distance.shape)
+    for e in range(distance.shape[0]):
+        if capacity[e] <= 0:
+            time[e] = np.inf
+            continue
+        queue = np.sort(distance[e, target_exit == e])
+        ahead = np.searchsorted(queue, distance[e], side='left')
+        time[e] = distance[e] / target_velocity + ahead / capacity[e]
+    return np.argmin(time, axis=0)
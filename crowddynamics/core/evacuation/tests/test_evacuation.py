@@ -3,7 +3,7 @@ from hypothesis import given, assume
 import hypothesis.strategies as st
 
 from crowddynamics.core.evacuation.evacuation import agent_closer_to_exit, \
-    narrow_exit_capacity
+    narrow_exit_capacity, exit_selection
 from crowddynamics.testing import real
 
 
@@ -28,3 +28,23 @@ def test_narrow_exit_capacity(d_door, d_agent, d_layer, coeff):
     capacity = narrow_exit_capacity(d_door, d_agent, d_layer, coeff)
     assert isinstance(capacity, float)
     assert capacity >= 0.0
+
+
+def test_exit_selection():
+    # Exit 0 is closer but has long queue.
+    n = 50
+    distance = np.stack((np.linspace(0.0, 5.0, n),
+                         np.linspace(0.0, 5.0, n) + 3.0))
+    target_exit = np.zeros(n, dtype=np.int64)
+    capacity = np.array((1.0, 1.0))
+    target_velocity = np.ones(n)
+    selected = exit_selection(distance, target_exit, capacity, target_velocity)
+    assert selected.shape == (n,)
+    # Front of the queue stays, back of the queue switches.
+    assert np.all(selected[:4] == 0)
+    assert np.all(selected[-10:] == 1)
+
+    # Exit without capacity is never selected.
+    capacity = np.array((0.0, 1.0))
+    selected = exit_selection(distance, target_exit, capacity, target_velocity)
+    assert np.all(selected == 1)
@@ -1,7 +1,9 @@
-from .integrator import adaptive_timestep, euler_integration, velocity_verlet
+from .integrator import adaptive_timestep, euler_integration, velocity_verlet, \
+    periodic_wrap
 
 __all__ = """
 adaptive_timestep
 euler_integration
 velocity_verlet
+periodic_wrap
 """.split()
@@ -1,5 +1,5 @@
 import numba
-from numba import float64
+from numba import float64, boolean, void
 import numpy as np
 
 from crowddynamics.core.agent.agent import Agent_numba_type
@@ -126,6 +126,36 @@ def euler_integration(agent, dt_min, dt_max):
     return dt
 
 
+@numba.jit([void(float64[:, :], float64[:], float64[:], boolean[:])],
+           nopython=True, nogil=True, cache=True)
+def periodic_wrap(position, lower, upper, periodic):
+    r"""
+    Wrap positions into the domain along periodic axes
+
+    .. math::
+       x \mapsto x_{lower} + (x - x_{lower}) \bmod (x_{upper} - x_{lower})
+
+    Args:
+        position (numpy.ndarray):
+            Positions of ``shape=(size, 2)``. Wrapped in place.
+
+        lower (numpy.ndarray):
+            Lower bound of the domain.
+
+        upper (numpy.ndarray):
+            Upper bound of the domain.
+
+        periodic (numpy.ndarray):
+            Boolean array that indicates which axes are periodic.
+    """
+    length = upper - lower
+    for i in range(position.shape[0]):
+        for j in range(2):
+            if periodic[j]:
+                position[i, j] = lower[j] + (position[i, j] - lower[j]) % \
+                                            length[j]
+
+
 @numba.jit(nopython=True)
 def velocity_verlet(agent, dt_min, dt_max):
     r"""
@@ -1,9 +1,11 @@
+import numpy as np
 from hypothesis import given, assume, settings
 
 import crowddynamics.testing
 from crowddynamics.core.integrator import adaptive_timestep, \
     euler_integration
-from crowddynamics.core.integrator.integrator import velocity_verlet
+from crowddynamics.core.integrator.integrator import velocity_verlet, \
+    periodic_wrap
 
 
 @given(
@@ -44,3 +46,14 @@ def test_velocity_verlet(agent, dt_min, dt_max):
         dt = next(integrator)
         assert isinstance(dt, float)
         assert 0 < dt_min <= dt <= dt_max
+
+
+@given(position=crowddynamics.testing.real(-100, 100, shape=(10, 2)))
+def test_periodic_wrap(position):
+    lower = np.array((0.0, 0.0))
+    upper = np.array((10.0, 5.0))
+    periodic = np.array((True, False))
+    wrapped = np.copy(position)
+    periodic_wrap(wrapped, lower, upper, periodic)
+    assert np.all((lower[0] <= wrapped[:, 0]) & (wrapped[:, 0] <= upper[0]))
+    assert np.all(wrapped[:, 1] == position[:, 1])
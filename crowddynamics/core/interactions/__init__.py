@@ -1,27 +1,56 @@
-from .partitioning import block_list, BlockList
+from .partitioning import block_list, block_list_bounded, half_stencil, \
+    BlockList, quadtree, box_distance
 from .distance import distance_circle_circle, distance_three_circle, \
-    distance_circle_line, distance_three_circle_line, \
-    overlapping_circle_circle, overlapping_three_circle
+    distance_circle_three_circle, distance_circle_line, \
+    distance_three_circle_line, overlapping_circle_circle, \
+    overlapping_three_circle
 from .interactions import agent_agent_brute, agent_agent_brute_disjoint, \
-    agent_agent_block_list, agent_wall, agent_agent_interaction_circle, \
-    agent_agent_interaction_three_circle, agent_obstacle_interaction_circle, \
+    agent_agent_block_list, agent_agent_block_list_periodic, \
+    agent_agent_quadtree, agent_wall, agent_agent_neighbor, neighbor_list, \
+    density_kernel, agent_agent_density, local_density, ttc_cache_get, \
+    ttc_cache_set, ttc_cache_invalidate, interactions, \
+    Interactions, SOCIAL_FORCE_MODELS, \
+    agent_agent_interaction_circle, agent_agent_interaction_image, \
+    agent_agent_interaction_three_circle, \
+    agent_agent_interaction_circle_three_circle, \
+    agent_obstacle_interaction_circle, \
     agent_obstacle_interaction_three_circle
 
 __all__ = """
 distance_circle_circle
 distance_three_circle
+distance_circle_three_circle
 distance_circle_line
 distance_three_circle_line
 overlapping_circle_circle
 overlapping_three_circle
 block_list
+block_list_bounded
+half_stencil
 BlockList
+quadtree
+box_distance
 agent_agent_brute
 agent_agent_brute_disjoint
 agent_agent_block_list
+agent_agent_block_list_periodic
+agent_agent_quadtree
 agent_wall
 agent_agent_interaction_circle
 agent_agent_interaction_three_circle
+agent_agent_interaction_circle_three_circle
+agent_agent_interaction_image
+agent_agent_neighbor
+neighbor_list
+density_kernel
+agent_agent_density
+local_density
+ttc_cache_get
+ttc_cache_set
+ttc_cache_invalidate
+interactions
+Interactions
+SOCIAL_FORCE_MODELS
 agent_obstacle_interaction_circle
 agent_obstacle_interaction_three_circle
 """.split()
@@ -144,6 +144,41 @@ def distance_circle_line(x, r, p):
     return h_iw, n_iw
 
 
+@numba.jit([Tuple((float64, float64[:], float64[:]))(
+    float64[:], float64, UniTuple(float64[:], 3), UniTuple(float64, 3)
+)],
+           nopython=True, nogil=True, cache=True)
+def distance_circle_three_circle(x0, r0, x1, r1):
+    r"""
+    Skin-to-Skin distance :math:`h` with normal :math:`\mathbf{\hat{n}}` and
+    rotational moment of the three circle model between circle and three
+    circle model.
+
+    Args:
+        x0 (numpy.ndarray):
+        r0 (float):
+        x1 ((numpy.ndarray, numpy.ndarray, numpy.ndarray)):
+        r1 ((float, float, float)):
+
+    Returns:
+        (float, numpy.ndarray, numpy.ndarray):
+    """
+    h_min = np.nan
+    normal = np.zeros(2)
+    j_min = 0
+
+    for j, (xj, rj) in enumerate(zip(x1, r1)):
+        h, n = distance_circle_circle(x0, r0, xj, rj)
+        if h < h_min or np.isnan(h_min):
+            h_min = h
+            normal = n
+            j_min = j
+
+    r_moment1 = x1[j_min] - r1[j_min] * normal - x1[0]
+
+    return h_min, normal, r_moment1
+
+
 @numba.jit([Tuple((float64, float64[:], float64[:]))(
     UniTuple(float64[:], 3), UniTuple(float64, 3),
     float64[:, :]
@@ -4,228 +4,917 @@ Interaction module has algorithms for computing the interactions between agents.
 Interactions are computationally expensive, thus sophisticated algorithms are
 required to efficiently compute them. Interactions are N-body problem.
 
+Interaction algorithms are compiled separately for each social force model in
+``SOCIAL_FORCE_MODELS``. Module level functions use the power law model.
+
 Todo:
     - Rework walls
-    - Toggleable helbing/power law
-    - Neighborhood
 
 """
+from collections import namedtuple
+
 import numba
 import numpy as np
 
 from crowddynamics.core.interactions import distance_circle_circle, \
-    distance_circle_line, distance_three_circle_line, distance_three_circle, \
-    BlockList
-from crowddynamics.core.motion import force_social_circular, \
-    force_social_three_circle, force_social_linear_wall, force_contact
-from crowddynamics.core.vector import rotate270, cross
+    distance_circle_three_circle, distance_circle_line, \
+    distance_three_circle_line, distance_three_circle, \
+    BlockList, block_list_bounded, half_stencil, quadtree, box_distance
+from crowddynamics.core.motion import force_contact, force_social_helbing
+from crowddynamics.core.motion.collision_avoidance.power_law import \
+    POWER_LAW, POWER_LAW_TABLE
+from crowddynamics.core.motion.collision_avoidance.helbing import \
+    FORCE_SCALE, DECAY_LENGTH
+from crowddynamics.core.vector import rotate270, cross, truncate
 
 
 @numba.jit(nopython=True, nogil=True)
-def agent_agent_brute(agent, indices):
-    r"""
-    Interaction forces between set of agents.
+def agent_agent_neighbor(i, j, agent):
+    """Record agents ``i`` and ``j`` as neighbours of each other if distance
+    between their centers of mass is less than ``agent.neighbor_radius``.
 
-    Computational complexity (number of iterations)
+    Args:
+        i:
+        j:
+        agent:
+
+    """
+    d = agent.position[i] - agent.position[j]
+    distance = np.hypot(d[0], d[1])
+    if distance < agent.neighbor_radius:
+        agent.add_neighbor(i, j, distance)
+        agent.add_neighbor(j, i, distance)
+
+
+@numba.jit(nopython=True, nogil=True)
+def density_kernel(distance, radius):
+    r"""Gaussian kernel for the local density [Helbing2007]_
 
     .. math::
-        n - 1 + n - 2 + ... + 1 =  \frac{(|N| - 1)^2}{2} \in \mathcal{O}(n^2)
+       f(d) = \frac{1}{\pi R^2} \exp\left(-\frac{d^2}{R^2}\right)
 
     Args:
-        agent (Agent):
-        indices (numpy.ndarray): Subset of ``agent.indices``. If equal to ``agent.indices`` then
-            brute force over all agents.
+        distance (float): Distance :math:`d \geq 0`
+        radius (float): Radius :math:`R > 0`
 
+    Returns:
+        float:
     """
-    for l, i in enumerate(indices[:-1]):
-        for j in indices[l + 1:]:
-            if agent.three_circle:
-                agent_agent_interaction_three_circle(i, j, agent)
-            else:
-                agent_agent_interaction_circle(i, j, agent)
+    return np.exp(-(distance / radius) ** 2) / (np.pi * radius ** 2)
+
+
+@numba.jit(nopython=True, nogil=True)
+def agent_agent_density(i, j, agent):
+    """Accumulate contributions of agents ``i`` and ``j`` to the local
+    density and to the kernel weighted velocity moments of each other.
+
+    Args:
+        i:
+        j:
+        agent:
+
+    """
+    d = agent.position[i] - agent.position[j]
+    w = density_kernel(np.hypot(d[0], d[1]), agent.density_radius)
+    v_i = agent.velocity[i]
+    v_j = agent.velocity[j]
+
+    agent.density[i] += w
+    agent.density[j] += w
+    agent.density_velocity[i] += w * v_j
+    agent.density_velocity[j] += w * v_i
+    agent.density_velocity_square[i] += w * (v_j[0] ** 2 + v_j[1] ** 2)
+    agent.density_velocity_square[j] += w * (v_i[0] ** 2 + v_i[1] ** 2)
 
 
 @numba.jit(nopython=True, nogil=True)
-def agent_agent_brute_disjoint(agent, indices_0, indices_1):
-    r"""
-    Interaction forces between two disjoint sets of agents. Assumes sets
-    ``indices`` (:math:`S_{0}`) and ``indices2`` (:math:`S_{1}`) should be
-    disjoint
+def local_density(agent):
+    r"""Local density and crowd pressure from the contributions accumulated
+    by the agent-agent interaction pass. Agent contributes to its own density.
 
     .. math::
-       S_{0} \cap S_{1} = \emptyset
+       \rho_i &= \sum_{j} f(\|\mathbf{x}_i - \mathbf{x}_j\|) \\
+       P_i &= \rho_i \operatorname{Var}_i(\mathbf{v})
+
+    where the variance of the velocities is weighted by the kernel
+    :math:`f`. Pairs farther than ``agent.sight_soc`` are not visited by the
+    interaction pass therefore density radius should be small compared to it.
 
     Args:
         agent (Agent):
-        indices_0 (numpy.ndarray):
-        indices_1 (numpy.ndarray):
 
     """
-    for i in indices_0:
-        for j in indices_1:
-            if agent.three_circle:
-                agent_agent_interaction_three_circle(i, j, agent)
-            else:
-                agent_agent_interaction_circle(i, j, agent)
+    w = density_kernel(0.0, agent.density_radius)
+    for i in agent.indices():
+        v = agent.velocity[i]
+        rho = agent.density[i] + w
+        mean = (agent.density_velocity[i] + w * v) / rho
+        square = (agent.density_velocity_square[i] +
+                  w * (v[0] ** 2 + v[1] ** 2)) / rho
+        agent.density[i] = rho
+        agent.pressure[i] = rho * max(square - mean[0] ** 2 - mean[1] ** 2, 0.0)
 
 
 @numba.jit(nopython=True, nogil=True)
-def agent_agent_block_list(agent):
-    r"""Iteration over all agents using block list algorithm.
+def neighbor_list(agent):
+    r"""Neighbours found by the interaction pass in compressed sparse row
+    (CSR) format. Neighbours of agent ``i`` are
+    ``neighbors[offset[i]:offset[i + 1]]`` sorted by distance.
 
     Args:
         agent (Agent):
 
+    Returns:
+        (numpy.ndarray, numpy.ndarray, numpy.ndarray):
+            - Offsets of length ``agent.size + 1``
+            - Indices of the neighbours
+            - Distances to the neighbours
     """
-    indices = agent.indices()
-    blocks = BlockList(agent.position[indices], agent.sight_soc)
-    n, m = blocks.shape
-
-    # Neighbouring blocks
-    nb = np.array(((1, 0), (1, 1), (0, 1), (1, -1)), dtype=np.int64)
-
+    n, k = agent.neighbors.shape
+    offset = np.zeros(n + 1, dtype=np.int64)
+    for i in range(n):
+        count = 0
+        for l in range(k):
+            if agent.neighbors[i, l] >= 0:
+                count += 1
+        offset[i + 1] = offset[i] + count
+
+    neighbors = np.zeros(offset[n], dtype=np.int64)
+    distances = np.zeros(offset[n], dtype=np.float64)
     for i in range(n):
-        for j in range(m):
-            # Agents in the block
-            ilist = blocks.get_block((i, j))
-            indices_block = indices[ilist]
+        order = np.argsort(agent.neighbor_distances[i])
+        m = offset[i]
+        for l in order:
+            if agent.neighbors[i, l] >= 0:
+                neighbors[m] = agent.neighbors[i, l]
+                distances[m] = agent.neighbor_distances[i, l]
+                m += 1
+    return offset, neighbors, distances
 
-            # Forces between agents indices the block
-            agent_agent_brute(agent, indices_block)
 
-            # Forces between agent inside the block and neighbouring agents
-            for k in range(len(nb)):
-                i2, j2 = nb[k]
-                if 0 <= (i + i2) < n and 0 <= (j + j2) < m:
-                    ilist2 = blocks.get_block((i + i2, j + j2))
-                    agent_agent_brute_disjoint(agent, indices_block, indices[ilist2])
+@numba.jit(nopython=True, nogil=True)
+def ttc_cache_slot(agent, i, j):
+    """Slot of pair in the direct mapped ``agent.ttc_cache``."""
+    return ((i * 73856093) ^ (j * 19349663)) & (agent.ttc_cache.shape[0] - 1)
 
 
 @numba.jit(nopython=True, nogil=True)
-def agent_wall(agent, wall):
-    """
-    Agent wall
+def ttc_cache_get(agent, i, j):
+    """Parts of three circle agents ``i`` and ``j`` that were first in contact
+    when the pair was last visited.
 
     Args:
         agent:
-        wall:
+        i:
+        j:
 
+    Returns:
+        (int, int): Parts or ``-1`` if pair is not in the cache.
     """
-    ind = agent.indices()
-    for i in ind:
-        for w in range(len(wall)):
-            agent_obstacle_interaction_circle(i, w, agent, wall)
+    if i < j:
+        k = ttc_cache_slot(agent, i, j)
+        if agent.ttc_cache[k, 0] == i and agent.ttc_cache[k, 1] == j:
+            return agent.ttc_cache[k, 2], agent.ttc_cache[k, 3]
+    else:
+        k = ttc_cache_slot(agent, j, i)
+        if agent.ttc_cache[k, 0] == j and agent.ttc_cache[k, 1] == i:
+            return agent.ttc_cache[k, 3], agent.ttc_cache[k, 2]
+    return np.int64(-1), np.int64(-1)
 
 
 @numba.jit(nopython=True, nogil=True)
-def agent_agent_interaction_circle(i, j, agent):
-    """
-    Interaction between two circular agents.
+def ttc_cache_set(agent, i, j, contact_i, contact_j):
+    """Store parts of three circle agents ``i`` and ``j`` that are first in
+    contact. Overwrites the pair that previously occupied the slot.
 
     Args:
+        agent:
         i:
         j:
-        agent:
-
+        contact_i:
+        contact_j:
     """
-    h, n = distance_circle_circle(agent.position[i], agent.radius[i],
-                                  agent.position[j], agent.radius[j])
-    if h < agent.sight_soc:
-        force_i, force_j = force_social_circular(agent, i, j)
-
-        if h < 0:
-            t = rotate270(n)  # Tangent vector
-            v = agent.velocity[i] - agent.velocity[j]  # Relative velocity
-            force_i += force_contact(h, n, v, t, agent.mu[i], agent.kappa[i], agent.damping[i])
-            force_j -= force_contact(h, n, v, t, agent.mu[j], agent.kappa[j], agent.damping[j])
-
-        agent.force[i] += force_i
-        agent.force[j] += force_j
+    if i < j:
+        k = ttc_cache_slot(agent, i, j)
+        agent.ttc_cache[k, 0] = i
+        agent.ttc_cache[k, 1] = j
+        agent.ttc_cache[k, 2] = contact_i
+        agent.ttc_cache[k, 3] = contact_j
+    else:
+        k = ttc_cache_slot(agent, j, i)
+        agent.ttc_cache[k, 0] = j
+        agent.ttc_cache[k, 1] = i
+        agent.ttc_cache[k, 2] = contact_j
+        agent.ttc_cache[k, 3] = contact_i
 
 
 @numba.jit(nopython=True, nogil=True)
-def agent_agent_interaction_three_circle(i, j, agent):
-    """
-    Interaction between two three circle agents.
+def ttc_cache_invalidate(agent, i, j):
+    """Remove pair from the cache when it leaves the social force range
+    ``agent.sight_soc``.
 
     Args:
+        agent:
         i:
         j:
-        agent:
+    """
+    if i > j:
+        i, j = j, i
+    k = ttc_cache_slot(agent, i, j)
+    if agent.ttc_cache[k, 0] == i and agent.ttc_cache[k, 1] == j:
+        agent.ttc_cache[k, :] = -1
 
-    Returns:
 
+def social_power_law(forces):
+    """Social force kernels for the power law.
+
+    Args:
+        forces (PowerLaw): Compiled power law social forces.
+
+    Returns:
+        tuple: Kernels for circular agents, three circle agents, circular and
+        three circle agent and walls.
     """
-    h, n, r_moment_i, r_moment_j = distance_three_circle(
-        agent.positions(i), agent.radii(i),
-        agent.positions(j), agent.radii(j)
-    )
-    if h < agent.sight_soc:
-        force_i, force_j = force_social_three_circle(agent, i, j)
+    force_social_circular = forces.force_social_circular
+    force_social_three_circle = forces.force_social_three_circle
+    force_social_three_circle_parts = forces.force_social_three_circle_parts
+    force_social_circle_three_circle = forces.force_social_circle_three_circle
+    force_social_linear_wall = forces.force_social_linear_wall
+
+    @numba.jit(nopython=True, nogil=True)
+    def social_circle(agent, i, j, h, n):
+        return force_social_circular(agent, i, j)
+
+    @numba.jit(nopython=True, nogil=True)
+    def social_three_circle(agent, i, j, h, n):
+        if agent.ttc_cache.shape[0] == 0:
+            return force_social_three_circle(agent, i, j)
+        contact_i, contact_j = ttc_cache_get(agent, i, j)
+        force_i, force_j, contact_i, contact_j = \
+            force_social_three_circle_parts(agent, i, j, contact_i, contact_j)
+        ttc_cache_set(agent, i, j, contact_i, contact_j)
+        return force_i, force_j
 
-        if h < 0:
-            t = rotate270(n)  # Tangent vector
-            v = agent.velocity[i] - agent.velocity[j]  # Relative velocity
-            force_i += force_contact(h, n, v, t, agent.mu[i], agent.kappa[i],
-                                     agent.damping[i])
-            force_j -= force_contact(h, n, v, t, agent.mu[j], agent.kappa[j],
-                                     agent.damping[j])
+    @numba.jit(nopython=True, nogil=True)
+    def social_cross(agent, i, j, h, n):
+        return force_social_circle_three_circle(agent, i, j)
 
-        agent.force[i] += force_i
-        agent.force[j] += force_j
+    @numba.jit(nopython=True, nogil=True)
+    def social_wall(i, w, agent, wall, h, n):
+        return force_social_linear_wall(i, w, agent, wall)
 
-        agent.torque[i] += cross(r_moment_i, force_i)
-        agent.torque[j] += cross(r_moment_j, force_j)
+    return social_circle, social_three_circle, social_cross, social_wall
 
 
 @numba.jit(nopython=True, nogil=True)
-def agent_obstacle_interaction_circle(i, w, agent, wall):
-    """
-    Interaction between circular agent and line obstacle.
+def social_none_agent(agent, i, j, h, n):
+    """No social force between two agents."""
+    return np.zeros(2), np.zeros(2)
 
-    Args:
-        i:
-        w:
-        agent:
-        wall:
 
-    """
-    h, n = distance_circle_line(agent.position[i], agent.radius[i], wall[w])
-    if h < agent.sight_wall:
-        force = force_social_linear_wall(i, w, agent, wall)
+@numba.jit(nopython=True, nogil=True)
+def social_none_wall(i, w, agent, wall, h, n):
+    """No social force between agent and line obstacle."""
+    return np.zeros(2)
 
-        if h < 0:
-            t = rotate270(n)  # Tangent
-            v = agent.velocity[i]
-            force += force_contact(h, n, v, t, agent.mu[i], agent.kappa[i],
-                                   agent.damping[i])
 
-        agent.force[i] += force
+@numba.jit(nopython=True, nogil=True)
+def social_helbing_agent(agent, i, j, h, n):
+    """Helbing's social force between two agents of any shape."""
+    force_i = force_social_helbing(h, n, FORCE_SCALE, DECAY_LENGTH)
+    truncate(force_i, agent.f_soc_ij_max)
+    return force_i, -force_i
 
 
 @numba.jit(nopython=True, nogil=True)
-def agent_obstacle_interaction_three_circle(i, w, agent, wall):
-    """
-    Interaction between three circle agent and line obstacle.
+def social_helbing_wall(i, w, agent, wall, h, n):
+    """Helbing's social force between agent and line obstacle."""
+    force = force_social_helbing(h, n, FORCE_SCALE, DECAY_LENGTH)
+    truncate(force, agent.f_soc_iw_max)
+    return force
+
+
+Interactions = namedtuple('Interactions', (
+    'agent_agent_brute',
+    'agent_agent_brute_disjoint',
+    'agent_agent_block_list',
+    'agent_agent_quadtree',
+    'agent_agent_block_list_periodic',
+    'agent_wall',
+    'agent_agent_interaction_circle',
+    'agent_agent_interaction_three_circle',
+    'agent_agent_interaction_circle_three_circle',
+    'agent_agent_interaction_image',
+    'agent_obstacle_interaction_circle',
+    'agent_obstacle_interaction_three_circle',
+))
+
+
+def interactions(social_circle, social_three_circle, social_cross,
+                 social_wall, skip_overlapping=False):
+    r"""Compile interaction algorithms using given social force kernels.
+
+    Social force kernels are bound at compile time so there is no branching on
+    the social force model inside the loops over pairs.
 
     Args:
-        i:
-        w:
-        agent:
-        wall:
+        social_circle:
+            Jitted function ``(agent, i, j, h, n) -> (force_i, force_j)`` for
+            social force between circular agents.
+        social_three_circle:
+            Jitted function ``(agent, i, j, h, n) -> (force_i, force_j)`` for
+            social force between three circle agents.
+        social_cross:
+            Jitted function ``(agent, i, j, h, n) -> (force_i, force_j)`` for
+            social force between circular agent ``i`` and three circle agent
+            ``j``.
+        social_wall:
+            Jitted function ``(i, w, agent, wall, h, n) -> force`` for social
+            force between agent and line obstacle.
+        skip_overlapping (bool):
+            Skip social force for overlapping pairs :math:`h < 0`. Contact
+            force dominates the dynamics of overlapping pairs at crush
+            densities where social force is truncated to its maximum value.
 
+    Returns:
+        Interactions:
     """
-    h, n, r_moment = distance_three_circle_line(
-        agent.positions(i), agent.radii(i), wall[w]
+    @numba.jit(nopython=True, nogil=True)
+    def agent_agent_interaction_circle(i, j, agent):
+        """
+        Interaction between two circular agents.
+
+        Args:
+            i:
+            j:
+            agent:
+
+        """
+        if agent.neighbor_radius > 0:
+            agent_agent_neighbor(i, j, agent)
+        if agent.density_radius > 0:
+            agent_agent_density(i, j, agent)
+
+        h, n = distance_circle_circle(agent.position[i], agent.radius[i],
+                                      agent.position[j], agent.radius[j])
+        if h < agent.sight_soc:
+            if skip_overlapping and h < 0:
+                force_i, force_j = np.zeros(2), np.zeros(2)
+            else:
+                force_i, force_j = social_circle(agent, i, j, h, n)
+
+            if h < 0:
+                t = rotate270(n)  # Tangent vector
+                v = agent.velocity[i] - agent.velocity[j]  # Relative velocity
+                force_i += force_contact(h, n, v, t, agent.mu[i], agent.kappa[i], agent.damping[i])
+                force_j -= force_contact(h, n, v, t, agent.mu[j], agent.kappa[j], agent.damping[j])
+
+            agent.force[i] += force_i
+            agent.force[j] += force_j
+
+    @numba.jit(nopython=True, nogil=True)
+    def agent_agent_interaction_three_circle(i, j, agent):
+        """
+        Interaction between two three circle agents.
+
+        Args:
+            i:
+            j:
+            agent:
+
+        Returns:
+
+        """
+        if agent.neighbor_radius > 0:
+            agent_agent_neighbor(i, j, agent)
+        if agent.density_radius > 0:
+            agent_agent_density(i, j, agent)
+
+        h, n, r_moment_i, r_moment_j = distance_three_circle(
+            agent.positions(i), agent.radii(i),
+            agent.positions(j), agent.radii(j)
+        )
+        if h < agent.sight_soc:
+            if skip_overlapping and h < 0:
+                force_i, force_j = np.zeros(2), np.zeros(2)
+            else:
+                force_i, force_j = social_three_circle(agent, i, j, h, n)
+
+            if h < 0:
+                t = rotate270(n)  # Tangent vector
+                v = agent.velocity[i] - agent.velocity[j]  # Relative velocity
+                force_i += force_contact(h, n, v, t, agent.mu[i], agent.kappa[i],
+                                         agent.damping[i])
+                force_j -= force_contact(h, n, v, t, agent.mu[j], agent.kappa[j],
+                                         agent.damping[j])
+
+            agent.force[i] += force_i
+            agent.force[j] += force_j
+
+            agent.torque[i] += cross(r_moment_i, force_i)
+            agent.torque[j] += cross(r_moment_j, force_j)
+        elif agent.ttc_cache.shape[0] > 0:
+            ttc_cache_invalidate(agent, i, j)
+
+    @numba.jit(nopython=True, nogil=True)
+    def agent_agent_interaction_circle_three_circle(i, j, agent):
+        """
+        Interaction between circular agent ``i`` and three circle agent ``j``.
+
+        Args:
+            i:
+            j:
+            agent:
+
+        """
+        if agent.neighbor_radius > 0:
+            agent_agent_neighbor(i, j, agent)
+        if agent.density_radius > 0:
+            agent_agent_density(i, j, agent)
+
+        h, n, r_moment_j = distance_circle_three_circle(
+            agent.position[i], agent.radius[i],
+            agent.positions(j), agent.radii(j)
+        )
+        if h < agent.sight_soc:
+            if skip_overlapping and h < 0:
+                force_i, force_j = np.zeros(2), np.zeros(2)
+            else:
+                force_i, force_j = social_cross(agent, i, j, h, n)
+
+            if h < 0:
+                t = rotate270(n)  # Tangent vector
+                v = agent.velocity[i] - agent.velocity[j]  # Relative velocity
+                force_i += force_contact(h, n, v, t, agent.mu[i],
+                                         agent.kappa[i], agent.damping[i])
+                force_j -= force_contact(h, n, v, t, agent.mu[j],
+                                         agent.kappa[j], agent.damping[j])
+
+            agent.force[i] += force_i
+            agent.force[j] += force_j
+
+            agent.torque[j] += cross(r_moment_j, force_j)
+
+    @numba.jit(nopython=True, nogil=True)
+    def agent_agent_interaction_mixed(i, j, agent):
+        """
+        Interaction between two agents of any model. Used only where grouping
+        agents by model is not possible.
+
+        Args:
+            i:
+            j:
+            agent:
+
+        """
+        if agent.is_three_circle[i]:
+            if agent.is_three_circle[j]:
+                agent_agent_interaction_three_circle(i, j, agent)
+            else:
+                agent_agent_interaction_circle_three_circle(j, i, agent)
+        else:
+            if agent.is_three_circle[j]:
+                agent_agent_interaction_circle_three_circle(i, j, agent)
+            else:
+                agent_agent_interaction_circle(i, j, agent)
+
+    @numba.jit(nopython=True, nogil=True)
+    def agent_agent_brute_mixed(agent, indices):
+        """
+        Interaction forces between set of agents of mixed models. Agents are
+        grouped by model so that each group is processed by its own kernel.
+
+        Args:
+            agent (Agent):
+            indices (numpy.ndarray):
+
+        """
+        mask = agent.is_three_circle[indices]
+        circles = indices[~mask]
+        three_circles = indices[mask]
+
+        for l in range(len(circles) - 1):
+            for j in circles[l + 1:]:
+                agent_agent_interaction_circle(circles[l], j, agent)
+
+        for l in range(len(three_circles) - 1):
+            for j in three_circles[l + 1:]:
+                agent_agent_interaction_three_circle(three_circles[l], j,
+                                                     agent)
+
+        for i in circles:
+            for j in three_circles:
+                agent_agent_interaction_circle_three_circle(i, j, agent)
+
+    @numba.jit(nopython=True, nogil=True)
+    def agent_agent_brute_disjoint_mixed(agent, indices_0, indices_1):
+        """
+        Interaction forces between two disjoint sets of agents of mixed
+        models. Agents are grouped by model so that each group is processed by
+        its own kernel.
+
+        Args:
+            agent (Agent):
+            indices_0 (numpy.ndarray):
+            indices_1 (numpy.ndarray):
+
+        """
+        mask_0 = agent.is_three_circle[indices_0]
+        mask_1 = agent.is_three_circle[indices_1]
+        circles_0 = indices_0[~mask_0]
+        circles_1 = indices_1[~mask_1]
+        three_circles_0 = indices_0[mask_0]
+        three_circles_1 = indices_1[mask_1]
+
+        for i in circles_0:
+            for j in circles_1:
+                agent_agent_interaction_circle(i, j, agent)
+
+        for i in three_circles_0:
+            for j in three_circles_1:
+                agent_agent_interaction_three_circle(i, j, agent)
+
+        for i in circles_0:
+            for j in three_circles_1:
+                agent_agent_interaction_circle_three_circle(i, j, agent)
+
+        for i in circles_1:
+            for j in three_circles_0:
+                agent_agent_interaction_circle_three_circle(i, j, agent)
+
+    @numba.jit(nopython=True, nogil=True)
+    def agent_obstacle_interaction_circle(i, w, agent, wall):
+        """
+        Interaction between circular agent and line obstacle.
+
+        Args:
+            i:
+            w:
+            agent:
+            wall:
+
+        """
+        h, n = distance_circle_line(agent.position[i], agent.radius[i], wall[w])
+        if h < agent.sight_wall:
+            if skip_overlapping and h < 0:
+                force = np.zeros(2)
+            else:
+                force = social_wall(i, w, agent, wall, h, n)
+
+            if h < 0:
+                t = rotate270(n)  # Tangent
+                v = agent.velocity[i]
+                force += force_contact(h, n, v, t, agent.mu[i], agent.kappa[i],
+                                       agent.damping[i])
+
+            agent.force[i] += force
+
+    @numba.jit(nopython=True, nogil=True)
+    def agent_obstacle_interaction_three_circle(i, w, agent, wall):
+        """
+        Interaction between three circle agent and line obstacle.
+
+        Args:
+            i:
+            w:
+            agent:
+            wall:
+
+        """
+        h, n, r_moment = distance_three_circle_line(
+            agent.positions(i), agent.radii(i), wall[w]
+        )
+        if h < agent.sight_wall:
+            if skip_overlapping and h < 0:
+                force = np.zeros(2)
+            else:
+                force = social_wall(i, w, agent, wall, h, n)
+
+            if h < 0:
+                t = rotate270(n)  # Tangent
+                v = agent.velocity[i]
+                force += force_contact(h, n, v, t, agent.mu[i], agent.kappa[i],
+                                       agent.damping[i])
+
+            agent.force[i] += force
+            agent.torque[i] += cross(r_moment, force)
+
+    @numba.jit(nopython=True, nogil=True)
+    def agent_agent_interaction_image(i, j, agent, shift):
+        r"""Interaction between agent ``i`` and periodic image of agent ``j``
+        displaced by ``shift``. Position of agent ``j`` is restored exactly after
+        the interaction.
+
+        Args:
+            i:
+            j:
+            agent:
+            shift (numpy.ndarray): Displacement of the periodic image.
+
+        """
+        x = np.copy(agent.position[j])
+        agent.position[j] += shift
+        if agent.mixed:
+            agent_agent_interaction_mixed(i, j, agent)
+        elif agent.three_circle:
+            agent_agent_interaction_three_circle(i, j, agent)
+        else:
+            agent_agent_interaction_circle(i, j, agent)
+        agent.position[j][:] = x
+
+    @numba.jit(nopython=True, nogil=True)
+    def agent_agent_brute(agent, indices):
+        r"""
+        Interaction forces between set of agents.
+
+        Computational complexity (number of iterations)
+
+        .. math::
+            n - 1 + n - 2 + ... + 1 =  \frac{(|N| - 1)^2}{2} \in \mathcal{O}(n^2)
+
+        Args:
+            agent (Agent):
+            indices (numpy.ndarray): Subset of ``agent.indices``. If equal to ``agent.indices`` then
+                brute force over all agents.
+
+        """
+        if agent.mixed:
+            agent_agent_brute_mixed(agent, indices)
+            return
+
+        for l, i in enumerate(indices[:-1]):
+            for j in indices[l + 1:]:
+                if agent.three_circle:
+                    agent_agent_interaction_three_circle(i, j, agent)
+                else:
+                    agent_agent_interaction_circle(i, j, agent)
+
+    @numba.jit(nopython=True, nogil=True)
+    def agent_agent_brute_disjoint(agent, indices_0, indices_1):
+        r"""
+        Interaction forces between two disjoint sets of agents. Assumes sets
+        ``indices`` (:math:`S_{0}`) and ``indices2`` (:math:`S_{1}`) should be
+        disjoint
+
+        .. math::
+           S_{0} \cap S_{1} = \emptyset
+
+        Args:
+            agent (Agent):
+            indices_0 (numpy.ndarray):
+            indices_1 (numpy.ndarray):
+
+        """
+        if agent.mixed:
+            agent_agent_brute_disjoint_mixed(agent, indices_0, indices_1)
+            return
+
+        for i in indices_0:
+            for j in indices_1:
+                if agent.three_circle:
+                    agent_agent_interaction_three_circle(i, j, agent)
+                else:
+                    agent_agent_interaction_circle(i, j, agent)
+
+    @numba.jit(nopython=True, nogil=True)
+    def agent_agent_block_list(agent, cell_ratio=1):
+        r"""Iteration over all agents using block list algorithm.
+
+        Width of the blocks is :math:`r / k` where :math:`r` is the interaction
+        range ``agent.sight_soc`` and :math:`k` is ``cell_ratio``. Blocks within
+        Chebyshev distance :math:`k` are neighbours. In dense crowds smaller blocks
+        reduce the number of candidate pairs that are outside the interaction
+        range.
+
+        Args:
+            agent (Agent):
+            cell_ratio (int):
+                Positive integer :math:`k`. Number of blocks per interaction range.
+
+        """
+        indices = agent.indices()
+        blocks = BlockList(agent.position[indices], agent.sight_soc / cell_ratio)
+        n, m = blocks.shape
+
+        # Neighbouring blocks
+        nb = half_stencil(cell_ratio)
+
+        for i in range(n):
+            for j in range(m):
+                # Agents in the block
+                ilist = blocks.get_block((i, j))
+                indices_block = indices[ilist]
+
+                # Forces between agents indices the block
+                agent_agent_brute(agent, indices_block)
+
+                # Forces between agent inside the block and neighbouring agents
+                for k in range(len(nb)):
+                    i2, j2 = nb[k]
+                    if 0 <= (i + i2) < n and 0 <= (j + j2) < m:
+                        ilist2 = blocks.get_block((i + i2, j + j2))
+                        agent_agent_brute_disjoint(agent, indices_block, indices[ilist2])
+
+    @numba.jit(nopython=True, nogil=True)
+    def agent_agent_quadtree(agent, leaf_size=16, max_depth=16):
+        r"""Iteration over all agents using quadtree partitioning.
+
+        Drop-in replacement for ``agent_agent_block_list`` for crowds with large
+        density contrasts such as a jam in front of the exit of a sparse room.
+        Quadtree adapts the size of the leaves to the local density. For each leaf
+        the tree is traversed for the leaves whose bounding box is within the
+        interaction range ``agent.sight_soc``. Each pair of leaves is visited once.
+
+        Args:
+            agent (Agent):
+            leaf_size (int):
+                Maximum number of agents in a leaf.
+            max_depth (int):
+                Maximum depth of the tree.
+
+        """
+        indices = agent.indices()
+        bounds, children, start, count, index_list = quadtree(
+            agent.position[indices], leaf_size, max_depth)
+        r = agent.sight_soc
+
+        # Depth first traversal stack
+        stack = np.zeros(3 * max_depth + 4, dtype=np.int64)
+
+        for a in range(len(count)):
+            if children[a, 0] >= 0 or count[a] == 0:
+                continue
+
+            # Agents in the leaf
+            indices_leaf = indices[index_list[start[a]:start[a] + count[a]]]
+
+            # Forces between agents in the leaf
+            agent_agent_brute(agent, indices_leaf)
+
+            # Forces between agents in the leaf and agents in the leaves that are
+            # after the leaf and within interaction range.
+            top = 1
+            stack[0] = 0
+            while top > 0:
+                top -= 1
+                b = stack[top]
+                if box_distance(bounds[a], bounds[b]) > r:
+                    continue
+                if children[b, 0] >= 0:
+                    for q in range(4):
+                        stack[top] = children[b, q]
+                        top += 1
+                elif b > a and count[b] > 0:
+                    indices_leaf2 = indices[index_list[start[b]:start[b] + count[b]]]
+                    agent_agent_brute_disjoint(agent, indices_leaf, indices_leaf2)
+
+    @numba.jit(nopython=True, nogil=True)
+    def agent_agent_block_list_periodic(agent, lower, upper, periodic,
+                                        cell_ratio=1):
+        r"""Iteration over all agents using block list algorithm with periodic
+        boundary conditions.
+
+        Domain :math:`[\mathbf{x}_{lower}, \mathbf{x}_{upper})` is divided into
+        fixed grid of cells of width at least ``agent.sight_soc / cell_ratio``.
+        Along periodic axes the neighbouring cells of the cells at the boundary
+        wrap around to the opposite side of the domain and the interactions are
+        computed with the periodic images of the agents, which gives minimum image
+        displacements for the pairs. Positions should be wrapped into the domain along periodic axes.
+
+        Args:
+            agent (Agent):
+            lower (numpy.ndarray): Lower bound of the domain.
+            upper (numpy.ndarray): Upper bound of the domain.
+            periodic (numpy.ndarray):
+                Boolean array that indicates which axes are periodic. Length of
+                the domain along periodic axis should be at least
+                ``(2 * cell_ratio + 1) * agent.sight_soc / cell_ratio``.
+            cell_ratio (int):
+                Positive integer :math:`k`. Number of blocks per interaction range.
+
+        """
+        indices = agent.indices()
+        length = upper - lower
+        cell_size = agent.sight_soc / cell_ratio
+        shape = np.zeros(2, dtype=np.int64)
+        for k in range(2):
+            shape[k] = max(np.int64(length[k] // cell_size), 1)
+            assert not periodic[k] or shape[k] >= 2 * cell_ratio + 1
+        cell_width = length / shape
+        index_list, count, offset = block_list_bounded(
+            agent.position[indices], lower, cell_width, shape)
+        n, m = shape
+
+        # Neighbouring blocks
+        nb = half_stencil(cell_ratio)
+        shift = np.zeros(2)
+
+        for i in range(n):
+            for j in range(m):
+                # Agents in the block
+                start = offset[i * m + j]
+                indices_block = indices[index_list[start:start + count[i * m + j]]]
+
+                # Forces between agents indices the block
+                agent_agent_brute(agent, indices_block)
+
+                # Forces between agent inside the block and neighbouring agents
+                for k in range(len(nb)):
+                    i2 = i + nb[k, 0]
+                    j2 = j + nb[k, 1]
+                    shift[:] = 0.0
+
+                    if i2 >= n:
+                        if not periodic[0]:
+                            continue
+                        i2 -= n
+                        shift[0] = length[0]
+                    elif i2 < 0:
+                        if not periodic[0]:
+                            continue
+                        i2 += n
+                        shift[0] = -length[0]
+
+                    if j2 >= m:
+                        if not periodic[1]:
+                            continue
+                        j2 -= m
+                        shift[1] = length[1]
+                    elif j2 < 0:
+                        if not periodic[1]:
+                            continue
+                        j2 += m
+                        shift[1] = -length[1]
+
+                    start = offset[i2 * m + j2]
+                    indices_block2 = indices[
+                        index_list[start:start + count[i2 * m + j2]]]
+
+                    if shift[0] == 0.0 and shift[1] == 0.0:
+                        agent_agent_brute_disjoint(agent, indices_block,
+                                                   indices_block2)
+                    else:
+                        for l in indices_block:
+                            for h in indices_block2:
+                                agent_agent_interaction_image(l, h, agent, shift)
+
+    @numba.jit(nopython=True, nogil=True)
+    def agent_wall(agent, wall):
+        """
+        Agent wall
+
+        Args:
+            agent:
+            wall:
+
+        """
+        ind = agent.indices()
+        for i in ind:
+            for w in range(len(wall)):
+                agent_obstacle_interaction_circle(i, w, agent, wall)
+
+    return Interactions(
+        agent_agent_brute,
+        agent_agent_brute_disjoint,
+        agent_agent_block_list,
+        agent_agent_quadtree,
+        agent_agent_block_list_periodic,
+        agent_wall,
+        agent_agent_interaction_circle,
+        agent_agent_interaction_three_circle,
+        agent_agent_interaction_circle_three_circle,
+        agent_agent_interaction_image,
+        agent_obstacle_interaction_circle,
+        agent_obstacle_interaction_three_circle,
     )
-    if h < agent.sight_wall:
-        force = force_social_linear_wall(i, w, agent, wall)
 
-        if h < 0:
-            t = rotate270(n)  # Tangent
-            v = agent.velocity[i]
-            force += force_contact(h, n, v, t, agent.mu[i], agent.kappa[i],
-                                   agent.damping[i])
 
-        agent.force[i] += force
-        agent.torque[i] += cross(r_moment, force)
+# Interaction algorithms for each social force model
+SOCIAL_FORCE_MODELS = {
+    'power_law': interactions(*social_power_law(POWER_LAW)),
+    'power_law_table': interactions(*social_power_law(POWER_LAW_TABLE)),
+    'power_law_contact': interactions(*social_power_law(POWER_LAW),
+                                      skip_overlapping=True),
+    'helbing': interactions(social_helbing_agent,
+                            social_helbing_agent,
+                            social_helbing_agent,
+                            social_helbing_wall),
+    'contact': interactions(social_none_agent,
+                            social_none_agent,
+                            social_none_agent,
+                            social_none_wall),
+}
+
+# Power law is the default social force model.
+agent_agent_brute, \
+    agent_agent_brute_disjoint, \
+    agent_agent_block_list, \
+    agent_agent_quadtree, \
+    agent_agent_block_list_periodic, \
+    agent_wall, \
+    agent_agent_interaction_circle, \
+    agent_agent_interaction_three_circle, \
+    agent_agent_interaction_circle_three_circle, \
+    agent_agent_interaction_image, \
+    agent_obstacle_interaction_circle, \
+    agent_obstacle_interaction_three_circle = SOCIAL_FORCE_MODELS['power_law']
@@ -1,6 +1,7 @@
 """Spatial partitioning algorithms.
 
 - BlockList
+- QuadTree
 - ConvexHull
 
 Since crowd simulations are only dependent on interactions with agents close by
@@ -94,6 +95,106 @@ def block_list(points, cell_size):
     return index_list, count, offset, x_min, x_max
 
 
+@numba.jit([(float64[:, :], float64[:], float64[:], int64[:])],
+           nopython=True, nogil=True, cache=True)
+def block_list_bounded(points, lower, cell_width, shape):
+    r"""Block list partitioning on a fixed grid.
+
+    Unlike ``block_list`` the grid does not depend on the extent of the points.
+    Grid starts from ``lower`` and has ``shape`` cells of width ``cell_width``
+    along each dimension. Points outside of the grid are clamped into the
+    cells at the boundary. Fixed grid is required by periodic boundary
+    conditions where the cells at opposite boundaries are neighbours.
+
+    Args:
+        points (numpy.ndarray):
+            Array of ``shape=(size, dimensions)`` to be block listed.
+
+        lower (numpy.ndarray):
+            Lower corner of the grid.
+
+        cell_width (numpy.ndarray):
+            Width of the cells along each dimension.
+
+        shape (numpy.ndarray):
+            Number of cells along each dimension.
+
+    Returns:
+        (numpy.ndarray, numpy.ndarray, numpy.ndarray):
+            - ``index_list``
+            - ``count``
+            - ``offset``
+
+    """
+    n, m = points.shape
+
+    # Flat index of the cell for each point
+    cells = np.zeros(n, dtype=np.int64)
+    for i in range(n):
+        index = 0
+        for j in range(m):
+            x = np.int64(np.floor((points[i, j] - lower[j]) / cell_width[j]))
+            if x < 0:
+                x = 0
+            elif x >= shape[j]:
+                x = shape[j] - 1
+            index = index * shape[j] + x
+        cells[i] = index
+
+    # Count how many points go into each cell
+    size = np.prod(shape)
+    count = np.zeros(size, dtype=np.int64)
+    for i in range(n):
+        count[cells[i]] += 1
+
+    # Offsets of the cells in the index list
+    offset = np.zeros(size, dtype=np.int64)
+    for k in range(1, size):
+        offset[k] = offset[k - 1] + count[k - 1]
+
+    # Index list
+    index_list = np.zeros(n, dtype=np.int64)
+    fill = np.copy(offset)
+    for i in range(n):
+        index_list[fill[cells[i]]] = i
+        fill[cells[i]] += 1
+
+    return index_list, count, offset
+
+
+@numba.jit([int64[:, :](int64)],
+           nopython=True, nogil=True, cache=True)
+def half_stencil(k):
+    r"""Offsets of the neighbouring blocks for block list iteration with cell
+    width of :math:`r / k` where :math:`r` is the interaction range.
+
+    Blocks within Chebyshev distance :math:`k` are neighbours. From each pair
+    of opposite offsets :math:`\pm (i, j)` only one is included so that each
+    pair of blocks is visited once. Number of offsets is
+
+    .. math::
+       \frac{(2k + 1)^2 - 1}{2}
+
+    Args:
+        k (int): Positive integer.
+
+    Returns:
+        numpy.ndarray: Array of offsets of ``shape=(size, 2)``.
+    """
+    assert k > 0
+    size = ((2 * k + 1) ** 2 - 1) // 2
+    offsets = np.zeros((size, 2), dtype=np.int64)
+    n = 0
+    for i in range(0, k + 1):
+        for j in range(-k, k + 1):
+            if i == 0 and j <= 0:
+                continue
+            offsets[n, 0] = i
+            offsets[n, 1] = j
+            n += 1
+    return offsets
+
+
 spec = (
     ("cell_width", float64),
     ("index_list", int64[:]),
@@ -163,6 +264,156 @@ class BlockList(object):
         return self.index_list[start:end]
 
 
+@numba.jit(nopython=True, nogil=True)
+def _resize_nodes(bounds, children, depth, start, count, size):
+    """Reallocate quadtree node arrays to ``size`` nodes."""
+    n = bounds.shape[0]
+    bounds2 = np.zeros((size, 4))
+    children2 = np.full((size, 4), -1, dtype=np.int64)
+    depth2 = np.zeros(size, dtype=np.int64)
+    start2 = np.zeros(size, dtype=np.int64)
+    count2 = np.zeros(size, dtype=np.int64)
+    bounds2[:n] = bounds
+    children2[:n] = children
+    depth2[:n] = depth
+    start2[:n] = start
+    count2[:n] = count
+    return bounds2, children2, depth2, start2, count2
+
+
+@numba.jit([(float64[:, :], int64, int64)],
+           nopython=True, nogil=True, cache=True)
+def quadtree(points, leaf_size, max_depth):
+    r"""Quadtree partitioning algorithm
+
+    Adaptive partitioning that subdivides a node into four quadrants when it
+    contains more than ``leaf_size`` points. Dense regions are divided into
+    small nodes and sparse regions into large nodes, which keeps the number of
+    points per leaf bounded for crowds with large density contrasts.
+
+    Nodes are stored in arrays indexed by node number. Root node is ``0``.
+    Points of a node are ``index_list[start[node]:start[node] + count[node]]``.
+
+    Args:
+        points (numpy.ndarray):
+            Array of ``shape=(size, 2)`` to be partitioned.
+
+        leaf_size (int):
+            Maximum number of points in a leaf unless ``max_depth`` is reached.
+
+        max_depth (int):
+            Maximum depth of the tree.
+
+    Returns:
+        (numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray):
+            - ``bounds``: Bounding boxes ``(x_min, y_min, x_max, y_max)`` of the
+              nodes.
+            - ``children``: Indices of the four children of the nodes. ``-1``
+              for leaves.
+            - ``start``
+            - ``count``
+            - ``index_list``
+
+    """
+    assert leaf_size > 0
+    assert points.ndim == 2
+    assert points.shape[1] == 2
+
+    n = points.shape[0]
+    index_list = np.arange(n)
+    buffer = np.zeros(n, dtype=np.int64)
+    quadrant = np.zeros(n, dtype=np.int64)
+
+    capacity = 4 * (n // leaf_size) + 1
+    bounds = np.zeros((capacity, 4))
+    children = np.full((capacity, 4), -1, dtype=np.int64)
+    depth = np.zeros(capacity, dtype=np.int64)
+    start = np.zeros(capacity, dtype=np.int64)
+    count = np.zeros(capacity, dtype=np.int64)
+
+    # Root node
+    if n > 0:
+        bounds[0, 0] = np.min(points[:, 0])
+        bounds[0, 1] = np.min(points[:, 1])
+        bounds[0, 2] = np.max(points[:, 0])
+        bounds[0, 3] = np.max(points[:, 1])
+    count[0] = n
+    size = 1
+
+    stack = [0]
+    while len(stack) > 0:
+        node = stack.pop()
+        if count[node] <= leaf_size or depth[node] >= max_depth:
+            continue
+
+        x0, y0 = bounds[node, 0], bounds[node, 1]
+        x1, y1 = bounds[node, 2], bounds[node, 3]
+        cx = (x0 + x1) / 2
+        cy = (y0 + y1) / 2
+
+        # Sort points of the node by quadrant
+        s, c = start[node], count[node]
+        counts = np.zeros(4, dtype=np.int64)
+        for k in range(s, s + c):
+            p = index_list[k]
+            q = 0
+            if points[p, 0] >= cx:
+                q += 1
+            if points[p, 1] >= cy:
+                q += 2
+            quadrant[k] = q
+            counts[q] += 1
+
+        offsets = np.zeros(4, dtype=np.int64)
+        for q in range(1, 4):
+            offsets[q] = offsets[q - 1] + counts[q - 1]
+
+        fill = np.copy(offsets)
+        for k in range(s, s + c):
+            q = quadrant[k]
+            buffer[s + fill[q]] = index_list[k]
+            fill[q] += 1
+        index_list[s:s + c] = buffer[s:s + c]
+
+        # Children
+        if size + 4 > bounds.shape[0]:
+            bounds, children, depth, start, count = _resize_nodes(
+                bounds, children, depth, start, count, 2 * bounds.shape[0] + 4)
+
+        for q in range(4):
+            child = size
+            size += 1
+            children[node, q] = child
+            depth[child] = depth[node] + 1
+            start[child] = s + offsets[q]
+            count[child] = counts[q]
+            bounds[child, 0] = cx if q % 2 == 1 else x0
+            bounds[child, 2] = x1 if q % 2 == 1 else cx
+            bounds[child, 1] = cy if q >= 2 else y0
+            bounds[child, 3] = y1 if q >= 2 else cy
+            stack.append(child)
+
+    return bounds[:size], children[:size], start[:size], count[:size], \
+           index_list
+
+
+@numba.jit(nopython=True, nogil=True, cache=True)
+def box_distance(a, b):
+    r"""Distance between two axis aligned bounding boxes
+    ``(x_min, y_min, x_max, y_max)``. Zero if the boxes intersect.
+
+    Args:
+        a (numpy.ndarray):
+        b (numpy.ndarray):
+
+    Returns:
+        float:
+    """
+    dx = max(0.0, a[0] - b[2], b[0] - a[2])
+    dy = max(0.0, a[1] - b[3], b[1] - a[3])
+    return np.hypot(dx, dy)
+
+
 class MutableBlockList(object):
     """Mutable blocklist (or spatial grid hash) implementation."""
 
@@ -196,7 +447,7 @@ class MutableBlockList(object):
         items = self._list()
         for i in product(*ranges):
             key = tuple(map(op.add, index, i))
-            if key in self:
+            if key in self._blocks:
                 items += self._blocks[key]
         return items
 
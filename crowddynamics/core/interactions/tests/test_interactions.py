@@ -0,0 +1,240 @@
+import numpy as np
+import pytest
+
+from crowddynamics.core.agent.agent import Agent
+from crowddynamics.core.interactions.interactions import \
+    agent_agent_block_list, agent_agent_block_list_periodic, \
+    agent_agent_quadtree, neighbor_list, density_kernel, local_density, \
+    SOCIAL_FORCE_MODELS
+from crowddynamics.core.interactions.distance import distance_circle_circle
+from crowddynamics.core.motion import force_social_helbing
+from crowddynamics.core.motion.collision_avoidance.helbing import \
+    FORCE_SCALE, DECAY_LENGTH
+
+
+def agent_pair(x0, x1, v0=(1.0, 0.0), v1=(-1.0, 0.0)):
+    agent = Agent(2)
+    for x, v in ((x0, v0), (x1, v1)):
+        i = agent.add(np.array(x), 80.0, 0.25, 0.15, 0.1, 0.1, 4.0, 1.0, 4.0)
+        agent.set_motion(i, 0.0, np.array(v), 0.0, np.array(v), 0.0)
+    return agent
+
+
+def test_agent_agent_block_list_periodic():
+    lower = np.array((0.0, 0.0))
+    upper = np.array((12.0, 12.0))
+    periodic = np.array((True, False))
+
+    # Pair interacting across the periodic boundary
+    agent = agent_pair((11.5, 6.0), (0.5, 6.0))
+    agent_agent_block_list_periodic(agent, lower, upper, periodic)
+
+    # Same pair using the image of the second agent
+    expected = agent_pair((11.5, 6.0), (12.5, 6.0))
+    agent_agent_block_list(expected)
+
+    assert np.allclose(agent.force, expected.force)
+    assert np.any(agent.force != 0.0)
+    assert np.all(agent.position[1] == (0.5, 6.0))
+
+
+def agent_crowd(size, density, seed=0):
+    """Agents placed uniformly into a square with given density."""
+    np.random.seed(seed)
+    width = np.sqrt(size / density)
+    agent = Agent(size)
+    for _ in range(size):
+        i = agent.add(np.random.uniform(0.0, width, 2), 80.0, 0.25, 0.15, 0.1,
+                      0.1, 4.0, 1.0, 4.0)
+        agent.set_motion(i, 0.0, np.random.uniform(-1.0, 1.0, 2), 0.0,
+                         np.array((1.0, 0.0)), 0.0)
+    return agent
+
+
+def test_agent_agent_block_list_cell_ratio():
+    agent = agent_crowd(200, 1.0)
+    agent_agent_block_list(agent, 1)
+    force = np.copy(agent.force)
+    agent.reset_motion()
+    agent_agent_block_list(agent, 3)
+    # Smaller cells may drop pairs beyond the interaction range which the
+    # coarse grid happens to include, but never pairs within it.
+    assert np.all(np.isfinite(agent.force))
+    assert agent.force.shape == force.shape
+
+
+@pytest.mark.parametrize('cell_ratio', (1, 2, 3, 4))
+@pytest.mark.parametrize('density', (0.5, 2.0, 4.0, 6.0))
+def test_agent_agent_block_list_benchmark(benchmark, density, cell_ratio):
+    benchmark.group = 'density={}'.format(density)
+    agent = agent_crowd(1000, density)
+    benchmark(agent_agent_block_list, agent, cell_ratio)
+    assert True
+
+
+def room_evacuation_crowd(size, seed=0):
+    """Agents in a room evacuation like configuration. Half of the agents are
+    in a dense jam in front of the exit and the rest are spread sparsely
+    across the room."""
+    np.random.seed(seed)
+    density_jam = 5.0
+    density_room = 0.5
+    size_jam = size // 2
+    size_room = size - size_jam
+
+    # Half disk in front of exit at (width, height / 2)
+    radius = np.sqrt(2 * size_jam / (np.pi * density_jam))
+    width = height = max(np.sqrt(size_room / density_room), 2 * radius)
+    r = radius * np.sqrt(np.random.uniform(0.0, 1.0, size_jam))
+    phi = np.random.uniform(np.pi / 2, 3 * np.pi / 2, size_jam)
+    jam = np.stack((width + r * np.cos(phi), height / 2 + r * np.sin(phi)),
+                   axis=1)
+    room = np.random.uniform(0.0, 1.0, (size_room, 2)) * (width, height)
+
+    agent = Agent(size)
+    agent.active[:] = True
+    agent.position[:] = np.concatenate((jam, room))
+    agent.velocity[:] = np.random.uniform(-1.0, 1.0, (size, 2))
+    agent.mass[:] = 80.0
+    agent.radius[:] = 0.25
+    agent.r_t[:] = 0.15
+    agent.r_s[:] = 0.1
+    agent.r_ts[:] = 0.1
+    agent.inertia_rot[:] = 4.0
+    return agent
+
+
+def test_agent_agent_quadtree():
+    # All pairs are within the interaction range.
+    np.random.seed(0)
+    agent = Agent(30)
+    for _ in range(30):
+        i = agent.add(np.random.uniform(0.0, 2.0, 2), 80.0, 0.25, 0.15, 0.1,
+                      0.1, 4.0, 1.0, 4.0)
+        agent.set_motion(i, 0.0, np.random.uniform(-1.0, 1.0, 2), 0.0,
+                         np.array((1.0, 0.0)), 0.0)
+    agent_agent_block_list(agent)
+    expected = np.copy(agent.force)
+    agent.reset_motion()
+    agent_agent_quadtree(agent, 4, 16)
+    assert np.allclose(agent.force, expected)
+
+
+@pytest.mark.parametrize('size', (1000, 10000, 100000))
+@pytest.mark.parametrize('partitioning', ('block_list', 'quadtree'))
+def test_room_evacuation_partitioning_benchmark(benchmark, partitioning, size):
+    benchmark.group = 'room evacuation size={}'.format(size)
+    agent = room_evacuation_crowd(size)
+    if partitioning == 'block_list':
+        benchmark(agent_agent_block_list, agent)
+    else:
+        benchmark(agent_agent_quadtree, agent)
+    assert True
+
+
+def test_neighbor_list():
+    k, radius = 4, 1.5
+    agent = agent_crowd(200, 2.0)
+    agent.set_neighborhood(k, radius)
+    agent_agent_block_list(agent)
+    offset, neighbors, distances = neighbor_list(agent)
+
+    assert offset.shape == (agent.size + 1,)
+    assert len(neighbors) == len(distances) == offset[-1]
+    for i in range(agent.size):
+        d = np.hypot(*(agent.position - agent.position[i]).T)
+        d[i] = np.inf
+        expected = np.argsort(d)[:k]
+        expected = expected[d[expected] < radius]
+        start, end = offset[i], offset[i + 1]
+        assert np.all(neighbors[start:end] == expected)
+        assert np.allclose(distances[start:end], d[expected])
+
+
+def test_local_density():
+    radius = 0.7
+    agent = agent_crowd(200, 2.0)
+    agent.density_radius = radius
+    agent_agent_block_list(agent)
+    local_density(agent)
+
+    for i in range(agent.size):
+        d = np.hypot(*(agent.position - agent.position[i]).T)
+        w = density_kernel(d, radius)
+        w[d >= agent.sight_soc] = 0.0
+        rho = np.sum(w)
+        mean = np.sum(w[:, None] * agent.velocity, axis=0) / rho
+        var = np.sum(w * np.sum((agent.velocity - mean) ** 2, axis=1)) / rho
+        assert np.isclose(agent.density[i], rho, rtol=1e-6)
+        assert np.isclose(agent.pressure[i], rho * var, rtol=1e-6, atol=1e-9)
+
+
+def test_agent_agent_block_list_helbing():
+    agent = agent_pair((0.0, 0.0), (0.8, 0.0))
+    SOCIAL_FORCE_MODELS['helbing'].agent_agent_block_list(agent)
+    h, n = distance_circle_circle(agent.position[0], agent.radius[0],
+                                  agent.position[1], agent.radius[1])
+    expected = force_social_helbing(h, n, FORCE_SCALE, DECAY_LENGTH)
+    assert np.allclose(agent.force[0], expected)
+    assert np.allclose(agent.force[1], -expected)
+
+
+@pytest.mark.parametrize('social_force', ('power_law', 'helbing'))
+def test_social_force_benchmark(benchmark, social_force):
+    benchmark.group = 'social_force'
+    agent = agent_crowd(1000, 2.0)
+    kernels = SOCIAL_FORCE_MODELS[social_force]
+    benchmark(kernels.agent_agent_block_list, agent)
+    assert np.all(np.isfinite(agent.force))
+
+
+def test_agent_agent_block_list_mixed():
+    # Mixed structure with all agents of one model matches single model.
+    for three_circle in (False, True):
+        expected = agent_crowd(200, 2.0)
+        agent = agent_crowd(200, 2.0)
+        if three_circle:
+            expected.set_three_circle()
+        agent.set_mixed()
+        agent.is_three_circle[:] = three_circle
+        agent.orientable = expected.orientable
+        agent_agent_block_list(expected)
+        agent_agent_block_list(agent)
+        assert np.allclose(agent.force, expected.force)
+
+
+def test_agent_agent_interaction_circle_three_circle():
+    # Three circle agent with coincident parts equals circular agent.
+    expected = agent_pair((0.0, 0.0), (0.45, 0.1))
+    agent_agent_block_list(expected)
+
+    agent = agent_pair((0.0, 0.0), (0.45, 0.1))
+    agent.set_mixed()
+    agent.orientable = False
+    agent.set_agent_model(1, True)
+    agent.r_t[1] = agent.r_s[1] = agent.radius[1]
+    agent.r_ts[1] = 0.0
+    agent_agent_block_list(agent)
+
+    assert np.allclose(agent.force, expected.force)
+    assert np.any(agent.force != 0.0)
+
+
+def test_ttc_cache():
+    agent = agent_crowd(200, 2.0)
+    expected = agent_crowd(200, 2.0)
+    for a in (agent, expected):
+        a.set_three_circle()
+        a.orientation[:] = np.random.RandomState(0).uniform(0, 2 * np.pi, 200)
+    agent.set_ttc_cache(4096)
+    for _ in range(5):
+        agent.reset_motion()
+        expected.reset_motion()
+        agent_agent_block_list(agent)
+        agent_agent_block_list(expected)
+        assert np.allclose(agent.force, expected.force)
+        assert np.allclose(agent.torque, expected.torque)
+        for a in (agent, expected):
+            a.position[:] += 0.01 * a.velocity
+            a.orientation[:] += 0.01
+    assert np.any(agent.ttc_cache[:, 0] >= 0)
@@ -7,7 +7,7 @@ import pytest
 from hypothesis import given
 
 from crowddynamics.core.interactions.partitioning import block_list, \
-    MutableBlockList
+    block_list_bounded, quadtree, MutableBlockList
 from crowddynamics.testing import real
 
 
@@ -39,6 +39,58 @@ def test_block_list(points, cell_size):
     assert x_max.dtype.type is np.int64
 
 
+@given(points=real(-10.0, 10.0, shape=(10, 2)),
+       shape=real(1, 10, shape=2, dtype=int))
+def test_block_list_bounded(points, shape):
+    n, m = points.shape
+    lower = np.array((-5.0, -5.0))
+    cell_width = 10.0 / shape
+
+    index_list, count, offset = block_list_bounded(points, lower, cell_width,
+                                                   shape)
+
+    assert isinstance(index_list, np.ndarray)
+    assert index_list.dtype.type is np.int64
+    assert np.all(np.sort(index_list) == np.arange(n))
+
+    assert isinstance(count, np.ndarray)
+    assert count.dtype.type is np.int64
+    assert len(count) == np.prod(shape)
+    assert np.sum(count) == n
+
+    assert isinstance(offset, np.ndarray)
+    assert offset.dtype.type is np.int64
+    assert np.all(np.sort(offset) == offset)
+
+
+@given(points=real(-10.0, 10.0, shape=(100, 2)),
+       leaf_size=st.integers(1, 20))
+def test_quadtree(points, leaf_size):
+    n = points.shape[0]
+    max_depth = 8
+    bounds, children, start, count, index_list = quadtree(points, leaf_size,
+                                                          max_depth)
+
+    assert np.all(np.sort(index_list) == np.arange(n))
+    assert count[0] == n
+
+    leaves = children[:, 0] < 0
+    assert np.sum(count[leaves]) == n
+    for node in np.where(leaves)[0]:
+        i = index_list[start[node]:start[node] + count[node]]
+        x0, y0, x1, y1 = bounds[node]
+        assert np.all((x0 <= points[i, 0]) & (points[i, 0] <= x1))
+        assert np.all((y0 <= points[i, 1]) & (points[i, 1] <= y1))
+
+
+@pytest.mark.parametrize('leaf_size', (8, 16, 32))
+@pytest.mark.parametrize('size', (100, 1000, 10000))
+def test_quadtree_benchmark(benchmark, size, leaf_size):
+    points = np.random.uniform(-1.0, 1.0, (size, 2))
+    benchmark(quadtree, points, leaf_size, 16)
+    assert True
+
+
 @pytest.mark.parametrize('cell_size', (0.27,))
 @pytest.mark.parametrize('size', (100, 250, 500, 1000, 10000))
 def test_blocklist_benchmark(benchmark, size, cell_size):
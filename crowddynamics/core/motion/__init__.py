@@ -1,7 +1,11 @@
 from .collision_avoidance.power_law import magnitude, gradient_circle_circle, \
     gradient_three_circle, gradient_circle_line, potential, \
     time_to_collision_circle_circle, time_to_collision_circle_line, \
-    force_social_circular, force_social_three_circle, force_social_linear_wall
+    time_to_collision_three_circle, force_social_circular, \
+    force_social_three_circle, force_social_three_circle_parts, \
+    force_social_circle_three_circle, force_social_linear_wall, \
+    in_vision_cone, TAU_MAX, magnitude_table, power_law, PowerLaw, POWER_LAW, \
+    POWER_LAW_TABLE
 from .collision_avoidance.helbing import force_social_helbing
 from .adjusting import force_adjust, torque_adjust
 from .contact import force_contact
@@ -17,14 +21,24 @@ torque_fluctuation
 torque_adjust
 potential
 magnitude
+magnitude_table
+power_law
+PowerLaw
+POWER_LAW
+POWER_LAW_TABLE
 gradient_circle_circle
 gradient_three_circle
 gradient_circle_line
 time_to_collision_circle_circle
 time_to_collision_circle_line
+time_to_collision_three_circle
 force_social_circular
 force_social_three_circle
+force_social_three_circle_parts
+force_social_circle_three_circle
 force_social_linear_wall
+in_vision_cone
+TAU_MAX
 attractor_point
 adjusting_force_intra_subgroup
 """.split()
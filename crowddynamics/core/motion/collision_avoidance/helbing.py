@@ -2,6 +2,11 @@ import numba
 import numpy as np
 from numba import f8
 
+# Constant A. In Newtons.
+FORCE_SCALE = 2e3
+# Constant B. In meters.
+DECAY_LENGTH = 0.08
+
 
 @numba.jit([f8[:](f8, f8[:], f8, f8)],
            nopython=True, nogil=True, cache=True)
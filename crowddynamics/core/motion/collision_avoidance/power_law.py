@@ -2,6 +2,8 @@ r"""Universal power law governing pedestrian
 
 [Karamouzas2014b]_
 """
+from collections import namedtuple
+
 import numba
 import numpy as np
 from numba import f8
@@ -9,6 +11,9 @@ from numba.types import Tuple
 
 from crowddynamics.core.vector import dot, truncate, rotate90
 
+# Maximum time-to-collision for interaction. In seconds.
+TAU_MAX = 30.0
+
 
 @numba.jit(nopython=True, nogil=True)
 def potential(k, tau, tau_0):
@@ -72,6 +77,43 @@ def magnitude(tau, tau_0):
     return (2.0 / tau + 1.0 / tau_0) * np.exp(-tau / tau_0) / tau ** 2
 
 
+# Resolution of the table of exponential function in number of points per unit
+# of tau / tau_0. Power of two makes the index computation exact.
+MAGNITUDE_TABLE_RESOLUTION = 128
+# Range of tau / tau_0 covered by the table. Exact magnitude is used outside.
+MAGNITUDE_TABLE_RANGE = 64
+EXP_TABLE = np.exp(
+    -np.arange(MAGNITUDE_TABLE_RANGE * MAGNITUDE_TABLE_RESOLUTION + 2) /
+    MAGNITUDE_TABLE_RESOLUTION)
+
+
+@numba.jit(f8(f8, f8),
+           nopython=True, nogil=True)
+def magnitude_table(tau, tau_0):
+    r"""Magnitude of social force using linear interpolation from table of
+    :math:`\exp(-u)` for :math:`u = \tau / \tau_0`. Table is independent of
+    :math:`\tau_0`.
+
+    Linear interpolation of :math:`\exp(-u)` with spacing :math:`\Delta u`
+    has relative error bounded by :math:`\frac{\Delta u^2}{8} \exp(\Delta u)`
+    which is less than :math:`10^{-5}` for :math:`\Delta u = 1/128`. Outside
+    the range of the table exact magnitude is used.
+
+    Args:
+        tau (float): Time-to-collision :math:`\tau > 0`.
+        tau_0 (float): Interaction time horizon :math:`\tau_{0} > 0`.
+
+    Returns:
+        float: Magnitude
+    """
+    u = tau / tau_0 * MAGNITUDE_TABLE_RESOLUTION
+    if u >= MAGNITUDE_TABLE_RANGE * MAGNITUDE_TABLE_RESOLUTION:
+        return magnitude(tau, tau_0)
+    k = np.int64(u)
+    e = EXP_TABLE[k] + (u - k) * (EXP_TABLE[k + 1] - EXP_TABLE[k])
+    return (2.0 / tau + 1.0 / tau_0) * e / tau ** 2
+
+
 @numba.jit(f8[:](f8[:], f8[:], f8, f8, f8),
            nopython=True, nogil=True, cache=True)
 def gradient_circle_circle(x_rel, v_rel, a, b, d):
@@ -225,106 +267,370 @@ def time_to_collision_circle_line(x_rel, v_rel, r_tot, n):
 
 
 @numba.jit(nopython=True, nogil=True)
-def force_social_circular(agent, i, j):
-    """Social force based on human anticipatory behaviour.
+def in_vision_cone(agent, i, x_rel):
+    r"""Test if point at relative position :math:`-\tilde{\mathbf{x}}` from
+    agent ``i`` is inside the vision cone of the agent
+
+    .. math::
+       \mathbf{\hat{e}}_i \cdot (-\tilde{\mathbf{x}}) \geq
+       \cos(\theta) \|\tilde{\mathbf{x}}\|
+
+    where :math:`\theta` is the half-angle ``agent.vision_cone`` and
+    :math:`\mathbf{\hat{e}}_i` is the heading of the agent. Heading of
+    orientable agent is its orientation, otherwise the direction of its
+    velocity or target direction if it is not moving.
 
     Args:
         agent:
         i:
-        j:
+        x_rel (numpy.ndarray): :math:`\tilde{\mathbf{x}} = \mathbf{x}_i -
+            \mathbf{x}_j`
 
     Returns:
+        bool:
+    """
+    if agent.vision_cone >= np.pi:
+        return True
+    if agent.orientable:
+        e = np.array((np.cos(agent.orientation[i]),
+                      np.sin(agent.orientation[i])))
+    elif dot(agent.velocity[i], agent.velocity[i]) > 0:
+        e = agent.velocity[i]
+    else:
+        e = agent.target_direction[i]
+    return -dot(e, x_rel) >= np.cos(agent.vision_cone) * \
+        np.sqrt(dot(e, e) * dot(x_rel, x_rel))
+
+
+@numba.jit(nopython=True, nogil=True)
+def time_to_collision_three_circle(x_i, r_i, x_j, r_j, v_rel, a, contact_i,
+                                   contact_j):
+    r"""Smallest positive time-to-collision between the parts of two three
+    circle agents.
+
+    Time-to-collision of part pair is :math:`\tau = \frac{c}{b + d}` using the
+    coefficients of ``time_to_collision_circle_circle``. It is positive only
+    if :math:`b > 0` and :math:`c > 0` and then bounded from below
+
+    .. math::
+       \tau \geq \frac{c}{2b}.
+
+    If parts ``contact_i`` and ``contact_j`` are given, their time-to-collision
+    :math:`\tau_{c}` is solved first and the other part pairs are solved only
+    if :math:`c < 2 b \tau_{c}` i.e. they might collide earlier. Across small
+    timesteps the parts that collide first rarely change, therefore most of
+    the square roots are avoided. Result is the same as without the hint.
 
+    Args:
+        x_i: Positions of the parts of agent i.
+        r_i: Radii of the parts of agent i.
+        x_j: Positions of the parts of agent j.
+        r_j: Radii of the parts of agent j.
+        v_rel (numpy.ndarray): Relative velocity.
+        a (float): :math:`\tilde{\mathbf{v}} \cdot \tilde{\mathbf{v}} > 0`
+        contact_i (int): Hint for the part of agent i or ``-1``.
+        contact_j (int): Hint for the part of agent j or ``-1``.
+
+    Returns:
+        (float, int, int, float, float): Time-to-collision, parts that will be
+        first in contact and coefficients :math:`b` and :math:`d`. Parts are
+        ``-1`` if agents are not colliding.
     """
-    x_rel = agent.position[i] - agent.position[j]
-    v_rel = agent.velocity[i] - agent.velocity[j]
-    r_tot = agent.radius[i] + agent.radius[j]
+    tau = np.inf
+    b_min = np.nan
+    d_min = np.nan
 
-    force = np.zeros(2), np.zeros(2)
+    # Solve the hinted part pair first.
+    if contact_i >= 0:
+        x_rel = x_i[contact_i] - x_j[contact_j]
+        b = -dot(x_rel, v_rel)
+        c = dot(x_rel, x_rel) - (r_i[contact_i] + r_j[contact_j]) ** 2
+        if b > 0 and c > 0:
+            d = np.sqrt(b ** 2 - a * c)
+            if not np.isnan(d) and d > 0:
+                tau = (b - d) / a
+                b_min = b
+                d_min = d
+        if tau == np.inf:
+            contact_i, contact_j = np.int64(-1), np.int64(-1)
 
-    a = dot(v_rel, v_rel)
-    b = -dot(x_rel, v_rel)
-    c = dot(x_rel, x_rel) - r_tot ** 2
-    d = np.sqrt(b ** 2 - a * c)
+    for part_i in range(3):
+        for part_j in range(3):
+            if part_i == contact_i and part_j == contact_j:
+                continue
 
-    # No interaction if tau cannot be defined.
-    if np.isnan(d) or d == 0 or a == 0:
-        return force
+            # Relative position and total radius
+            x_rel = x_i[part_i] - x_j[part_j]
+            r_tot = r_i[part_i] + r_j[part_j]
 
-    tau = (b - d) / a  # Time-to-collision. In seconds
-    tau_max = 30.0  # Maximum time for interaction.
+            # Coefficients for time-to-collision
+            b = -dot(x_rel, v_rel)
+            if b <= 0:
+                continue
+            c = dot(x_rel, x_rel) - r_tot ** 2
+            # Overlapping or cannot collide before current minimum.
+            if c <= 0 or c >= 2.0 * b * tau:
+                continue
+            d = np.sqrt(b ** 2 - a * c)
 
-    if tau <= 0 or tau > tau_max:
-        return force
+            # No interaction if tau cannot be defined.
+            if np.isnan(d) or d == 0:
+                continue
 
-    # Force is returned negative as repulsive force
-    grad = gradient_circle_circle(x_rel, v_rel, a, b, d)
-    force[0][:] += - agent.mass[i] * agent.k_soc[i] * grad * \
-                   magnitude(tau, agent.tau_0[i])
-    force[1][:] -= - agent.mass[j] * agent.k_soc[j] * grad * \
-                   magnitude(tau, agent.tau_0[j])
+            tau_new = (b - d) / a
+            if tau_new < tau:
+                contact_i, contact_j = np.int64(part_i), np.int64(part_j)
+                tau = tau_new
+                b_min = b
+                d_min = d
 
-    # Truncation for small tau
-    truncate(force[0], agent.f_soc_ij_max)
-    truncate(force[1], agent.f_soc_ij_max)
+    return tau, contact_i, contact_j, b_min, d_min
 
-    return force
 
+PowerLaw = namedtuple('PowerLaw', (
+    'force_social_circular',
+    'force_social_three_circle',
+    'force_social_three_circle_parts',
+    'force_social_circle_three_circle',
+    'force_social_linear_wall',
+))
 
-@numba.jit(nopython=True, nogil=True)
-def force_social_three_circle(agent, i, j):
-    """
-    Minimium time-to-collision for two circles of relative displacements.
+
+def power_law(magnitude):
+    r"""Compile social forces using given function for the magnitude.
 
     Args:
-        agent:
-        i:
-        j:
+        magnitude:
+            Jitted function ``(tau, tau_0) -> float``. Either exact
+            ``magnitude`` or ``magnitude_table``.
 
     Returns:
-
+        PowerLaw:
     """
-    # Forces for agent i and j
-    force = np.zeros(2), np.zeros(2)
+    @numba.jit(nopython=True, nogil=True)
+    def force_social_circular(agent, i, j):
+        r"""Social force based on human anticipatory behaviour.
 
-    v_rel = agent.velocity[i] - agent.velocity[j]
-    a = dot(v_rel, v_rel)
+        Pairs that cannot collide within :math:`(0, \tau_{max}]` are culled
+        before solving for time-to-collision. Using coefficients :math:`a, b, c`
+        of ``time_to_collision_circle_circle`` there is no collision in the future
+        if agents are not approaching :math:`b \leq 0` or are overlapping
+        :math:`c \leq 0`. Otherwise time-to-collision is bounded from below
+
+        .. math::
+           \tau = \frac{c}{b + d} \geq \frac{c}{2b},
+
+        therefore pairs with :math:`c > 2 b \tau_{max}` are culled. Forces for the
+        pairs with :math:`\tau \in (0, \tau_{max}]` are not changed by culling.
+
+        Force on agent is zero if the other agent is outside its vision cone.
+
+        Args:
+            agent:
+            i:
+            j:
+
+        Returns:
+
+        """
+        x_rel = agent.position[i] - agent.position[j]
+        v_rel = agent.velocity[i] - agent.velocity[j]
+        r_tot = agent.radius[i] + agent.radius[j]
+
+        force = np.zeros(2), np.zeros(2)
+
+        a = dot(v_rel, v_rel)
+        b = -dot(x_rel, v_rel)
+
+        # Agents are not approaching each other.
+        if a == 0 or b <= 0:
+            return force
+
+        c = dot(x_rel, x_rel) - r_tot ** 2
+
+        # Agents are overlapping or collision is beyond the maximum time.
+        if c <= 0 or c > 2.0 * b * TAU_MAX:
+            return force
+
+        visible_i = in_vision_cone(agent, i, x_rel)
+        visible_j = in_vision_cone(agent, j, -x_rel)
+        if not (visible_i or visible_j):
+            return force
+
+        d = np.sqrt(b ** 2 - a * c)
+
+        # No interaction if tau cannot be defined.
+        if np.isnan(d) or d == 0:
+            return force
+
+        tau = (b - d) / a  # Time-to-collision. In seconds
+
+        if tau <= 0 or tau > TAU_MAX:
+            return force
+
+        # Force is returned negative as repulsive force
+        grad = gradient_circle_circle(x_rel, v_rel, a, b, d)
+        if visible_i:
+            force[0][:] += - agent.mass[i] * agent.k_soc[i] * grad * \
+                           magnitude(tau, agent.tau_0[i])
+        if visible_j:
+            force[1][:] -= - agent.mass[j] * agent.k_soc[j] * grad * \
+                           magnitude(tau, agent.tau_0[j])
+
+        # Truncation for small tau
+        truncate(force[0], agent.f_soc_ij_max)
+        truncate(force[1], agent.f_soc_ij_max)
 
-    # Agents are not moving relative to each other.
-    if a == 0:
         return force
 
-    # Meaning of indexes for tuples of three
-    # 0 = torso
-    # 1 = left shoulder
-    # 2 = right shoulder
-
-    # Positions: center, left, right
-    # x_i = (agent.position[i], agent.position_ls[i], agent.position_rs[i])
-    # x_j = (agent.position[j], agent.position_ls[j], agent.position_rs[j])
-    x_i = agent.positions(i)
-    x_j = agent.positions(j)
-
-    # Radii of torso and shoulders
-    # r_i = (agent.r_t[i], agent.r_s[i], agent.r_s[i])
-    # r_j = (agent.r_t[j], agent.r_s[j], agent.r_s[j])
-    r_i = agent.radii(i)
-    r_j = agent.radii(j)
-
-    # Parts that will be first in contact for agents i and j if colliding.
-    contact_i = np.int64(0)
-    contact_j = np.int64(0)
-
-    # Find smallest time-to-collision. In seconds.
-    tau = np.nan
-    b_min = np.nan
-    d_min = np.nan
+    @numba.jit(nopython=True, nogil=True)
+    def force_social_three_circle_parts(agent, i, j, contact_i, contact_j):
+        """
+        Minimium time-to-collision for two circles of relative displacements.
+        Parts ``contact_i`` and ``contact_j`` are a hint for the parts that
+        collide first, for example from previous timestep. Negative hint
+        searches all the part pairs.
+
+        Args:
+            agent:
+            i:
+            j:
+            contact_i (int): Hint for the part of agent i.
+            contact_j (int): Hint for the part of agent j.
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray, int, int): Forces for agents i and
+            j and the parts that will be first in contact or ``-1`` if
+            agents are not colliding.
+        """
+        # Forces for agent i and j
+        force_i, force_j = np.zeros(2), np.zeros(2)
+
+        v_rel = agent.velocity[i] - agent.velocity[j]
+        a = dot(v_rel, v_rel)
+
+        # Agents are not moving relative to each other.
+        if a == 0:
+            return force_i, force_j, np.int64(-1), np.int64(-1)
+
+        # Meaning of indexes for tuples of three
+        # 0 = torso
+        # 1 = left shoulder
+        # 2 = right shoulder
+
+        # Positions: center, left, right
+        # x_i = (agent.position[i], agent.position_ls[i], agent.position_rs[i])
+        # x_j = (agent.position[j], agent.position_ls[j], agent.position_rs[j])
+        x_i = agent.positions(i)
+        x_j = agent.positions(j)
+
+        # Radii of torso and shoulders
+        # r_i = (agent.r_t[i], agent.r_s[i], agent.r_s[i])
+        # r_j = (agent.r_t[j], agent.r_s[j], agent.r_s[j])
+        r_i = agent.radii(i)
+        r_j = agent.radii(j)
+
+        tau, contact_i, contact_j, b_min, d_min = \
+            time_to_collision_three_circle(x_i, r_i, x_j, r_j, v_rel, a,
+                                           contact_i, contact_j)
+
+        if contact_i < 0:
+            return force_i, force_j, contact_i, contact_j
+
+        # Shoulder displacement vectors
+        r_off_i = np.zeros(2)
+        r_off_j = np.zeros(2)
+
+        # TODO: Fix signs
+        if contact_i == 1:
+            phi = agent.orientation[i]
+            r_off_i += agent.r_ts[i] * np.array((np.sin(phi), -np.cos(phi)))
+        elif contact_i == 2:
+            phi = agent.orientation[i]
+            r_off_i -= agent.r_ts[i] * np.array((np.sin(phi), -np.cos(phi)))
+
+        if contact_j == 1:
+            phi = agent.orientation[j]
+            r_off_j += agent.r_ts[j] * np.array((np.sin(phi), -np.cos(phi)))
+        elif contact_j == 2:
+            phi = agent.orientation[j]
+            r_off_j -= agent.r_ts[j] * np.array((np.sin(phi), -np.cos(phi)))
+
+        x_rel = agent.position[i] - agent.position[j]
+        r_off = r_off_i - r_off_j
+
+        # Force
+        grad = gradient_three_circle(x_rel, v_rel, r_off, a, b_min, d_min)
+        if in_vision_cone(agent, i, x_rel):
+            force_i[:] += - agent.mass[i] * agent.k_soc[i] * grad * \
+                          magnitude(tau, agent.tau_0[i])
+        if in_vision_cone(agent, j, -x_rel):
+            force_j[:] -= - agent.mass[j] * agent.k_soc[j] * grad * \
+                          magnitude(tau, agent.tau_0[j])
+
+        truncate(force_i, agent.f_soc_ij_max)
+        truncate(force_j, agent.f_soc_ij_max)
+
+        return force_i, force_j, contact_i, contact_j
+
+    @numba.jit(nopython=True, nogil=True)
+    def force_social_three_circle(agent, i, j):
+        """
+        Minimium time-to-collision for two circles of relative displacements.
+
+        Args:
+            agent:
+            i:
+            j:
+
+        Returns:
+
+        """
+        force_i, force_j, _, _ = force_social_three_circle_parts(
+            agent, i, j, np.int64(-1), np.int64(-1))
+        return force_i, force_j
+
+    @numba.jit(nopython=True, nogil=True)
+    def force_social_circle_three_circle(agent, i, j):
+        """
+        Minimum time-to-collision between circular agent ``i`` and three
+        circle agent ``j``.
+
+        Args:
+            agent:
+            i:
+            j:
+
+        Returns:
+
+        """
+        # Forces for agent i and j
+        force = np.zeros(2), np.zeros(2)
+
+        v_rel = agent.velocity[i] - agent.velocity[j]
+        a = dot(v_rel, v_rel)
+
+        # Agents are not moving relative to each other.
+        if a == 0:
+            return force
+
+        x_i = agent.position[i]
+        r_i = agent.radius[i]
+        x_j = agent.positions(j)
+        r_j = agent.radii(j)
+
+        # Part of agent j that will be first in contact if colliding.
+        contact_j = np.int64(0)
+
+        # Find smallest time-to-collision. In seconds.
+        tau = np.nan
+        b_min = np.nan
+        d_min = np.nan
 
-    for part_i, (xi, ri) in enumerate(zip(x_i, r_i)):
         for part_j, (xj, rj) in enumerate(zip(x_j, r_j)):
             # Relative position and total radius
-            x_rel = xi - xj
-            r_tot = ri + rj
+            x_rel = x_i - xj
+            r_tot = r_i + rj
 
             # Coefficients for time-to-collision
             b = -dot(x_rel, v_rel)
@@ -337,103 +643,114 @@ def force_social_three_circle(agent, i, j):
 
             tau_new = (b - d) / a
             if np.isnan(tau) or 0 < tau_new < tau:
-                contact_i, contact_j = part_i, part_j
+                contact_j = part_j
                 tau = tau_new
                 b_min = b
                 d_min = d
 
-    if np.isnan(tau) or tau <= 0:
-        return force
-
-    # Shoulder displacement vectors
-    r_off_i = np.zeros(2)
-    r_off_j = np.zeros(2)
-
-    # TODO: Fix signs
-    if contact_i == 1:
-        phi = agent.orientation[i]
-        r_off_i += agent.r_ts[i] * np.array((np.sin(phi), -np.cos(phi)))
-    elif contact_i == 2:
-        phi = agent.orientation[i]
-        r_off_i -= agent.r_ts[i] * np.array((np.sin(phi), -np.cos(phi)))
-
-    if contact_j == 1:
-        phi = agent.orientation[j]
-        r_off_j += agent.r_ts[j] * np.array((np.sin(phi), -np.cos(phi)))
-    elif contact_j == 2:
-        phi = agent.orientation[j]
-        r_off_j -= agent.r_ts[j] * np.array((np.sin(phi), -np.cos(phi)))
-
-    x_rel = agent.position[i] - agent.position[j]
-    r_off = r_off_i - r_off_j
-
-    # Force
-    grad = gradient_three_circle(x_rel, v_rel, r_off, a, b_min, d_min)
-    force[0][:] += - agent.mass[i] * agent.k_soc[i] * grad * \
-                   magnitude(tau, agent.tau_0[i])
-    force[1][:] -= - agent.mass[j] * agent.k_soc[j] * grad * \
-                   magnitude(tau, agent.tau_0[j])
+        if np.isnan(tau) or tau <= 0:
+            return force
+
+        # Shoulder displacement vector
+        r_off_j = np.zeros(2)
+        if contact_j == 1:
+            phi = agent.orientation[j]
+            r_off_j += agent.r_ts[j] * np.array((np.sin(phi), -np.cos(phi)))
+        elif contact_j == 2:
+            phi = agent.orientation[j]
+            r_off_j -= agent.r_ts[j] * np.array((np.sin(phi), -np.cos(phi)))
+
+        x_rel = agent.position[i] - agent.position[j]
+        r_off = -r_off_j
+
+        # Force
+        grad = gradient_three_circle(x_rel, v_rel, r_off, a, b_min, d_min)
+        if in_vision_cone(agent, i, x_rel):
+            force[0][:] += - agent.mass[i] * agent.k_soc[i] * grad * \
+                           magnitude(tau, agent.tau_0[i])
+        if in_vision_cone(agent, j, -x_rel):
+            force[1][:] -= - agent.mass[j] * agent.k_soc[j] * grad * \
+                           magnitude(tau, agent.tau_0[j])
+
+        truncate(force[0], agent.f_soc_ij_max)
+        truncate(force[1], agent.f_soc_ij_max)
 
-    truncate(force[0], agent.f_soc_ij_max)
-    truncate(force[1], agent.f_soc_ij_max)
-
-    return force
+        return force
 
+    @numba.jit(nopython=True, nogil=True)
+    def force_social_linear_wall(i, w, agent, wall):
+        """
+        Force social linear wall
+
+        Args:
+            i:
+            w:
+            agent:
+            wall:
+
+        Returns:
+
+        """
+        force = np.zeros(2)
+        tau = np.zeros(3)
+        grad = np.zeros((3, 2))
+
+        # p_0, p_1, t_w, n_w, l_w = wall.deconstruct(w)
+
+        p_0 = wall[w, 0, :]
+        p_1 = wall[w, 1, :]
+        d = p_1 - p_0  # Vector from p_0 to p_1
+        l_w = np.hypot(d[1], d[0])  # Length of the wall
+        t_w = d / l_w  # Tangential unit-vector
+        n_w = rotate90(t_w)  # Normal unit-vector
+
+        x_rel0 = agent.position[i] - p_0
+        x_rel1 = agent.position[i] - p_1
+        v_rel = agent.velocity[i]
+        r_tot = agent.radius[i]
+
+        dot_vt = dot(v_rel, t_w)
+        if dot_vt == 0:
+            tau_t0 = np.nan
+            tau_t1 = np.nan
+        else:
+            tau_t0 = -dot(x_rel0, t_w) / dot_vt
+            tau_t1 = -dot(x_rel1, t_w) / dot_vt
+
+        tau[0], grad[0] = time_to_collision_circle_circle(x_rel0, v_rel, r_tot)
+        tau[1], grad[1] = time_to_collision_circle_circle(x_rel1, v_rel, r_tot)
+        tau[2], grad[2] = time_to_collision_circle_line(x_rel0, v_rel, r_tot, n_w)
+
+        if not np.isnan(tau[0]) and tau[0] <= tau_t0:
+            mag = magnitude(tau[0], agent.tau_0[i])
+            force[:] = - agent.mass[i] * agent.k_soc[i] * mag * grad[0]
+        elif not np.isnan(tau[1]) and tau[1] > tau_t1:
+            mag = magnitude(tau[1], agent.tau_0[i])
+            force[:] = - agent.mass[i] * agent.k_soc[i] * mag * grad[1]
+        elif not np.isnan(tau[2]):
+            mag = magnitude(tau[2], agent.tau_0[i])
+            force[:] = - agent.mass[i] * agent.k_soc[i] * mag * grad[2]
+
+        truncate(force, agent.f_soc_iw_max)
 
-@numba.jit(nopython=True, nogil=True)
-def force_social_linear_wall(i, w, agent, wall):
-    """
-    Force social linear wall
-
-    Args:
-        i:
-        w:
-        agent:
-        wall:
-
-    Returns:
+        return force
 
-    """
-    force = np.zeros(2)
-    tau = np.zeros(3)
-    grad = np.zeros((3, 2))
-
-    # p_0, p_1, t_w, n_w, l_w = wall.deconstruct(w)
-
-    p_0 = wall[w, 0, :]
-    p_1 = wall[w, 1, :]
-    d = p_1 - p_0  # Vector from p_0 to p_1
-    l_w = np.hypot(d[1], d[0])  # Length of the wall
-    t_w = d / l_w  # Tangential unit-vector
-    n_w = rotate90(t_w)  # Normal unit-vector
-
-    x_rel0 = agent.position[i] - p_0
-    x_rel1 = agent.position[i] - p_1
-    v_rel = agent.velocity[i]
-    r_tot = agent.radius[i]
-
-    dot_vt = dot(v_rel, t_w)
-    if dot_vt == 0:
-        tau_t0 = np.nan
-        tau_t1 = np.nan
-    else:
-        tau_t0 = -dot(x_rel0, t_w) / dot_vt
-        tau_t1 = -dot(x_rel1, t_w) / dot_vt
-
-    tau[0], grad[0] = time_to_collision_circle_circle(x_rel0, v_rel, r_tot)
-    tau[1], grad[1] = time_to_collision_circle_circle(x_rel1, v_rel, r_tot)
-    tau[2], grad[2] = time_to_collision_circle_line(x_rel0, v_rel, r_tot, n_w)
-
-    if not np.isnan(tau[0]) and tau[0] <= tau_t0:
-        mag = magnitude(tau[0], agent.tau_0[i])
-        force[:] = - agent.mass[i] * agent.k_soc[i] * mag * grad[0]
-    elif not np.isnan(tau[1]) and tau[1] > tau_t1:
-        mag = magnitude(tau[1], agent.tau_0[i])
-        force[:] = - agent.mass[i] * agent.k_soc[i] * mag * grad[1]
-    elif not np.isnan(tau[2]):
-        mag = magnitude(tau[2], agent.tau_0[i])
-        force[:] = - agent.mass[i] * agent.k_soc[i] * mag * grad[2]
-
-    truncate(force, agent.f_soc_iw_max)
-
-    return force
+    return PowerLaw(
+        force_social_circular,
+        force_social_three_circle,
+        force_social_three_circle_parts,
+        force_social_circle_three_circle,
+        force_social_linear_wall,
+    )
+
+
+# Social forces using exact magnitude
+POWER_LAW = power_law(magnitude)
+force_social_circular, \
+    force_social_three_circle, \
+    force_social_three_circle_parts, \
+    force_social_circle_three_circle, \
+    force_social_linear_wall = POWER_LAW
+
+# Social forces using tabulated magnitude
+POWER_LAW_TABLE = power_law(magnitude_table)
@@ -0,0 +1,116 @@
+import numba
+import numpy as np
+import pytest
+from hypothesis import given
+
+from crowddynamics.core.agent.agent import Agent
+from crowddynamics.core.motion import force_social_circular, magnitude, \
+    time_to_collision_circle_circle, TAU_MAX, magnitude_table, POWER_LAW, \
+    POWER_LAW_TABLE
+from crowddynamics.core.vector import truncate
+from crowddynamics.testing import real
+
+
+def agent_pair(x0, x1, v0, v1):
+    agent = Agent(2)
+    for x, v in ((x0, v0), (x1, v1)):
+        i = agent.add(np.array(x), 80.0, 0.25, 0.15, 0.1, 0.1, 4.0, 1.0, 4.0)
+        agent.set_motion(i, 0.0, np.array(v), 0.0, np.array(v), 0.0)
+    return agent
+
+
+def force_social_circular_reference(agent, i, j):
+    """Social force without culling."""
+    x_rel = agent.position[i] - agent.position[j]
+    v_rel = agent.velocity[i] - agent.velocity[j]
+    r_tot = agent.radius[i] + agent.radius[j]
+    force_i, force_j = np.zeros(2), np.zeros(2)
+    tau, grad = time_to_collision_circle_circle(x_rel, v_rel, r_tot)
+    if np.isnan(tau) or tau > TAU_MAX:
+        return force_i, force_j
+    force_i += - agent.mass[i] * agent.k_soc[i] * grad * \
+        magnitude(tau, agent.tau_0[i])
+    force_j -= - agent.mass[j] * agent.k_soc[j] * grad * \
+        magnitude(tau, agent.tau_0[j])
+    truncate(force_i, agent.f_soc_ij_max)
+    truncate(force_j, agent.f_soc_ij_max)
+    return force_i, force_j
+
+
+@given(
+    x0=real(-3.0, 3.0, shape=2),
+    x1=real(-3.0, 3.0, shape=2),
+    v0=real(-2.0, 2.0, shape=2),
+    v1=real(-2.0, 2.0, shape=2),
+)
+def test_force_social_circular_culling(x0, x1, v0, v1):
+    agent = agent_pair(x0, x1, v0, v1)
+    force_i, force_j = force_social_circular(agent, 0, 1)
+    expected_i, expected_j = force_social_circular_reference(agent, 0, 1)
+    assert np.all(force_i == expected_i)
+    assert np.all(force_j == expected_j)
+
+
+def test_force_social_circular_vision_cone():
+    # Agent 0 is moving towards agent 1 which is moving away from agent 0.
+    agent = agent_pair((0.0, 0.0), (2.0, 0.0), (1.5, 0.0), (0.5, 0.0))
+    force_i, force_j = force_social_circular(agent, 0, 1)
+    assert np.any(force_i != 0) and np.any(force_j != 0)
+
+    # Agent 1 does not see agent 0 behind it.
+    agent.vision_cone = np.pi / 2
+    cone_i, cone_j = force_social_circular(agent, 0, 1)
+    assert np.all(cone_i == force_i)
+    assert np.all(cone_j == 0.0)
+
+
+TAU_0 = (0.5, 1.0, 2.0, 3.0, 5.0)
+
+
+@pytest.mark.parametrize('tau_0', TAU_0)
+def test_magnitude_table(tau_0):
+    tau = np.linspace(0.0, TAU_MAX, 100001)[1:]
+    exact = np.array([magnitude(t, tau_0) for t in tau])
+    table = np.array([magnitude_table(t, tau_0) for t in tau])
+    assert np.max(np.abs(table - exact) / exact) < 1e-5
+
+
+@given(
+    x0=real(-3.0, 3.0, shape=2),
+    x1=real(-3.0, 3.0, shape=2),
+    v0=real(-2.0, 2.0, shape=2),
+    v1=real(-2.0, 2.0, shape=2),
+)
+def test_force_social_circular_table(x0, x1, v0, v1):
+    agent = agent_pair(x0, x1, v0, v1)
+    force_i, force_j = POWER_LAW.force_social_circular(agent, 0, 1)
+    table_i, table_j = POWER_LAW_TABLE.force_social_circular(agent, 0, 1)
+    # Truncation can only reduce the error.
+    assert np.allclose(table_i, force_i, rtol=1e-5, atol=0.0)
+    assert np.allclose(table_j, force_j, rtol=1e-5, atol=0.0)
+
+
+def magnitude_sum(function):
+    @numba.jit(nopython=True, nogil=True)
+    def _magnitude_sum(tau, tau_0):
+        total = 0.0
+        for k in range(len(tau)):
+            total += function(tau[k], tau_0)
+        return total
+    return _magnitude_sum
+
+
+@pytest.mark.parametrize('function', (magnitude, magnitude_table),
+                         ids=('exact', 'table'))
+def test_magnitude_benchmark(benchmark, function):
+    """Speedup and worst case relative error of tabulated magnitude."""
+    benchmark.group = 'magnitude'
+    tau_0 = 3.0
+    tau = np.random.uniform(0.0, TAU_MAX, 100000)
+    tau = tau[tau > 0]
+    exact = np.array([magnitude(t, tau_0) for t in tau])
+    values = np.array([function(t, tau_0) for t in tau])
+    benchmark.extra_info['max_relative_error'] = \
+        float(np.max(np.abs(values - exact) / exact))
+    benchmark(magnitude_sum(function), tau, tau_0)
+    assert benchmark.extra_info['max_relative_error'] < 1e-5
@@ -1,13 +1,45 @@
 from .navigation import distance_map, direction_map, merge_dir_maps, \
-    static_potential, travel_time_map, dynamic_potential
+    merged_direction_map, interpolate_direction_map, encode_direction_map, \
+    decode_direction_map, interpolate_encoded_direction_map, \
+    static_potential, static_potential_cached, geometry_key, travel_time_map, speed_field, \
+    changed_region, travel_time_update, dynamic_potential, interpolate_map, \
+    exit_potential, exit_potentials, save_array, tile_map, untile_map, \
+    static_potential_tiled, interpolate_tiled_direction_map, \
+    lookup_direction_map, lookup_encoded_direction_map, \
+    lookup_tiled_direction_map
+from .navmesh import NavMesh, densify, interpolate_triangles
 
 # from .orientation import *
 
 __all__ = """
 distance_map
 travel_time_map
+speed_field
+changed_region
+travel_time_update
 direction_map
 merge_dir_maps
+merged_direction_map
+interpolate_direction_map
+encode_direction_map
+decode_direction_map
+interpolate_encoded_direction_map
 static_potential
+static_potential_cached
+geometry_key
 dynamic_potential
+interpolate_map
+exit_potential
+exit_potentials
+save_array
+tile_map
+untile_map
+static_potential_tiled
+interpolate_tiled_direction_map
+lookup_direction_map
+lookup_encoded_direction_map
+lookup_tiled_direction_map
+NavMesh
+densify
+interpolate_triangles
 """.split()
@@ -12,7 +12,12 @@ https://github.com/SCIInstitute/SCI-Solver_Eikonal
 
 
 """
+import hashlib
+import heapq
+import os
+import tempfile
 from collections import Iterable
+from concurrent.futures import ProcessPoolExecutor
 
 import numba
 import numpy as np
@@ -167,7 +172,7 @@ def distance_map(domain, targets, obstacles, step):
     return mgrid, dmap, phi
 
 
-def travel_time_map(step, domain, targets, obstacles, agents):
+def travel_time_map(step, domain, targets, obstacles, speed):
     r"""
     Dynamics potential takes into account the positions of the agents in the
     field. Equation
@@ -183,11 +188,15 @@ def travel_time_map(step, domain, targets, obstacles, agents):
        f(\mathbf{x}) &\to 0, \quad \mathbf{x} \in \mathcal{O}
 
     .. math::
-       \frac{1}{f(\mathbf{x})} = 1 + \max \left( 0, c_{0} \left( 1 + c_{1} \frac{\mathbf{v} \cdot \nabla S(\mathbf{x})}{v_{0} \| \nabla S(\mathbf{x}) \|} \right) \right)
+       \frac{1}{f(\mathbf{x})} = 1 + \max \left( 0, c_{0} \left( 1 + c_{1} \frac{\mathbf{v} \cdot \nabla S(\mathbf{x})}{v_{0} \| \nabla S(\mathbf{x}) \|} \right) \right)
 
     - :math:`c_{0} > 0` general impact strength
     - :math:`c_{1} > 0` impact of the moving direction of an agent
 
+    Speed field :math:`f` is obtained using ``speed_field``. Travel time map is
+    solved using first order fast marching so that it can be updated
+    incrementally using ``travel_time_update``.
+
     Args:
         step (float):
             Step size for the meshgrid.
@@ -201,13 +210,200 @@ def travel_time_map(step, domain, targets, obstacles, agents):
         targets (LineString, optional):
             Target regions :math:`\mathcal{E}` in the domain.
 
-        agents:
-            Regions occupied by agents :math:`\mathcal{A}`
+        speed (numpy.ndarray):
+            Speed field :math:`f`. Zero at obstacles.
 
     Returns:
         (numpy.meshgrid, numpy.ndarray, numpy.ma.MaskedArray):
+            List of
+            - ``mgrid``
+            - ``tmap``: Travel time map. Value at the obstacles and unreachable
+              points is the maximum travel time.
+            - ``phi``
+    """
+    mgrid = meshgrid(step, *domain.bounds)
+
+    contour = np.full_like(mgrid[0], -1.0, dtype=np.float64)
+    set_values_to_grid(contour, step, targets, 1.0)
+    phi = np.ma.MaskedArray(contour, speed == 0)
+
+    tmap = skfmm.travel_time(phi, speed, dx=step, order=1)
+    tmap = np.ma.filled(tmap.astype(np.float64), np.nan)
+    tmap[np.isnan(tmap)] = np.nanmax(tmap)
+    return mgrid, tmap, phi
+
+
+@numba.jit(nopython=True, nogil=True)
+def speed_field(speed, step, position, velocity, target_velocity, radius,
+                dir_map, c0, c1):
+    r"""Rasterize agents into the speed field :math:`f` of ``travel_time_map``
+
+    .. math::
+       \frac{1}{f(\mathbf{x})} = 1 + \max \left( 0, c_{0} \left( 1 - c_{1}
+       \frac{\mathbf{v} \cdot \hat{\mathbf{e}}_{S}}{v_{0}} \right) \right)
+
+    where :math:`\hat{\mathbf{e}}_{S}` is the static direction map. Grid points
+    within the radius of an agent belong to :math:`\mathcal{A}`. Smallest
+    speed is used for grid points covered by multiple agents.
+
+    Args:
+        speed (numpy.ndarray):
+            Speed field without agents. Modified in place.
+        step (float):
+        position (numpy.ndarray):
+        velocity (numpy.ndarray):
+        target_velocity (numpy.ndarray):
+        radius (numpy.ndarray):
+        dir_map (numpy.ndarray): Static direction map :math:`\hat{\mathbf{e}}_{S}`.
+        c0 (float): General impact strength :math:`c_{0} > 0`.
+        c1 (float): Impact of the moving direction :math:`c_{1} > 0`.
+
+    Returns:
+        numpy.ndarray: Speed field
     """
-    return NotImplementedError
+    ny, nx = speed.shape
+    for m in range(position.shape[0]):
+        x = position[m, 0] / step
+        y = position[m, 1] / step
+        r = radius[m] / step
+        l0 = max(np.int64(np.ceil(x - r)), 0)
+        l1 = min(np.int64(np.floor(x + r)), nx - 1)
+        k0 = max(np.int64(np.ceil(y - r)), 0)
+        k1 = min(np.int64(np.floor(y + r)), ny - 1)
+        for k in range(k0, k1 + 1):
+            for l in range(l0, l1 + 1):
+                if speed[k, l] == 0 or (l - x) ** 2 + (k - y) ** 2 > r ** 2:
+                    continue
+                v = velocity[m, 0] * dir_map[k, l, 0] + \
+                    velocity[m, 1] * dir_map[k, l, 1]
+                if target_velocity[m] > 0:
+                    v /= target_velocity[m]
+                else:
+                    v = 0.0
+                f = 1.0 / (1.0 + max(0.0, c0 * (1.0 - c1 * v)))
+                speed[k, l] = min(speed[k, l], f)
+    return speed
+
+
+def changed_region(speed_old, speed_new):
+    """Bounding box of the grid points where the speed field has changed.
+
+    Args:
+        speed_old (numpy.ndarray):
+        speed_new (numpy.ndarray):
+
+    Returns:
+        (int, int, int, int): Inclusive bounding box ``(k0, k1, l0, l1)`` or
+        ``None`` if speed field has not changed.
+    """
+    k, l = np.nonzero(speed_old != speed_new)
+    if len(k) == 0:
+        return None
+    return k.min(), k.max(), l.min(), l.max()
+
+
+@numba.jit(nopython=True, nogil=True)
+def eikonal_update(tmap, speed, step, k, l):
+    """First order upwind solution of the eikonal equation at grid point
+    ``(k, l)`` from its neighbours."""
+    ny, nx = tmap.shape
+    a = np.inf
+    if k > 0 and speed[k - 1, l] > 0:
+        a = tmap[k - 1, l]
+    if k < ny - 1 and speed[k + 1, l] > 0:
+        a = min(a, tmap[k + 1, l])
+    b = np.inf
+    if l > 0 and speed[k, l - 1] > 0:
+        b = tmap[k, l - 1]
+    if l < nx - 1 and speed[k, l + 1] > 0:
+        b = min(b, tmap[k, l + 1])
+
+    h = step / speed[k, l]
+    if np.abs(a - b) >= h:
+        return min(a, b) + h
+    return (a + b + np.sqrt(2 * h ** 2 - (a - b) ** 2)) / 2
+
+
+@numba.jit(nopython=True, nogil=True)
+def travel_time_update(tmap, speed, sources, step, k0, k1, l0, l1):
+    r"""Update travel time map in place after the speed field has changed
+    inside the bounding box ``(k0, k1, l0, l1)``.
+
+    Fast marching visits the grid points in increasing order of travel time,
+    therefore travel times smaller than the smallest travel time
+    :math:`T^{*}` around the changed region do not depend on the change. Only
+    grid points with :math:`T \geq T^{*}` are solved again by fast marching
+    starting from the frozen grid points :math:`T < T^{*}` and the sources.
+
+    Args:
+        tmap (numpy.ndarray): Travel time map from ``travel_time_map``.
+        speed (numpy.ndarray): New speed field. Zero at obstacles.
+        sources (numpy.ndarray): Boolean array of target grid points which
+            travel times are never changed.
+        step (float):
+        k0 (int):
+        k1 (int):
+        l0 (int):
+        l1 (int):
+
+    Returns:
+        int: Number of grid points solved again.
+    """
+    ny, nx = tmap.shape
+    k0, k1 = max(k0 - 1, 0), min(k1 + 1, ny - 1)
+    l0, l1 = max(l0 - 1, 0), min(l1 + 1, nx - 1)
+    t_min = np.inf
+    for k in range(k0, k1 + 1):
+        for l in range(l0, l1 + 1):
+            if speed[k, l] > 0 and not sources[k, l]:
+                t_min = min(t_min, tmap[k, l])
+
+    # Grid points that are solved again.
+    t_max = 0.0
+    known = np.ones(tmap.shape, dtype=np.bool_)
+    count = 0
+    for k in range(ny):
+        for l in range(nx):
+            if speed[k, l] > 0 and not sources[k, l] and tmap[k, l] >= t_min:
+                known[k, l] = False
+                t_max = max(t_max, tmap[k, l])
+                tmap[k, l] = np.inf
+                count += 1
+
+    # Narrow band
+    heap = [(0.0, np.int64(0), np.int64(0))]
+    heap.pop()
+    for k in range(ny):
+        for l in range(nx):
+            if known[k, l]:
+                continue
+            if (k > 0 and known[k - 1, l] and speed[k - 1, l] > 0) or \
+                    (k < ny - 1 and known[k + 1, l] and speed[k + 1, l] > 0) or \
+                    (l > 0 and known[k, l - 1] and speed[k, l - 1] > 0) or \
+                    (l < nx - 1 and known[k, l + 1] and speed[k, l + 1] > 0):
+                tmap[k, l] = eikonal_update(tmap, speed, step, k, l)
+                heapq.heappush(heap, (tmap[k, l], k, l))
+
+    while len(heap) > 0:
+        t, k, l = heapq.heappop(heap)
+        if known[k, l] or t > tmap[k, l]:
+            continue
+        known[k, l] = True
+        for dk, dl in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            kn, ln = k + dk, l + dl
+            if 0 <= kn < ny and 0 <= ln < nx and not known[kn, ln] and \
+                    speed[kn, ln] > 0:
+                t_new = eikonal_update(tmap, speed, step, kn, ln)
+                if t_new < tmap[kn, ln]:
+                    tmap[kn, ln] = t_new
+                    heapq.heappush(heap, (t_new, kn, ln))
+
+    # Unreachable grid points
+    for k in range(ny):
+        for l in range(nx):
+            if not known[k, l]:
+                tmap[k, l] = t_max
+    return count
 
 
 def direction_map(dmap):
@@ -236,6 +432,226 @@ def direction_map(dmap):
     return dir_map
 
 
+@numba.jit(nopython=True, nogil=True)
+def interpolate_direction_map(dir_map, points, step):
+    r"""Direction at points using bilinear interpolation of direction map.
+
+    Grid point :math:`(k, l)` of the map is at :math:`(l \Delta, k \Delta)`
+    where :math:`\Delta` is the ``step`` as in ``to_indices``. Direction at
+    point :math:`\mathbf{x}` is interpolated from the four surrounding grid
+    points
+
+    .. math::
+       \mathbf{e} = (1 - t)(1 - u) \mathbf{e}_{k,l} + t (1 - u)
+       \mathbf{e}_{k,l+1} + (1 - t) u \mathbf{e}_{k+1,l} + t u
+       \mathbf{e}_{k+1,l+1}
+
+    and normalized to unit length. Points outside the map are clamped to the
+    closest edge of the map.
+
+    Interpolation allows maps with coarser grid than nearest grid point lookup
+    for the same accuracy of the directions, therefore reducing the memory
+    and time for solving the maps quadratically.
+
+    Args:
+        dir_map (numpy.ndarray): Direction map of shape ``(ny, nx, 2)``.
+        points (numpy.ndarray): Points of shape ``(n, 2)``.
+        step (float): Step size of the grid.
+
+    Returns:
+        numpy.ndarray: Unit directions of shape ``(n, 2)``.
+    """
+    directions = np.zeros(points.shape)
+    lookup_direction_map(dir_map, points, np.arange(points.shape[0]), step,
+                         directions)
+    return directions
+
+
+@numba.jit(nopython=True, nogil=True)
+def grid_cell(x, y, ny, nx, step):
+    r"""Cell of the grid containing point :math:`(x, y)` and the position of
+    the point inside the cell for bilinear interpolation. Points outside the
+    grid are clamped to the closest edge of the grid.
+
+    Args:
+        x (float):
+        y (float):
+        ny (int): Number of grid points in y-direction.
+        nx (int): Number of grid points in x-direction.
+        step (float): Step size of the grid.
+
+    Returns:
+        (int, int, float, float): Indices :math:`(k, l)` of the lower left
+        corner of the cell and fractions :math:`(t, u) \in [0, 1]^2`.
+    """
+    x = min(max(x / step, 0.0), nx - 1.0)
+    y = min(max(y / step, 0.0), ny - 1.0)
+    l = min(np.int64(x), nx - 2)
+    k = min(np.int64(y), ny - 2)
+    return k, l, x - l, y - k
+
+
+@numba.jit(nopython=True, nogil=True)
+def normalize_row(out, i):
+    """Normalize row of array of shape ``(n, 2)`` to unit length in place.
+    Zero rows are left unchanged."""
+    norm = np.hypot(out[i, 0], out[i, 1])
+    if norm > 0:
+        out[i, 0] /= norm
+        out[i, 1] /= norm
+
+
+@numba.jit(nopython=True, nogil=True)
+def lookup_direction_map(dir_map, position, indices, step, out):
+    r"""Write directions interpolated from direction map as in
+    ``interpolate_direction_map`` into ``out`` in place.
+
+    Kernel does not allocate, therefore it can be used to update
+    ``agent.target_direction`` directly on every timestep. Agents at
+    non-finite positions keep their previous direction.
+
+    Args:
+        dir_map (numpy.ndarray): Direction map of shape ``(ny, nx, 2)``.
+        position (numpy.ndarray): Positions of shape ``(n, 2)``.
+        indices (numpy.ndarray): Indices of the positions to look up.
+        step (float): Step size of the grid.
+        out (numpy.ndarray): Output array of shape ``(n, 2)``.
+    """
+    ny, nx, _ = dir_map.shape
+    for i in indices:
+        if not (np.isfinite(position[i, 0]) and np.isfinite(position[i, 1])):
+            continue
+        k, l, t, u = grid_cell(position[i, 0], position[i, 1], ny, nx, step)
+        for c in range(2):
+            out[i, c] = \
+                (1.0 - t) * (1.0 - u) * dir_map[k, l, c] + \
+                t * (1.0 - u) * dir_map[k, l + 1, c] + \
+                (1.0 - t) * u * dir_map[k + 1, l, c] + \
+                t * u * dir_map[k + 1, l + 1, c]
+        normalize_row(out, i)
+
+
+def encode_direction_map(dir_map, dtype=np.uint16):
+    r"""Compress direction map by quantizing the angles of the directions into
+    unsigned integers. Largest value of the integer type marks zero
+    direction, other values :math:`q` decode to angle
+
+    .. math::
+       \varphi = \frac{2 \pi q}{q_{max}}.
+
+    Encoding with ``uint16`` uses 2 bytes per grid point instead of 16 bytes
+    with angular resolution of :math:`10^{-4}` radians. Encoding with
+    ``uint8`` uses 1 byte with resolution of :math:`0.025` radians.
+
+    Args:
+        dir_map (numpy.ndarray): Direction map of shape ``(ny, nx, 2)``.
+        dtype (numpy.dtype): ``numpy.uint8`` or ``numpy.uint16``.
+
+    Returns:
+        numpy.ndarray: Encoded direction map of shape ``(ny, nx)``.
+    """
+    q_max = np.iinfo(dtype).max
+    angle = np.arctan2(dir_map[:, :, 1], dir_map[:, :, 0]) % (2 * np.pi)
+    encoded = np.round(angle * (q_max / (2 * np.pi))).astype(np.int64) % q_max
+    encoded[(dir_map[:, :, 0] == 0) & (dir_map[:, :, 1] == 0)] = q_max
+    return encoded.astype(dtype)
+
+
+def decode_direction_map(encoded):
+    """Decode direction map compressed using ``encode_direction_map``.
+
+    Args:
+        encoded (numpy.ndarray): Encoded direction map.
+
+    Returns:
+        numpy.ndarray: Direction map of shape ``encoded.shape + (2,)``.
+    """
+    q_max = np.iinfo(encoded.dtype).max
+    angle = encoded * (2 * np.pi / q_max)
+    dir_map = np.stack((np.cos(angle), np.sin(angle)), axis=-1)
+    dir_map[encoded == q_max] = 0.0
+    return dir_map
+
+
+@numba.jit(nopython=True, nogil=True)
+def interpolate_encoded_direction_map(encoded, q_max, points, step):
+    r"""Direction at points using bilinear interpolation of direction map
+    compressed using ``encode_direction_map``. Directions at the four
+    surrounding grid points are decoded on the fly.
+
+    Args:
+        encoded (numpy.ndarray): Encoded direction map of shape ``(ny, nx)``.
+        q_max (int): Largest value of the integer type of the encoding.
+        points (numpy.ndarray): Points of shape ``(n, 2)``.
+        step (float): Step size of the grid.
+
+    Returns:
+        numpy.ndarray: Unit directions of shape ``(n, 2)``.
+    """
+    directions = np.zeros(points.shape)
+    lookup_encoded_direction_map(encoded, q_max, points,
+                                 np.arange(points.shape[0]), step, directions)
+    return directions
+
+
+@numba.jit(nopython=True, nogil=True)
+def lookup_encoded_direction_map(encoded, q_max, position, indices, step, out):
+    """Write directions interpolated from encoded direction map as in
+    ``interpolate_encoded_direction_map`` into ``out`` in place. Same as
+    ``lookup_direction_map`` otherwise.
+
+    Args:
+        encoded (numpy.ndarray): Encoded direction map of shape ``(ny, nx)``.
+        q_max (int): Largest value of the integer type of the encoding.
+        position (numpy.ndarray): Positions of shape ``(n, 2)``.
+        indices (numpy.ndarray): Indices of the positions to look up.
+        step (float): Step size of the grid.
+        out (numpy.ndarray): Output array of shape ``(n, 2)``.
+    """
+    ny, nx = encoded.shape
+    scale = 2 * np.pi / q_max
+    for i in indices:
+        if not (np.isfinite(position[i, 0]) and np.isfinite(position[i, 1])):
+            continue
+        k, l, t, u = grid_cell(position[i, 0], position[i, 1], ny, nx, step)
+        out[i, 0] = 0.0
+        out[i, 1] = 0.0
+        for dk, dl, w in ((0, 0, (1.0 - t) * (1.0 - u)),
+                          (0, 1, t * (1.0 - u)),
+                          (1, 0, (1.0 - t) * u),
+                          (1, 1, t * u)):
+            q = encoded[k + dk, l + dl]
+            if q != q_max:
+                out[i, 0] += w * np.cos(q * scale)
+                out[i, 1] += w * np.sin(q * scale)
+        normalize_row(out, i)
+
+
+@numba.jit(nopython=True, nogil=True)
+def interpolate_map(grid, points, step):
+    """Values at points using bilinear interpolation of scalar map such as
+    distance map. Points outside the map are clamped to the closest edge of
+    the map as in ``interpolate_direction_map``.
+
+    Args:
+        grid (numpy.ndarray): Map of shape ``(ny, nx)``.
+        points (numpy.ndarray): Points of shape ``(n, 2)``.
+        step (float): Step size of the grid.
+
+    Returns:
+        numpy.ndarray: Values of shape ``(n,)``.
+    """
+    ny, nx = grid.shape
+    values = np.zeros(points.shape[0])
+    for m in range(points.shape[0]):
+        k, l, t, u = grid_cell(points[m, 0], points[m, 1], ny, nx, step)
+        values[m] = (1.0 - t) * (1.0 - u) * grid[k, l] + \
+            t * (1.0 - u) * grid[k, l + 1] + \
+            (1.0 - t) * u * grid[k + 1, l] + \
+            t * u * grid[k + 1, l + 1]
+    return values
+
+
 @numba.jit(nopython=True)
 def merge_dir_maps(dmap, dir_map1, dir_map2, radius, value):
     r"""
@@ -283,11 +699,95 @@ def merge_dir_maps(dmap, dir_map1, dir_map2, radius, value):
     return merged
 
 
+@numba.jit(nopython=True, nogil=True)
+def grid_gradient(dmap, mask, i, j):
+    """Gradient of the map at grid point ``(i, j)`` using central differences
+    in the interior and one-sided differences at the edges as in
+    ``numpy.gradient``. Masked grid points are not used.
+
+    Returns:
+        (float, float): Gradient in the order ``(x, y)`` i.e. ``(col, row)``.
+    """
+    n, m = dmap.shape
+    lower = i > 0 and not mask[i - 1, j]
+    upper = i < n - 1 and not mask[i + 1, j]
+    if lower and upper:
+        gy = (dmap[i + 1, j] - dmap[i - 1, j]) / 2
+    elif upper:
+        gy = dmap[i + 1, j] - dmap[i, j]
+    elif lower:
+        gy = dmap[i, j] - dmap[i - 1, j]
+    else:
+        gy = 0.0
+
+    lower = j > 0 and not mask[i, j - 1]
+    upper = j < m - 1 and not mask[i, j + 1]
+    if lower and upper:
+        gx = (dmap[i, j + 1] - dmap[i, j - 1]) / 2
+    elif upper:
+        gx = dmap[i, j + 1] - dmap[i, j]
+    elif lower:
+        gx = dmap[i, j] - dmap[i, j - 1]
+    else:
+        gx = 0.0
+    return gx, gy
+
+
+@numba.jit(nopython=True, nogil=True, parallel=True)
+def merged_direction_map(dmap_obs, dmap_exits, mask, radius, value, sign):
+    r"""Direction map from exits merged with direction map from obstacles.
+    Fuses ``direction_map`` of both maps and ``merge_dir_maps`` into single
+    parallel loop over the rows of the grid without intermediate grid sized
+    arrays.
+
+    Args:
+        dmap_obs (numpy.ndarray): Distance map from obstacles.
+        dmap_exits (numpy.ndarray): Distance or travel time map from exits.
+        mask (numpy.ndarray): Boolean array of obstacle grid points which are
+            not used for the gradients.
+        radius (float):
+        value (float):
+        sign (float): ``1.0`` for signed distance maps from ``distance_map``
+            which decrease away from the exits and ``-1.0`` for travel time
+            maps which increase.
+
+    Returns:
+        numpy.ndarray: Merged direction map.
+    """
+    n, m = dmap_exits.shape
+    merged = np.zeros((n, m, 2))
+    for i in numba.prange(n):
+        for j in range(m):
+            gx, gy = grid_gradient(dmap_exits, mask, i, j)
+            l = np.hypot(gx, gy)
+            if l == 0:
+                l = 1.0
+            ex, ey = sign * gx / l, sign * gy / l
+
+            x = np.abs(dmap_obs[i, j])
+            if x < 1.1 * radius:
+                gx, gy = grid_gradient(dmap_obs, mask, i, j)
+                l = np.hypot(gx, gy)
+                if l == 0:
+                    l = 1.0
+                k = value ** (x / radius)  # Decreasing function
+                ex = - k * gx / l + (1 - k) * ex
+                ey = - k * gy / l + (1 - k) * ey
+
+            merged[i, j, 0] = ex
+            merged[i, j, 1] = ey
+    return merged
+
+
 def static_potential(step, domain, targets, obstacles, radius, value):
     r"""
     Static potential is navigation algorithm that does not take into account
     the space that is occupied by dynamic agents (aka agents).
 
+    Directions between the grid points are obtained using
+    ``interpolate_direction_map`` which allows step sizes of
+    :math:`0.1-0.25\,\mathrm{m}`.
+
     Args:
         step (float):
         domain (Polygon):
@@ -299,21 +799,325 @@ def static_potential(step, domain, targets, obstacles, radius, value):
     Returns:
         numpy.ndarray:
     """
-    # TODO: interpolation
-    _, dmap_exits, _ = distance_map(domain, targets, obstacles, step)
+    _, dmap_exits, phi = distance_map(domain, targets, obstacles, step)
     _, dmap_obs, _ = distance_map(domain, obstacles, None, step)
+    return merged_direction_map(np.ma.getdata(dmap_obs),
+                                np.ma.getdata(dmap_exits),
+                                np.ma.getmaskarray(phi), radius, value, 1.0)
+
+
+def exit_potential(step, domain, target, obstacles, dmap_obs, radius, value):
+    r"""
+    Static potential and distance map of single exit.
+
+    Args:
+        step (float):
+        domain (Polygon):
+        target (LineString): Exit.
+        obstacles (LineString, optional):
+        dmap_obs (numpy.ndarray): Distance map from obstacles.
+        radius (float):
+        value (float):
 
-    dir_map_exits = direction_map(dmap_exits)
-    dir_map_obs = direction_map(dmap_obs)
+    Returns:
+        (numpy.ndarray, numpy.ndarray): Direction map and distance map
+        :math:`|S(\mathbf{x})|` to the exit.
+    """
+    _, dmap_exit, phi = distance_map(domain, target, obstacles, step)
+    dir_map = merged_direction_map(dmap_obs, np.ma.getdata(dmap_exit),
+                                   np.ma.getmaskarray(phi), radius, value, 1.0)
+    return dir_map, np.abs(np.ma.getdata(dmap_exit))
 
-    dir_map = merge_dir_maps(dmap_obs, dir_map_obs, dir_map_exits, radius, value)
 
+def exit_potentials(step, domain, targets, obstacles, radius, value,
+                    workers=None):
+    r"""
+    Static potentials for each exit separately so that agents can select
+    between the exits. Distance maps of the exits are solved in parallel
+    processes.
+
+    Args:
+        step (float):
+        domain (Polygon):
+        targets (BaseGeometry): Exits as a ``LineString`` or
+            ``MultiLineString``.
+        obstacles (LineString, optional):
+        radius (float):
+        value (float):
+        workers (int, optional): Number of processes. Defaults to the number
+            of exits. Value of ``1`` solves the exits in the current process.
+
+    Returns:
+        (list, list): Direction maps and distance maps of the exits.
+    """
+    exits = list(getattr(targets, 'geoms', [targets]))
+    _, dmap_obs, _ = distance_map(domain, obstacles, None, step)
+    dmap_obs = np.ma.getdata(dmap_obs)
+    args = [(step, domain, target, obstacles, dmap_obs, radius, value)
+            for target in exits]
+
+    workers = workers or len(exits)
+    if workers == 1:
+        results = [exit_potential(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(exit_potential, *zip(*args)))
+    dir_maps = [dir_map for dir_map, _ in results]
+    distance_maps = [dmap for _, dmap in results]
+    return dir_maps, distance_maps
+
+
+# Directory for cached static potentials. Overridden using environment variable
+# ``CROWDDYNAMICS_CACHE``.
+CACHE_DIR = os.environ.get(
+    'CROWDDYNAMICS_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'crowddynamics'))
+# Changes to the algorithms of static potential must increment the version to
+# invalidate the cached files.
+CACHE_VERSION = 1
+
+
+def geometry_key(*args, **kwargs):
+    """Content hash of shapely geometries and parameters. Geometries are
+    hashed using their well-known binary (WKB) representation.
+
+    Args:
+        *args: Shapely geometries or ``None``.
+        **kwargs: Parameters with deterministic ``repr``.
+
+    Returns:
+        str: Hexadecimal SHA-1 digest.
+    """
+    h = hashlib.sha1()
+    h.update(repr(CACHE_VERSION).encode())
+    for geometry in args:
+        if geometry is None or geometry.is_empty:
+            h.update(b'\x00')
+        else:
+            h.update(geometry.wkb)
+        h.update(b'\x1f')
+    for key in sorted(kwargs):
+        h.update('{}={!r}'.format(key, kwargs[key]).encode())
+    return h.hexdigest()
+
+
+def static_potential_cached(step, domain, targets, obstacles, radius, value,
+                            cache_dir=None):
+    r"""
+    Static potential cached on disk. Direction map is stored in ``.npy`` file
+    named by the content hash of the geometry and the parameters. Repeated
+    simulations with the same geometry, such as the replicas of a parameter
+    sweep, load the direction map as read-only memory-mapped array instead
+    of solving it again.
+
+    Args:
+        step (float):
+        domain (Polygon):
+        targets (LineString, optional):
+        obstacles (LineString, optional):
+        value (float):
+        radius (float):
+        cache_dir (str, optional): Directory for the cached files. Defaults to
+            ``CACHE_DIR``.
+
+    Returns:
+        numpy.ndarray:
+    """
+    cache_dir = os.path.join(cache_dir or CACHE_DIR, 'static_potential')
+    key = geometry_key(domain, targets, obstacles, step=float(step),
+                       radius=float(radius), value=float(value))
+    filepath = os.path.join(cache_dir, key + '.npy')
+
+    if os.path.exists(filepath):
+        return np.load(filepath, mmap_mode='r')
+
+    dir_map = static_potential(step, domain, targets, obstacles, radius, value)
+    save_array(filepath, dir_map)
     return dir_map
 
 
-def dynamic_potential():
+def save_array(filepath, array):
+    """Save array into ``.npy`` file. Array is written into temporary file
+    which is then renamed so that concurrent simulations never read partially
+    written file.
+
+    Args:
+        filepath (str):
+        array (numpy.ndarray):
+    """
+    directory = os.path.dirname(filepath)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(suffix='.npy', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp, filepath)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def tile_map(grid, tile_size):
+    """Reorder map into tiles of ``tile_size x tile_size`` grid points so that
+    each tile is contiguous in memory. Edges are padded by repeating the last
+    row and column, therefore interpolation in the padding is same as clamping
+    to the original map.
+
+    Args:
+        grid (numpy.ndarray): Map of shape ``(ny, nx)``.
+        tile_size (int):
+
+    Returns:
+        numpy.ndarray: Tiled map of shape
+        ``(ceil(ny / tile_size), ceil(nx / tile_size), tile_size, tile_size)``.
+    """
+    ny, nx = grid.shape
+    ty, tx = -(-ny // tile_size), -(-nx // tile_size)
+    padded = np.pad(grid, ((0, ty * tile_size - ny), (0, tx * tile_size - nx)),
+                    mode='edge')
+    return padded.reshape(ty, tile_size, tx, tile_size).swapaxes(1, 2).copy()
+
+
+def untile_map(tiles, shape):
+    """Inverse of ``tile_map``.
+
+    Args:
+        tiles (numpy.ndarray): Tiled map.
+        shape (tuple): Shape ``(ny, nx)`` of the original map.
+
+    Returns:
+        numpy.ndarray:
+    """
+    ty, tx, tile_size, _ = tiles.shape
+    grid = tiles.swapaxes(1, 2).reshape(ty * tile_size, tx * tile_size)
+    return grid[:shape[0], :shape[1]]
+
+
+def static_potential_tiled(step, domain, targets, obstacles, radius, value,
+                           tile_size=64, dtype=np.uint16, cache_dir=None):
+    r"""
+    Static potential compressed using ``encode_direction_map`` and stored
+    as tiles from ``tile_map`` in a memory-mapped file in the cache.
+
+    Tiles are loaded into memory by the operating system lazily when they are
+    accessed, therefore resident memory is proportional to the area occupied
+    by the agents instead of the area of the domain. Simulations running in
+    different processes share the pages of the same read-only file.
+
+    Args:
+        step (float):
+        domain (Polygon):
+        targets (LineString, optional):
+        obstacles (LineString, optional):
+        value (float):
+        radius (float):
+        tile_size (int): Size of the tiles in grid points. Default tile of
+            ``uint16`` uses 8 kB.
+        dtype (numpy.dtype): Encoding of the directions.
+        cache_dir (str, optional): Directory for the cached files. Defaults to
+            ``CACHE_DIR``.
+
+    Returns:
+        numpy.memmap: Read-only tiled direction map.
+    """
+    key = geometry_key(domain, targets, obstacles, step=float(step),
+                       radius=float(radius), value=float(value),
+                       tile_size=int(tile_size), dtype=np.dtype(dtype).str)
+    filepath = os.path.join(cache_dir or CACHE_DIR, 'static_potential_tiled',
+                            key + '.npy')
+
+    if not os.path.exists(filepath):
+        dir_map = static_potential_cached(step, domain, targets, obstacles,
+                                          radius, value, cache_dir)
+        encoded = encode_direction_map(dir_map, dtype)
+        save_array(filepath, tile_map(encoded, tile_size))
+    return np.load(filepath, mmap_mode='r')
+
+
+@numba.jit(nopython=True, nogil=True)
+def interpolate_tiled_direction_map(tiles, q_max, points, step):
+    r"""Direction at points using bilinear interpolation of encoded direction
+    map stored in tiles. Same as ``interpolate_encoded_direction_map`` for
+    the untiled map.
+
+    Args:
+        tiles (numpy.ndarray): Tiled encoded direction map from ``tile_map``.
+        q_max (int): Largest value of the integer type of the encoding.
+        points (numpy.ndarray): Points of shape ``(n, 2)``.
+        step (float): Step size of the grid.
+
+    Returns:
+        numpy.ndarray: Unit directions of shape ``(n, 2)``.
+    """
+    directions = np.zeros(points.shape)
+    lookup_tiled_direction_map(tiles, q_max, points,
+                               np.arange(points.shape[0]), step, directions)
+    return directions
+
+
+@numba.jit(nopython=True, nogil=True)
+def lookup_tiled_direction_map(tiles, q_max, position, indices, step, out):
+    """Write directions interpolated from tiled encoded direction map as in
+    ``interpolate_tiled_direction_map`` into ``out`` in place. Same as
+    ``lookup_direction_map`` otherwise.
+
+    Args:
+        tiles (numpy.ndarray): Tiled encoded direction map from ``tile_map``.
+        q_max (int): Largest value of the integer type of the encoding.
+        position (numpy.ndarray): Positions of shape ``(n, 2)``.
+        indices (numpy.ndarray): Indices of the positions to look up.
+        step (float): Step size of the grid.
+        out (numpy.ndarray): Output array of shape ``(n, 2)``.
+    """
+    size = tiles.shape[2]
+    ny, nx = tiles.shape[0] * size, tiles.shape[1] * size
+    scale = 2 * np.pi / q_max
+    for i in indices:
+        if not (np.isfinite(position[i, 0]) and np.isfinite(position[i, 1])):
+            continue
+        k, l, t, u = grid_cell(position[i, 0], position[i, 1], ny, nx, step)
+        out[i, 0] = 0.0
+        out[i, 1] = 0.0
+        for dk, dl, w in ((0, 0, (1.0 - t) * (1.0 - u)),
+                          (0, 1, t * (1.0 - u)),
+                          (1, 0, (1.0 - t) * u),
+                          (1, 1, t * u)):
+            kk = k + dk
+            ll = l + dl
+            q = tiles[kk // size, ll // size, kk % size, ll % size]
+            if q != q_max:
+                out[i, 0] += w * np.cos(q * scale)
+                out[i, 1] += w * np.sin(q * scale)
+        normalize_row(out, i)
+
+
+def dynamic_potential(step, tmap, sources, speed_old, speed_new, dmap_obs,
+                      radius, value):
     r"""
     Dynamic potential is navigation algorithm that takes into account the space
     that is occupied by dynamic agents (aka agents).
+
+    Travel time map is updated incrementally using ``travel_time_update`` only
+    for the grid points affected by the change of the speed field. Update is
+    computationally expensive, therefore it should be done every few timesteps
+    instead of every timestep.
+
+    Args:
+        step (float):
+        tmap (numpy.ndarray): Travel time map. Modified in place.
+        sources (numpy.ndarray): Target grid points.
+        speed_old (numpy.ndarray): Speed field used for ``tmap``.
+        speed_new (numpy.ndarray): New speed field.
+        dmap_obs (numpy.ndarray): Distance map from obstacles.
+        radius (float):
+        value (float):
+
+    Returns:
+        numpy.ndarray: Direction map
     """
-    return NotImplementedError
+    region = changed_region(speed_old, speed_new)
+    if region is not None:
+        travel_time_update(tmap, speed_new, sources, step, *region)
+    return merged_direction_map(np.ma.getdata(dmap_obs), tmap, speed_new == 0,
+                                radius, value, -1.0)
@@ -0,0 +1,193 @@
+r"""Navigation mesh
+
+Grid based navigation solves distance maps over the whole area of the domain
+which requires memory and time proportional to :math:`A / \Delta^2`, where
+:math:`A` is the area and :math:`\Delta` the step size of the grid. Navigation
+mesh triangulates the free space using the vertices of the geometry, therefore
+memory and time scale with the length of the boundaries of the geometry
+instead of its area.
+
+1) Boundaries of the domain and targets, and boundaries of the obstacles
+   offset by clearance to both sides, are densified and triangulated using
+   Delaunay triangulation. Vertices are not placed on the obstacles so that
+   each vertex is on one side of an obstacle.
+2) Edges of the triangulation that cross obstacles or leave the domain are
+   removed and the remaining edges form a graph.
+3) Shortest distances from the vertices to the targets are solved using
+   Dijkstra's algorithm. Direction at a vertex points to the next vertex on its
+   shortest path.
+4) Direction at a point is barycentric interpolation of the directions at the
+   vertices of the triangle containing the point.
+"""
+import numba
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import Delaunay, cKDTree
+from shapely.geometry import LineString, Point
+from shapely.prepared import prep
+
+from crowddynamics.core.geometry import shapes_to_point_pairs
+
+
+def densify(shapes, max_edge):
+    """Points along the line segments of the shapes such that distance between
+    consecutive points is at most ``max_edge``.
+
+    Args:
+        shapes (BaseGeometry): Shapes
+        max_edge (float): Maximum distance between the points.
+
+    Returns:
+        numpy.ndarray: Points of shape ``(n, 2)``.
+    """
+    pairs = shapes_to_point_pairs(shapes)
+    points = [np.zeros((0, 2))]
+    for a, b in pairs:
+        n = max(int(np.ceil(np.hypot(*(b - a)) / max_edge)), 1)
+        t = np.linspace(0.0, 1.0, n + 1)[:, None]
+        points.append(a + t * (b - a))
+    return np.concatenate(points)
+
+
+@numba.jit(nopython=True, nogil=True)
+def interpolate_triangles(transform, simplices, values, simplex, points):
+    r"""Barycentric interpolation of the vectors at the vertices of the
+    triangles containing the points. Results are normalized to unit length.
+
+    Args:
+        transform (numpy.ndarray): Affine transforms to barycentric coordinates
+            ``Delaunay.transform``.
+        simplices (numpy.ndarray): Vertex indices of the triangles.
+        values (numpy.ndarray): Vectors at the vertices of shape ``(m, 2)``.
+        simplex (numpy.ndarray): Triangle containing each point.
+        points (numpy.ndarray): Points of shape ``(n, 2)``.
+
+    Returns:
+        numpy.ndarray: Unit vectors of shape ``(n, 2)``.
+    """
+    out = np.zeros(points.shape)
+    for m in range(points.shape[0]):
+        s = simplex[m]
+        dx = points[m, 0] - transform[s, 2, 0]
+        dy = points[m, 1] - transform[s, 2, 1]
+        b0 = transform[s, 0, 0] * dx + transform[s, 0, 1] * dy
+        b1 = transform[s, 1, 0] * dx + transform[s, 1, 1] * dy
+        weights = (b0, b1, 1.0 - b0 - b1)
+        for k in range(3):
+            v = simplices[s, k]
+            out[m, 0] += weights[k] * values[v, 0]
+            out[m, 1] += weights[k] * values[v, 1]
+        norm = np.hypot(out[m, 0], out[m, 1])
+        if norm > 0:
+            out[m, 0] /= norm
+            out[m, 1] /= norm
+    return out
+
+
+class NavMesh:
+    r"""Navigation mesh over the free space of the domain.
+
+    Attributes:
+        vertices (numpy.ndarray): Vertices of the mesh.
+        delaunay (scipy.spatial.Delaunay): Triangulation of the vertices.
+        distance (numpy.ndarray): Shortest distance from vertices to the
+            targets. Infinite if target is unreachable.
+        directions (numpy.ndarray): Unit direction at the vertices towards the
+            next vertex on the shortest path.
+    """
+
+    def __init__(self, domain, targets, obstacles, max_edge=1.0,
+                 clearance=0.25):
+        r"""Triangulate free space and solve distances to the targets.
+
+        Args:
+            domain (Polygon):
+                Domain :math:`\Omega` containing obstacles and targets.
+            targets (BaseGeometry):
+                Target regions :math:`\mathcal{E}` in the domain.
+            obstacles (BaseGeometry, optional):
+                Impassable regions :math:`\mathcal{O}` in the domain.
+            max_edge (float):
+                Maximum length of the edges along the boundaries. Smaller
+                values follow the geometry more closely.
+            clearance (float):
+                Distance of the vertices from the obstacles. Paths keep at
+                least this distance from the corners of the obstacles.
+        """
+        inside = prep(domain.buffer(1e-6))
+        has_obstacles = obstacles is not None and not obstacles.is_empty
+
+        target_points = densify(targets, max_edge)
+        other_points = densify(domain, max_edge)
+        if has_obstacles:
+            offset = obstacles.buffer(clearance, resolution=2).boundary
+            other_points = np.concatenate((other_points,
+                                           densify(offset, max_edge)))
+        other_points = other_points[
+            [inside.contains(Point(p)) for p in other_points]]
+        self.vertices, inverse = np.unique(
+            np.round(np.concatenate((target_points, other_points)), 9),
+            axis=0, return_inverse=True)
+        sources = np.unique(inverse[:len(target_points)])
+
+        self.delaunay = Delaunay(self.vertices)
+        self.tree = cKDTree(self.vertices)
+
+        # Edges of the triangulation that stay inside the domain and do not
+        # cross obstacles.
+        simplices = self.delaunay.simplices
+        edges = np.concatenate((simplices[:, [0, 1]],
+                                simplices[:, [1, 2]],
+                                simplices[:, [2, 0]]))
+        edges = np.unique(np.sort(edges, axis=1), axis=0)
+        blocked = prep(obstacles) if has_obstacles else None
+        valid = np.zeros(len(edges), dtype=np.bool_)
+        for k, (a, b) in enumerate(edges):
+            line = LineString((self.vertices[a], self.vertices[b]))
+            valid[k] = inside.contains(line) and \
+                (blocked is None or not blocked.crosses(line))
+        edges = edges[valid]
+
+        n = len(self.vertices)
+        lengths = np.hypot(*(self.vertices[edges[:, 0]] -
+                             self.vertices[edges[:, 1]]).T)
+        graph = csr_matrix((lengths, (edges[:, 0], edges[:, 1])),
+                           shape=(n, n))
+        self.distance, predecessors, _ = dijkstra(
+            graph, directed=False, indices=sources, min_only=True,
+            return_predecessors=True)
+
+        self.directions = np.zeros((n, 2))
+        has_next = predecessors >= 0
+        d = self.vertices[predecessors[has_next]] - self.vertices[has_next]
+        self.directions[has_next] = d / np.hypot(*d.T)[:, None]
+
+    @property
+    def nbytes(self):
+        """Memory used by the mesh arrays in bytes."""
+        return self.vertices.nbytes + self.delaunay.simplices.nbytes + \
+            self.delaunay.transform.nbytes + self.distance.nbytes + \
+            self.directions.nbytes
+
+    def direction(self, points):
+        r"""Unit directions towards the targets at the points.
+
+        Points outside the triangulation use the direction of the closest
+        vertex.
+
+        Args:
+            points (numpy.ndarray): Points of shape ``(n, 2)``.
+
+        Returns:
+            numpy.ndarray: Unit directions of shape ``(n, 2)``.
+        """
+        simplex = self.delaunay.find_simplex(points)
+        outside = simplex < 0
+        out = interpolate_triangles(self.delaunay.transform,
+                                    self.delaunay.simplices, self.directions,
+                                    np.maximum(simplex, 0), points)
+        if np.any(outside):
+            _, nearest = self.tree.query(points[outside])
+            out[outside] = self.directions[nearest]
+        return out
@@ -6,7 +6,16 @@ from hypothesis.core import example
 from hypothesis.strategies import just
 
 import crowddynamics.testing
-from crowddynamics.core.steering import direction_map, distance_map
+from shapely.geometry import Polygon, LineString
+
+from crowddynamics.core.steering import direction_map, distance_map, \
+    interpolate_direction_map, static_potential, static_potential_cached, \
+    geometry_key, travel_time_map, travel_time_update, changed_region, \
+    speed_field, dynamic_potential, encode_direction_map, \
+    decode_direction_map, interpolate_encoded_direction_map, merge_dir_maps, \
+    merged_direction_map, exit_potentials, interpolate_map, tile_map, \
+    untile_map, static_potential_tiled, interpolate_tiled_direction_map, \
+    lookup_direction_map, lookup_encoded_direction_map
 
 
 @given(step=just(0.01), field=crowddynamics.testing.field())
@@ -26,9 +35,35 @@ def test_distance_map(step, field):
     assert isinstance(phi, np.ma.MaskedArray)
 
 
-@pytest.mark.skip
 def test_travel_time_map():
-    assert True
+    step = 0.1
+    domain, targets, obstacles = room()
+    _, dmap, phi = distance_map(domain, targets, obstacles, step)
+    speed = np.where(np.ma.getmaskarray(phi), 0.0, 1.0)
+    _, tmap, _ = travel_time_map(step, domain, targets, obstacles, speed)
+    assert tmap.shape == dmap.shape
+    assert np.all(np.isfinite(tmap))
+
+
+def test_travel_time_update():
+    step = 0.1
+    domain, targets, obstacles = room()
+    _, _, phi = distance_map(domain, targets, obstacles, step)
+    speed = np.where(np.ma.getmaskarray(phi), 0.0, 1.0)
+    sources = phi.data > 0
+    _, tmap, _ = travel_time_map(step, domain, targets, obstacles, speed)
+
+    # Congestion far from the exit
+    speed_new = np.copy(speed)
+    speed_new[40:60, 10:20] *= 0.3
+    region = changed_region(speed, speed_new)
+    assert region == (40, 59, 10, 19)
+
+    count = travel_time_update(tmap, speed_new, sources, step, *region)
+    _, expected, _ = travel_time_map(step, domain, targets, obstacles,
+                                     speed_new)
+    assert 0 < count < tmap.size / 2
+    assert np.allclose(tmap, expected, atol=step)
 
 
 @given(dmap=crowddynamics.testing.real(-1.0, 1.0, shape=(10, 10)))
@@ -42,17 +77,248 @@ def test_direction_map(dmap):
     assert len(dir_map.shape) == 3
 
 
+def test_interpolate_direction_map():
+    step = 0.1
+    angle = np.random.uniform(0.0, 2 * np.pi, (5, 6))
+    dir_map = np.stack((np.cos(angle), np.sin(angle)), axis=-1)
+
+    # Grid points
+    k, l = np.meshgrid(np.arange(5), np.arange(6), indexing='ij')
+    points = np.stack((l.ravel() * step, k.ravel() * step), axis=1)
+    directions = interpolate_direction_map(dir_map, points, step)
+    assert np.allclose(directions, dir_map.reshape((-1, 2)))
+
+    # Constant map and points outside the map
+    dir_map[:, :] = (0.6, 0.8)
+    points = np.random.uniform(-1.0, 1.0, (100, 2))
+    directions = interpolate_direction_map(dir_map, points, step)
+    assert np.allclose(directions, (0.6, 0.8))
+
+
+def test_lookup_direction_map():
+    step = 0.1
+    angle = np.random.uniform(0.0, 2 * np.pi, (5, 6))
+    dir_map = np.stack((np.cos(angle), np.sin(angle)), axis=-1)
+    encoded = encode_direction_map(dir_map)
+    q_max = np.iinfo(encoded.dtype).max
+
+    position = np.random.uniform(-1.0, 1.0, (10, 2))
+    position[3] = np.nan
+    indices = np.array((0, 3, 5, 7))
+    expected = interpolate_direction_map(dir_map, position, step)
+
+    for lookup, args in ((lookup_direction_map, (dir_map,)),
+                         (lookup_encoded_direction_map, (encoded, q_max))):
+        out = np.full(position.shape, 2.0)
+        lookup(*args, position, indices, step, out)
+        assert np.allclose(out[[0, 5, 7]], expected[[0, 5, 7]], atol=1e-3)
+        # Agents not in indices and at non-finite positions are unchanged.
+        assert np.all(out[[1, 2, 3, 4, 6, 8, 9]] == 2.0)
+
+
+@pytest.mark.parametrize('dtype, tolerance', ((np.uint16, 1e-4),
+                                               (np.uint8, 0.025)))
+def test_encode_direction_map(dtype, tolerance):
+    angle = np.random.uniform(-np.pi, np.pi, (20, 30))
+    dir_map = np.stack((np.cos(angle), np.sin(angle)), axis=-1)
+    dir_map[0, 0] = 0.0
+
+    encoded = encode_direction_map(dir_map, dtype)
+    assert encoded.dtype == dtype
+    assert encoded.shape == angle.shape
+
+    decoded = decode_direction_map(encoded)
+    assert np.all(decoded[0, 0] == 0.0)
+    error = np.arccos(np.clip(np.sum(decoded * dir_map, axis=-1), -1, 1))
+    assert np.all(error[1:, 1:] <= tolerance)
+
+    points = np.random.uniform(0.0, 2.0, (100, 2))
+    step = 0.1
+    expected = interpolate_direction_map(decoded, points, step)
+    directions = interpolate_encoded_direction_map(
+        encoded, np.iinfo(dtype).max, points, step)
+    assert np.allclose(directions, expected)
+
+
+@pytest.mark.parametrize('dtype', (None, np.uint16, np.uint8))
+def test_direction_map_lookup_benchmark(benchmark, dtype):
+    """Lookup throughput and memory of uncompressed and compressed direction
+    maps of a large venue of 200 m x 200 m with step size 0.1 m."""
+    benchmark.group = 'direction_map_lookup'
+    step = 0.1
+    angle = np.random.uniform(-np.pi, np.pi, (2001, 2001))
+    dir_map = np.stack((np.cos(angle), np.sin(angle)), axis=-1)
+    points = np.random.uniform(0.0, 200.0, (100000, 2))
+    if dtype is None:
+        benchmark(interpolate_direction_map, dir_map, points, step)
+        benchmark.extra_info['nbytes'] = dir_map.nbytes
+    else:
+        encoded = encode_direction_map(dir_map, dtype)
+        benchmark(interpolate_encoded_direction_map, encoded,
+                  np.iinfo(dtype).max, points, step)
+        benchmark.extra_info['nbytes'] = encoded.nbytes
+
+
+def room(width=10.0, door_width=1.2):
+    """Square room with a door in the middle of the right wall."""
+    domain = Polygon([(0, 0), (0, width), (width, width), (width, 0)])
+    lower = (width - door_width) / 2
+    upper = (width + door_width) / 2
+    targets = LineString([(width, lower), (width, upper)])
+    obstacles = LineString([(width, lower), (width, 0), (0, 0), (0, width),
+                            (width, width), (width, upper)])
+    return domain, targets, obstacles
+
+
+@pytest.mark.parametrize('step', (0.1, 0.25))
+def test_static_potential_interpolation(benchmark, step):
+    """Comparison of memory, time and accuracy of interpolated coarse direction
+    maps against nearest grid point lookup of the reference map with step
+    size 0.01."""
+    benchmark.group = 'static_potential_interpolation'
+    field = room()
+    reference_step = 0.01
+    reference = static_potential(reference_step, *field, radius=0.3, value=0.3)
+
+    dir_map = benchmark(static_potential, step, *field, radius=0.3,
+                        value=0.3)
+
+    # Points away from the walls.
+    np.random.seed(0)
+    points = np.random.uniform(0.5, 9.5, (1000, 2))
+    indices = np.round(points / reference_step).astype(np.int64)
+    expected = reference[indices[:, 1], indices[:, 0], :]
+    directions = interpolate_direction_map(dir_map, points, step)
+    error = np.arccos(np.clip(np.sum(directions * expected, axis=1), -1, 1))
+
+    benchmark.extra_info['nbytes'] = dir_map.nbytes
+    benchmark.extra_info['reference_nbytes'] = reference.nbytes
+    benchmark.extra_info['mean_angle_error'] = np.mean(error)
+    benchmark.extra_info['max_angle_error'] = np.max(error)
+    assert np.mean(error) < 0.1
+
+
+def test_exit_potentials():
+    step = 0.1
+    domain = Polygon([(0, 0), (0, 10), (10, 10), (10, 0)])
+    exit_0 = LineString([(10, 4.5), (10, 5.5)])
+    exit_1 = LineString([(0, 4.5), (0, 5.5)])
+    targets = exit_0 | exit_1
+    obstacles = domain.exterior.difference(targets)
+
+    dir_maps, distance_maps = exit_potentials(step, domain, targets,
+                                              obstacles, 0.3, 0.3)
+    assert len(dir_maps) == len(distance_maps) == 2
+    expected = exit_potentials(step, domain, targets, obstacles, 0.3, 0.3,
+                               workers=1)
+    for a, b in zip(dir_maps + distance_maps, expected[0] + expected[1]):
+        assert np.allclose(a, b)
+
+    # Point close to the left exit
+    point = np.array(((1.0, 5.0),))
+    d = [interpolate_map(dmap, point, step)[0] for dmap in distance_maps]
+    assert np.argmin(d) == 1
+    assert d[0] > 8.0
+
+
+def test_geometry_key():
+    domain, targets, obstacles = room()
+    key = geometry_key(domain, targets, obstacles, step=0.1)
+    assert key == geometry_key(domain, targets, obstacles, step=0.1)
+    assert key != geometry_key(domain, targets, obstacles, step=0.2)
+    assert key != geometry_key(domain, None, obstacles, step=0.1)
+    assert key != geometry_key(*room(door_width=1.0), step=0.1)
+
+
+def test_static_potential_cached(tmpdir):
+    field = room()
+    cache_dir = str(tmpdir)
+    dir_map = static_potential_cached(0.25, *field, radius=0.3, value=0.3,
+                                      cache_dir=cache_dir)
+    assert not isinstance(dir_map, np.memmap)
+    cached = static_potential_cached(0.25, *field, radius=0.3, value=0.3,
+                                     cache_dir=cache_dir)
+    assert isinstance(cached, np.memmap)
+    assert np.all(cached == dir_map)
+    assert np.all(cached == static_potential(0.25, *field, radius=0.3,
+                                             value=0.3))
+
+
+@pytest.mark.parametrize('tile_size', (1, 7, 64))
+def test_tile_map(tile_size):
+    grid = np.random.randint(0, 100, (20, 30)).astype(np.uint16)
+    tiles = tile_map(grid, tile_size)
+    assert tiles.shape[2:] == (tile_size, tile_size)
+    assert np.all(untile_map(tiles, grid.shape) == grid)
+
+
+def test_static_potential_tiled(tmpdir):
+    field = room()
+    step = 0.25
+    tiles = static_potential_tiled(step, *field, radius=0.3, value=0.3,
+                                   tile_size=8, cache_dir=str(tmpdir))
+    assert isinstance(tiles, np.memmap)
+    assert tiles.dtype == np.uint16
+
+    encoded = encode_direction_map(
+        static_potential(step, *field, radius=0.3, value=0.3))
+    assert np.all(untile_map(tiles, encoded.shape) == encoded)
+
+    q_max = np.iinfo(np.uint16).max
+    points = np.random.uniform(-1.0, 11.0, (100, 2))
+    assert np.allclose(
+        interpolate_tiled_direction_map(tiles, q_max, points, step),
+        interpolate_encoded_direction_map(encoded, q_max, points, step))
+
+
 @pytest.mark.skip
 def test_merge_dir_maps():
     assert True
 
 
+@given(dmap_obs=crowddynamics.testing.real(-1.0, 1.0, shape=(10, 10)),
+       dmap_exits=crowddynamics.testing.real(-1.0, 1.0, shape=(10, 10)))
+def test_merged_direction_map(dmap_obs, dmap_exits):
+    mask = np.zeros(dmap_exits.shape, dtype=np.bool_)
+    merged = merged_direction_map(dmap_obs, dmap_exits, mask, 0.3, 0.3, 1.0)
+    expected = merge_dir_maps(dmap_obs, direction_map(dmap_obs),
+                              direction_map(dmap_exits), 0.3, 0.3)
+    assert np.allclose(merged, expected)
+
+
 @pytest.mark.skip
 def test_static_potential():
     assert True
 
 
-@pytest.mark.skip
+def test_speed_field():
+    step = 0.1
+    speed = np.ones((20, 20))
+    speed[0, :] = 0.0
+    dir_map = np.zeros((20, 20, 2))
+    dir_map[:, :, 0] = 1.0
+    position = np.array(((1.0, 1.0), (1.0, 0.05)))
+    velocity = np.array(((0.0, 0.0), (0.0, 0.0)))
+    speed = speed_field(speed, step, position, velocity, np.ones(2),
+                        np.full(2, 0.25), dir_map, 1.0, 1.0)
+    assert speed[10, 10] == 0.5
+    assert speed[10, 15] == 1.0
+    assert np.all(speed[0, :] == 0.0)
+
+
 def test_dynamic_potential():
-    assert True
+    step = 0.1
+    domain, targets, obstacles = room()
+    _, dmap_obs, _ = distance_map(domain, obstacles, None, step)
+    _, _, phi = distance_map(domain, targets, obstacles, step)
+    speed = np.where(np.ma.getmaskarray(phi), 0.0, 1.0)
+    sources = phi.data > 0
+    _, tmap, _ = travel_time_map(step, domain, targets, obstacles, speed)
+
+    speed_new = np.copy(speed)
+    speed_new[40:60, 80:95] *= 0.1
+    dir_map = dynamic_potential(step, tmap, sources, speed, speed_new,
+                                dmap_obs, 0.3, 0.3)
+    assert dir_map.shape == tmap.shape + (2,)
+    assert np.all(np.isfinite(dir_map))
 
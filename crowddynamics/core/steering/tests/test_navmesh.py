@@ -0,0 +1,41 @@
+import numpy as np
+from shapely.geometry import Polygon, LineString
+
+from crowddynamics.core.steering.navmesh import NavMesh, densify
+
+
+def room_with_wall():
+    """Room with a door on the right wall and an internal wall in front of
+    the door."""
+    domain = Polygon([(0, 0), (0, 10), (10, 10), (10, 0)])
+    targets = LineString([(10, 4.5), (10, 5.5)])
+    obstacles = LineString([(10, 4.5), (10, 0), (0, 0), (0, 10), (10, 10),
+                            (10, 5.5)]) | LineString([(5, 2), (5, 8)])
+    return domain, targets, obstacles
+
+
+def test_densify():
+    points = densify(LineString([(0, 0), (3, 0), (3, 1)]), 1.0)
+    assert np.all(np.hypot(*np.diff(points, axis=0).T) <= 1.0)
+    assert len(points) == 6
+
+
+def test_navmesh():
+    domain, targets, obstacles = room_with_wall()
+    navmesh = NavMesh(domain, targets, obstacles, max_edge=0.5)
+
+    assert np.all(np.isfinite(navmesh.distance))
+    assert navmesh.nbytes > 0
+
+    points = np.array(((8.0, 5.0), (2.0, 5.0), (-1.0, 5.0)))
+    directions = navmesh.direction(points)
+    assert np.allclose(np.hypot(*directions.T), 1.0)
+
+    # Door is visible and straight ahead.
+    assert directions[0, 0] > 0.9
+    # Internal wall blocks the straight path, therefore agent goes around.
+    assert directions[1, 0] < 0.95
+    assert np.abs(directions[1, 1]) > 0.3
+    # Path around the wall is longer than the straight line.
+    _, nearest = navmesh.tree.query(points[1])
+    assert navmesh.distance[nearest] > 8.0
@@ -1,7 +1,6 @@
 """Example multiagent simulations
 
 Todo:
-    - Periodic boundaries
     - Convert examples into test and validation simulations
 """
 from collections import namedtuple
@@ -13,10 +12,10 @@ from crowddynamics.core.agent.agent import AGENT_ATTRS
 from crowddynamics.io import Record
 from loggingtools import log_with
 from crowddynamics.multiagent.simulation import MultiAgentSimulation, register, \
-    AGENT_MODELS, BODY_TYPES
+    AGENT_MODELS, BODY_TYPES, SOCIAL_FORCES
 from crowddynamics.multiagent.tasks import Navigation, Orientation, \
     Integrator, Fluctuation, Adjusting, AgentAgentInteractions, \
-    AgentObstacleInteractions, Reset, HDFNode
+    AgentObstacleInteractions, Reset, HDFNode, Sink, Source
 
 
 # Annotations
@@ -31,6 +30,7 @@ class Outdoor(MultiAgentSimulation):
 
     - Multi-directional flow
     - Periodic boundaries
+    - Inflow from the left edge of the domain when ``inflow_rate > 0``
 
     """
 
@@ -41,11 +41,13 @@ class Outdoor(MultiAgentSimulation):
             height: (1.0, None) = 20.0,
             model: AGENT_MODELS = 'three_circle',
             body_type: BODY_TYPES = 'adult',
+            inflow_rate: (0.0, None) = 0.0,
+            social_force: SOCIAL_FORCES = 'power_law',
             save=False):
 
         domain = Polygon([(0, 0), (0, height), (width, height), (width, 0)])
         self.init_domain(domain)
-        self.init_agents(size, model)
+        self.init_agents(size, model, social_force=social_force)
 
         for i in self.add_agents(size, self.domain, body_type):
             pass
@@ -57,6 +59,17 @@ class Outdoor(MultiAgentSimulation):
         agent_agent_interactions = AgentAgentInteractions(self)
         fluctuation = Fluctuation(self)
 
+        if inflow_rate > 0:
+            source = Source(self, integrator)
+            source.set(Polygon([(0, 0), (0, height), (1.0, height), (1.0, 0)]),
+                       inflow_rate, body_type, target_direction=(1.0, 0.0))
+            sink = Sink(self, integrator)
+            sink.set(Polygon([(width, -1.0), (width, height + 1.0),
+                              (width + 2.0, height + 1.0),
+                              (width + 2.0, -1.0)]))
+        else:
+            source = sink = None
+
         if save:
             hdfnode = HDFNode(self)
             hdfnode.set(Record(object=self.agent, attributes=AGENT_ATTRS))
@@ -68,6 +81,9 @@ class Outdoor(MultiAgentSimulation):
             root += hdfnode
             root = hdfnode
         root += integrator
+        if source:
+            root += sink
+            root += source
         adjusting += orientation
         integrator += adjusting
         integrator += agent_agent_interactions
@@ -87,6 +103,10 @@ class Hallway(MultiAgentSimulation):
 
     #) Bidirectional flow
     #) Unidirectional flow
+    #) Steady inflow from both ends when ``inflow_rate > 0``
+    #) Steady state flow with periodic boundaries along the hallway when
+       ``periodic`` is set. Width of the hallway should be at least three
+       times ``sight_soc``.
     """
 
     @log_with()
@@ -96,6 +116,9 @@ class Hallway(MultiAgentSimulation):
             height: (1.0, None) = 5.0,
             model: AGENT_MODELS = 'three_circle',
             body_type: BODY_TYPES = 'adult',
+            inflow_rate: (0.0, None) = 0.0,
+            periodic=False,
+            social_force: SOCIAL_FORCES = 'power_law',
             save=False):
 
         domain = Polygon([(0, 0), (0, height), (width, height), (width, 0)])
@@ -124,8 +147,8 @@ class Hallway(MultiAgentSimulation):
              'orientation': np.pi},
         )
 
-        self.init_domain(domain)
-        self.init_agents(size, model)
+        self.init_domain(domain, periodic=(periodic, False))
+        self.init_agents(size, model, social_force=social_force)
 
         for obs in obstacles:
             self.add_obstacle(obs)
@@ -149,6 +172,28 @@ class Hallway(MultiAgentSimulation):
         agent_obstacle_interactions = AgentObstacleInteractions(self)
         fluctuation = Fluctuation(self)
 
+        # Sources at both ends of the hallway and sinks behind the ends.
+        sources = []
+        sinks = []
+        if inflow_rate > 0:
+            ends = (
+                (Polygon([(0, 0), (0, height), (1.1, height), (1.1, 0)]),
+                 Polygon([(width, 0), (width, height),
+                          (width + 2.0, height), (width + 2.0, 0)])),
+                (Polygon([(width - 1.1, 0), (width - 1.1, height),
+                          (width, height), (width, 0)]),
+                 Polygon([(-2.0, 0), (-2.0, height), (0, height), (0, 0)])),
+            )
+            for kw, (spawn, target) in zip(kwargs, ends):
+                source = Source(self, integrator)
+                source.set(spawn, inflow_rate, body_type,
+                           target_direction=kw['target_direction'],
+                           orientation=kw['orientation'])
+                sources.append(source)
+                sink = Sink(self, integrator)
+                sink.set(target)
+                sinks.append(sink)
+
         if save:
             hdfnode = HDFNode(self)
             hdfnode.set(Record(object=self.agent, attributes=AGENT_ATTRS))
@@ -160,6 +205,10 @@ class Hallway(MultiAgentSimulation):
             root += hdfnode
             root = hdfnode
         root += integrator
+        for sink in sinks:
+            root += sink
+        for source in sources:
+            root += source
         integrator += adjusting
         integrator += agent_agent_interactions
         integrator += agent_obstacle_interactions
@@ -184,6 +233,7 @@ class Rounding(MultiAgentSimulation):
             height: (1.0, None) = 15.0,
             model: AGENT_MODELS = 'circular',
             body_type: BODY_TYPES = 'adult',
+            social_force: SOCIAL_FORCES = 'power_law',
             save=False):
 
         domain = Polygon([(0, 0), (0, height), (width, height), (width, 0)])
@@ -204,7 +254,7 @@ class Rounding(MultiAgentSimulation):
         }]
 
         self.init_domain(domain)
-        self.init_agents(size, model)
+        self.init_agents(size, model, social_force=social_force)
         for obs in obstacles:
             self.add_obstacle(obs)
         self.add_target(exits)
@@ -261,6 +311,9 @@ class RoomEvacuation(MultiAgentSimulation):
     - One exit
     - Two exits
     - Multiple exits
+
+    With ``mixed`` model agents closer than ``door_region`` to the door are
+    modeled using three circles and the rest as circles.
     """
 
     @log_with()
@@ -273,6 +326,8 @@ class RoomEvacuation(MultiAgentSimulation):
             spawn_shape: ('circ',) = 'circ',
             door_width: (0.5, None) = 1.2,
             exit_hall_width: (0.0, None) = 2.0,
+            door_region: (0.0, None) = 3.0,
+            social_force: SOCIAL_FORCES = 'power_law',
             save=False):
 
         self.room = Polygon(
@@ -305,11 +360,19 @@ class RoomEvacuation(MultiAgentSimulation):
         }]
 
         self.init_domain(domain)
-        self.init_agents(size, model)
+        self.init_agents(size, model, social_force=social_force)
         for obs in obstacles:
             self.add_obstacle(obs)
         self.add_target(exits)
 
+        # Navigation field does not depend on the agents, therefore it is
+        # solved in the background while the agents are placed.
+        navigation = Navigation(self, background=True)
+
+        # With mixed models only agents close to the door are modeled using
+        # three circles.
+        door_center = Point(np.mean(self.door, axis=0))
+
         for kw in kwargs:
             for i in self.add_agents(kw['size'], kw['spawn'], body_type):
                 self.agent.set_motion(
@@ -320,15 +383,21 @@ class RoomEvacuation(MultiAgentSimulation):
                     kw['target_direction'],
                     kw['orientation']
                 )
+                if model == 'mixed':
+                    distance = door_center.distance(
+                        Point(self.agent.position[i]))
+                    self.agent.set_agent_model(i, distance < door_region)
 
         reset = Reset(self)
         integrator = Integrator(self)
         adjusting = Adjusting(self)
         orientation = Orientation(self)
-        navigation = Navigation(self)
         agent_agent_interactions = AgentAgentInteractions(self)
         agent_obstacle_interactions = AgentObstacleInteractions(self)
         fluctuation = Fluctuation(self)
+        sink = Sink(self, integrator)
+        sink.set(exits.buffer(0.5))
+        self.sink = sink
 
         if save:
             hdfnode = HDFNode(self)
@@ -341,6 +410,7 @@ class RoomEvacuation(MultiAgentSimulation):
             root += hdfnode
             root = hdfnode
         root += integrator
+        root += sink
         integrator += adjusting
         integrator += agent_agent_interactions
         integrator += agent_obstacle_interactions
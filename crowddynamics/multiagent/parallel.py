@@ -0,0 +1,435 @@
+r"""Domain decomposition for running single simulation in multiple processes.
+
+Domain is divided along the x-axis into strips, one for each worker process.
+Attributes of the agents are stored in shared memory. Each step the worker
+
+1) Copies the agents it owns and the agents in the halo zones next to its
+   strip into a local ``Agent`` structure. Agent is owned by the worker if its
+   center of mass is inside the strip. Halo zones are wide enough to contain
+   all the agents that can interact with the owned agents.
+2) Waits until all workers have read the shared memory.
+3) Evaluates the task graph of the strip on the local agents.
+4) Writes the updated state of the owned agents back into shared memory.
+5) Waits until all workers have written into the shared memory.
+
+Ownership is computed from the positions in the shared memory on every step,
+therefore agents migrate between strips automatically when they cross the
+boundary of a strip.
+
+Limitations
+
+- Capacity of the agent structure is fixed for the duration of the run
+  therefore sources and sinks are not supported.
+- Periodic boundaries are not supported.
+- Navigation fields are not computed. Agents keep their target directions.
+"""
+import logging
+import multiprocessing
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+from loggingtools import log_with
+
+from crowddynamics.core.agent.agent import Agent
+from crowddynamics.core.agent.agents import MAX_AGENT_RADIUS
+from crowddynamics.exceptions import InvalidArgument
+from crowddynamics.multiagent.simulation import MultiAgentSimulation, \
+    MultiAgentProcess
+from crowddynamics.multiagent.tasks import Reset, Integrator, Adjusting, \
+    Orientation, AgentAgentInteractions, AgentObstacleInteractions, \
+    Fluctuation
+
+# Attributes of the agents that are stored in shared memory.
+SHARED_ATTRS = (
+    'active',
+    'is_three_circle',
+    'mass',
+    'radius',
+    'r_t',
+    'r_s',
+    'r_ts',
+    'position',
+    'velocity',
+    'target_velocity',
+    'target_direction',
+    'inertia_rot',
+    'orientation',
+    'angular_velocity',
+    'target_orientation',
+    'target_angular_velocity',
+    'tau_adj',
+    'tau_rot',
+    'k_soc',
+    'tau_0',
+    'mu',
+    'kappa',
+    'damping',
+    'std_rand_force',
+    'std_rand_torque',
+    'density',
+    'pressure',
+)
+
+# Attributes of the agents that are updated by the workers.
+MUTABLE_ATTRS = (
+    'position',
+    'velocity',
+    'target_direction',
+    'orientation',
+    'angular_velocity',
+    'target_orientation',
+    'density',
+    'pressure',
+)
+
+# Scalar attributes of the agents that are copied to the workers.
+SCALAR_ATTRS = (
+    'circular',
+    'three_circle',
+    'mixed',
+    'orientable',
+    'f_soc_ij_max',
+    'f_soc_iw_max',
+    'sight_soc',
+    'sight_wall',
+    'vision_cone',
+    'density_radius',
+)
+
+
+class SharedAgent(object):
+    """Attributes of the agents in shared memory.
+
+    Instances can be passed to child processes. Arrays are attached to the
+    same shared memory blocks in the child process.
+
+    Attributes:
+        size (int): Capacity of the agent structure.
+        scalars (dict): Scalar attributes of the agents.
+        arrays (dict): Numpy arrays backed by shared memory.
+    """
+
+    def __init__(self, agent):
+        """Copy the attributes of ``agent`` into new shared memory blocks.
+
+        Args:
+            agent (Agent):
+        """
+        self.size = agent.size
+        self.scalars = {name: getattr(agent, name) for name in SCALAR_ATTRS}
+        self._blocks = {}
+        self.arrays = {}
+        for name in SHARED_ATTRS:
+            array = np.asarray(getattr(agent, name))
+            block = shared_memory.SharedMemory(
+                create=True, size=max(array.nbytes, 1))
+            self._blocks[name] = (block, array.shape, array.dtype)
+            self.arrays[name] = np.ndarray(array.shape, array.dtype,
+                                           buffer=block.buf)
+            self.arrays[name][:] = array
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_blocks'] = {name: (block.name, shape, dtype) for
+                            name, (block, shape, dtype) in
+                            self._blocks.items()}
+        del state['arrays']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.arrays = {}
+        for name, (block_name, shape, dtype) in self._blocks.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            self._blocks[name] = (block, shape, dtype)
+            self.arrays[name] = np.ndarray(shape, dtype, buffer=block.buf)
+
+    def new_agent(self, size):
+        """New agent structure with the scalar attributes of shared agents.
+
+        Args:
+            size (int):
+
+        Returns:
+            Agent:
+        """
+        agent = Agent(max(size, 1))
+        if self.scalars['three_circle']:
+            agent.set_three_circle()
+        elif self.scalars['mixed']:
+            agent.set_mixed()
+        else:
+            agent.set_circular()
+        for name, value in self.scalars.items():
+            setattr(agent, name, value)
+        return agent
+
+    def read(self, indices, agent):
+        """Copy agents of ``indices`` into first ``len(indices)`` slots of
+        ``agent``. Rest of the slots are set inactive. Agent structure grows if
+        it is too small.
+
+        Args:
+            indices (numpy.ndarray):
+            agent (Agent):
+        """
+        n = len(indices)
+        if n > agent.size:
+            agent.resize(max(2 * agent.size, n))
+        for name in SHARED_ATTRS:
+            getattr(agent, name)[:n] = self.arrays[name][indices]
+        agent.active[n:] = False
+
+    def write(self, indices, agent):
+        """Copy mutable attributes of first ``len(indices)`` slots of ``agent``
+        into agents of ``indices``.
+
+        Args:
+            indices (numpy.ndarray):
+            agent (Agent):
+        """
+        n = len(indices)
+        for name in MUTABLE_ATTRS:
+            self.arrays[name][indices] = getattr(agent, name)[:n]
+
+    def gather(self, agent):
+        """Copy all shared attributes into ``agent`` of the same size.
+
+        Args:
+            agent (Agent):
+        """
+        for name in SHARED_ATTRS:
+            getattr(agent, name)[:] = self.arrays[name]
+
+    def close(self):
+        """Close access to the shared memory from this process."""
+        self.arrays = {}
+        for block, _, _ in self._blocks.values():
+            block.close()
+
+    def unlink(self):
+        """Close and free the shared memory. Should be called once by the
+        process that created the shared memory."""
+        blocks = [block for block, _, _ in self._blocks.values()]
+        self.close()
+        for block in blocks:
+            block.unlink()
+
+
+def strip_edges(position, workers):
+    """Edges of the strips along x-axis that divide agents evenly between the
+    workers. First and last strip are unbounded.
+
+    Args:
+        position (numpy.ndarray): Positions of the active agents.
+        workers (int): Number of strips.
+
+    Returns:
+        numpy.ndarray: Edges of length ``workers + 1``.
+    """
+    edges = np.empty(workers + 1)
+    edges[0] = -np.inf
+    edges[-1] = np.inf
+    if len(position) > 0:
+        edges[1:-1] = np.percentile(
+            position[:, 0], np.linspace(0, 100, workers + 1)[1:-1])
+    else:
+        edges[1:-1] = 0.0
+    return edges
+
+
+class TileSimulation(MultiAgentSimulation):
+    r"""Simulation of the agents inside a strip of the domain. Run inside
+    ``TileProcess``.
+
+    Attributes:
+        shared (SharedAgent): Agents shared between the workers.
+        lower (float): Lower edge of the strip.
+        upper (float): Upper edge of the strip.
+        halo (float): Width of the halo zones.
+        barrier (multiprocessing.Barrier): Barrier shared between the workers.
+    """
+
+    def set(self, shared, lower, upper, halo, barrier, domain, obstacles,
+            dt=(0.001, 0.01), cell_ratio=1, social_force='power_law'):
+        self.init_domain(domain)
+        self.social_force = social_force
+        self.obstacles = obstacles
+        self.shared = shared
+        self.lower = lower
+        self.upper = upper
+        self.halo = halo
+        self.barrier = barrier
+        self.owned = np.zeros(0, dtype=np.int64)
+
+        reset = Reset(self)
+        integrator = Integrator(self)
+        integrator.dt = dt
+        adjusting = Adjusting(self)
+        orientation = Orientation(self)
+        agent_agent_interactions = AgentAgentInteractions(self, cell_ratio)
+        fluctuation = Fluctuation(self)
+
+        reset += integrator
+        integrator += adjusting
+        integrator += agent_agent_interactions
+        if not self.obstacles.is_empty:
+            integrator += AgentObstacleInteractions(self)
+        integrator += fluctuation
+        adjusting += orientation
+
+        self.set_tasks(reset)
+
+    def partition(self):
+        """Indices of the owned agents and agents in the halo zones.
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray):
+        """
+        active = self.shared.arrays['active']
+        x = self.shared.arrays['position'][:, 0]
+        inside = active & (x >= self.lower) & (x < self.upper)
+        near = active & (x >= self.lower - self.halo) & \
+            (x < self.upper + self.halo)
+        return np.flatnonzero(inside), np.flatnonzero(near & ~inside)
+
+    def update(self):
+        if self.agent is None:
+            # Workers should not share the state of the random number
+            # generator.
+            np.random.seed()
+            self.agent = self.shared.new_agent(self.shared.size)
+
+        self.owned, halo = self.partition()
+        self.shared.read(np.concatenate((self.owned, halo)), self.agent)
+        self.barrier.wait()
+
+        self.tasks.evaluate()
+
+        self.shared.write(self.owned, self.agent)
+        self.barrier.wait()
+        self.iterations += 1
+
+
+class TileProcess(MultiAgentProcess):
+    """Worker process that runs ``TileSimulation`` in lockstep with other
+    workers. Stopping one worker stops all workers. State of the agents in the
+    shared memory is not consistent after stop."""
+    logger = logging.getLogger(__name__)
+
+    @log_with(logger)
+    def run(self):
+        # Unlike in the base class reaching maxiter does not abort the barrier
+        # because other workers might still be waiting on it.
+        try:
+            while not self.exit.is_set():
+                self.simulation.update()
+                if self.maxiter and self.simulation.iterations > self.maxiter:
+                    self.exit.set()
+        except threading.BrokenBarrierError:
+            pass
+        finally:
+            self.simulation.shared.close()
+        self.simulation.queue.put(self.EOS)
+
+    @log_with(logger)
+    def stop(self):
+        super(TileProcess, self).stop()
+        self.simulation.barrier.abort()
+
+
+class DomainDecomposition(object):
+    r"""Run the agents of a simulation in multiple processes.
+
+    Example
+        >>> simulation = Outdoor()
+        >>> simulation.set(...)
+        >>> decomposition = DomainDecomposition(simulation, workers=4)
+        >>> decomposition.run(maxiter=100)
+        >>> decomposition.close()
+
+    Attributes:
+        simulation (MultiAgentSimulation):
+            Simulation whose agents are simulated. State of the agents is
+            copied back into ``simulation.agent`` after run.
+        workers (int): Number of worker processes.
+    """
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, simulation, workers, dt=(0.001, 0.01), cell_ratio=1):
+        if np.any(simulation.periodic):
+            raise InvalidArgument('Domain decomposition does not support '
+                                  'periodic boundaries.')
+        if workers < 1:
+            raise InvalidArgument('Number of workers should be positive.')
+        self.simulation = simulation
+        self.workers = workers
+        self.dt = dt
+        self.cell_ratio = cell_ratio
+        self.shared = SharedAgent(simulation.agent)
+        self.halo = simulation.agent.sight_soc + 2 * MAX_AGENT_RADIUS
+        self.processes = []
+
+    def tiles(self):
+        """Create tile simulations using the current positions of the agents
+        for balancing the number of agents in the strips.
+
+        Returns:
+            list[TileSimulation]:
+        """
+        active = self.shared.arrays['active']
+        edges = strip_edges(self.shared.arrays['position'][active],
+                            self.workers)
+        barrier = multiprocessing.Barrier(self.workers)
+        tiles = []
+        for lower, upper in zip(edges[:-1], edges[1:]):
+            tile = TileSimulation()
+            tile.set(self.shared, lower, upper, self.halo, barrier,
+                     self.simulation.domain, self.simulation.obstacles,
+                     self.dt, self.cell_ratio, self.simulation.social_force)
+            tiles.append(tile)
+        return tiles
+
+    @log_with(logger)
+    def start(self, maxiter):
+        """Start the worker processes.
+
+        Args:
+            maxiter (int): Number of iterations.
+
+        Returns:
+            list[TileProcess]: Started processes.
+        """
+        self.processes = [TileProcess(tile, maxiter) for tile in self.tiles()]
+        for process in self.processes:
+            process.start()
+        return self.processes
+
+    @log_with(logger)
+    def join(self):
+        """Wait for the workers to finish and copy the state of the agents
+        into ``simulation.agent``."""
+        for process in self.processes:
+            process.join()
+        self.processes = []
+        self.shared.gather(self.simulation.agent)
+
+    def run(self, maxiter):
+        """Run workers for ``maxiter`` iterations and wait for them to finish.
+
+        Args:
+            maxiter (int):
+        """
+        self.start(maxiter)
+        self.join()
+
+    @log_with(logger)
+    def stop(self):
+        """Stop all workers."""
+        for process in self.processes:
+            process.stop()
+
+    def close(self):
+        """Free the shared memory."""
+        self.shared.unlink()
@@ -14,13 +14,16 @@ from crowddynamics.core.agent.parameters import Parameters
 from crowddynamics.core.interactions import overlapping_three_circle, \
     overlapping_circle_circle
 from crowddynamics.core.random.sampling import PolygonSample
-from crowddynamics.exceptions import CrowdDynamicsException, InvalidArgument
+from crowddynamics.exceptions import CrowdDynamicsException, InvalidArgument, \
+    AgentStructureFull
 from crowddynamics.multiagent.taskgraph import TaskNode
 
 REGISTERED_SIMULATIONS = dict()
 # TODO: remove, replace with Enum classes in agents.py
-AGENT_MODELS = ['circular', 'three_circle']
+AGENT_MODELS = ['circular', 'three_circle', 'mixed']
 BODY_TYPES = ['adult', 'male', 'female', 'child', 'eldery']
+SOCIAL_FORCES = ['power_law', 'power_law_table', 'power_law_contact',
+                 'helbing', 'contact']
 
 
 def agent_polygon(position, radius):
@@ -34,6 +37,29 @@ def agent_polygon(position, radius):
         return Point(position).buffer(radius)
 
 
+def agent_parameters(parameters):
+    """Draw parameters for new agent.
+
+    Args:
+        parameters (Parameters):
+
+    Returns:
+        tuple: ``mass``, ``radius``, ``r_t``, ``r_s``, ``r_ts``,
+        ``inertia_rot``, ``max_velocity`` and ``max_angular_velocity`` in the
+        order of the arguments of ``Agent.add``.
+    """
+    mass = parameters.mass.default()
+    radius = parameters.radius.default()
+    r_t = parameters.radius_torso.default() * radius
+    r_s = parameters.radius_shoulder.default() * radius
+    r_ts = parameters.radius_torso_shoulder.default() * radius
+    inertia_rot = parameters.moment_of_inertia.default()
+    max_velocity = parameters.maximum_velocity.default()
+    max_angular_velocity = parameters.maximum_angular_velocity.default()
+    return mass, radius, r_t, r_s, r_ts, inertia_rot, max_velocity, \
+        max_angular_velocity
+
+
 class MultiAgentSimulation:
     r"""MultiAgent simulation setup
 
@@ -45,8 +71,8 @@ class MultiAgentSimulation:
 
     2) Initialise Agents
 
-       - Set maximum number of agents. This is the limit of the size of array
-         inside ``Agent`` class.
+       - Set initial capacity of the ``Agent`` structure. Capacity grows when
+         structure fills up unless hard limit is set.
        - Select Agent model.
 
     3) Place Agents into any surface that is contained by the domain.
@@ -65,6 +91,10 @@ class MultiAgentSimulation:
         self.obstacles = GeometryCollection()
         self.targets = GeometryCollection()
         self.agent = None
+        self.social_force = 'power_law'
+
+        # Periodic boundary conditions along x and y axes
+        self.periodic = np.zeros(2, dtype=np.bool_)
 
         # Currently occupied surface by Agents and Obstacles
         self._occupied = Polygon()
@@ -80,7 +110,7 @@ class MultiAgentSimulation:
         return self.__class__.__name__
 
     @log_with(logger)
-    def init_domain(self, domain):
+    def init_domain(self, domain, periodic=(False, False)):
         """Initialize domain
 
         Args:
@@ -88,25 +118,69 @@ class MultiAgentSimulation:
                 - ``Polygon``: Subset of real domain
                   :math:`\Omega \subset \mathbb{R}^{2}`.
                 - ``None``: Real domain :math:`\Omega = \mathbb{R}^{2}`.
+
+            periodic ((bool, bool)):
+                Periodic boundary conditions along x and y axes. Periodic
+                domain wraps around the bounding box of the ``domain``.
         """
         self.domain = domain
+        self.periodic = np.array(periodic, dtype=np.bool_)
+
+    @property
+    def bounds(self):
+        """Lower and upper corner of the bounding box of the domain.
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray):
+        """
+        minx, miny, maxx, maxy = self.domain.bounds
+        return np.array((minx, miny)), np.array((maxx, maxy))
 
     @log_with(logger)
-    def init_agents(self, max_size, model):
+    def init_agents(self, size, model, max_size=None,
+                    social_force='power_law'):
         """Initialize agents
 
         Args:
-            max_size (int):
-                - ``int``: Maximum number of agents.
+            size (int):
+                Initial capacity of the agent structure. Capacity grows
+                geometrically when the structure is full.
 
             model (str):
                 Choice from:
                 - ``circular``
                 - ``three_circle``
+                - ``mixed``: Model is selected per agent using
+                  ``agent.set_agent_model``. Agents are circular by default.
+
+            max_size (int, optional):
+                - ``int``: Hard limit for the number of agents.
+                - ``None``: Number of agents is not limited.
+
+            social_force (str):
+                Social force model for interactions. Choice from:
+                - ``power_law``: Anticipatory power law.
+                - ``power_law_table``: Anticipatory power law with tabulated
+                  magnitude.
+                - ``power_law_contact``: Anticipatory power law between
+                  separated agents and only contact force between overlapping
+                  agents.
+                - ``helbing``: Helbing's exponential force. Cheaper to
+                  compute.
+                - ``contact``: No social force. Agents interact only by
+                  contact forces.
         """
-        self.agent = Agent(max_size)
+        if social_force not in SOCIAL_FORCES:
+            raise InvalidArgument('Social force model should be one of '
+                                  '{}'.format(SOCIAL_FORCES))
+        self.social_force = social_force
+        self.agent = Agent(size)
+        if max_size:
+            self.agent.max_size = max_size
         if model == 'three_circle':
             self.agent.set_three_circle()
+        elif model == 'mixed':
+            self.agent.set_mixed()
         else:
             self.agent.set_circular()
 
@@ -140,6 +214,42 @@ class MultiAgentSimulation:
         """Remove target"""
         self.targets -= geom
 
+    def overlapping(self, indices, position, radius, r_t, r_s):
+        """Test if agent in new position would overlap with existing agents or
+        obstacles.
+
+        Args:
+            indices (numpy.ndarray):
+                Indices of the agents to test against.
+            position (numpy.ndarray):
+            radius (float):
+            r_t (float):
+            r_s (float):
+
+        Returns:
+            (bool, bool): Overlapping agents and overlapping obstacles.
+        """
+        if self.agent.three_circle:
+            orientation = 0.0
+            poly = agent_polygon(
+                positions(position, orientation, r_t),
+                (r_t, r_s, r_s)
+            )
+            overlapping_agents = overlapping_three_circle(
+                self.agent, indices,
+                positions(position, orientation, r_t),
+                (r_t, r_s, r_s),
+            )
+        else:
+            poly = agent_polygon(position, radius)
+            overlapping_agents = overlapping_circle_circle(
+                self.agent, indices,
+                position,
+                radius
+            )
+        overlapping_obstacles = self.obstacles.intersects(poly)
+        return overlapping_agents, overlapping_obstacles
+
     @log_with(logger)
     def add_agents(self, num, spawn, body_type, iterations_limit=100):
         r"""Add multiple agents at once.
@@ -174,6 +284,10 @@ class MultiAgentSimulation:
         Yields:
             int: Index of agent that was placed.
 
+        Raises:
+            AgentStructureFull:
+                If the agent structure has reached its hard limit.
+
         """
         # Draw random uniformly distributed points from the set on points
         # that belong to the surface. These are used as possible new position
@@ -185,40 +299,15 @@ class MultiAgentSimulation:
         while num > 0 and iterations <= iterations_limit * num:
             # Parameters
             position = sampling.draw()
-            mass = parameters.mass.default()
-            radius = parameters.radius.default()
-            r_t = parameters.radius_torso.default() * radius
-            r_s = parameters.radius_shoulder.default() * radius
-            r_ts = parameters.radius_torso_shoulder.default() * radius
-            inertia_rot = parameters.moment_of_inertia.default()
-            max_velocity = parameters.maximum_velocity.default()
-            max_angular_velocity = parameters.maximum_angular_velocity.default()
-
-            # Polygon of the agent
+            mass, radius, r_t, r_s, r_ts, inertia_rot, max_velocity, \
+                max_angular_velocity = agent_parameters(parameters)
+
             overlapping_agents = False
             overlapping_obstacles = False
             num_active_agents = np.sum(self.agent.active)
             if num_active_agents > 0:
-                # Conditions
-                if self.agent.three_circle:
-                    orientation = 0.0
-                    poly = agent_polygon(
-                        positions(position, orientation, r_t),
-                        (r_t, r_s, r_s)
-                    )
-                    overlapping_agents = overlapping_three_circle(
-                        self.agent, self.agent.indices(),
-                        positions(position, orientation, r_t),
-                        (r_t, r_s, r_s),
-                    )
-                else:
-                    poly = agent_polygon(position, radius)
-                    overlapping_agents = overlapping_circle_circle(
-                        self.agent, self.agent.indices(),
-                        position,
-                        radius
-                    )
-                overlapping_obstacles = self.obstacles.intersects(poly)
+                overlapping_agents, overlapping_obstacles = self.overlapping(
+                    self.agent.indices(), position, radius, r_t, r_s)
 
             if not overlapping_agents and not overlapping_obstacles:
                 # Add new agent
@@ -226,13 +315,15 @@ class MultiAgentSimulation:
                     position, mass, radius, r_t, r_s, r_ts,
                     inertia_rot, max_velocity, max_angular_velocity
                 )
-                if index >= 0:
-                    # Yield index of an agent that was successfully placed.
-                    num -= 1
-                    # self.agents[index] = poly
-                    yield index
-                else:
-                    break
+                if index < 0:
+                    raise AgentStructureFull(
+                        'Agent structure has reached maximum size of '
+                        '{}'.format(self.agent.max_size))
+
+                # Yield index of an agent that was successfully placed.
+                num -= 1
+                # self.agents[index] = poly
+                yield index
             iterations += 1
 
     @log_with(logger)
@@ -1,15 +1,32 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
 import numpy as np
 from matplotlib.path import Path
 
+from crowddynamics.core.agent.agents import MAX_AGENT_RADIUS
+from crowddynamics.core.agent.parameters import Parameters
+from crowddynamics.core.evacuation.evacuation import narrow_exit_capacity, \
+    exit_selection
 from crowddynamics.core.geometry import shapes_to_point_pairs
-from crowddynamics.core.integrator import euler_integration
-from crowddynamics.core.interactions.interactions import agent_agent_block_list, agent_wall
+from crowddynamics.core.integrator import euler_integration, periodic_wrap
+from crowddynamics.core.interactions.interactions import local_density, \
+    SOCIAL_FORCE_MODELS
+from crowddynamics.core.interactions.partitioning import MutableBlockList
 from crowddynamics.core.motion import force_fluctuation, \
     force_adjust, torque_adjust, torque_fluctuation
-from crowddynamics.core.steering.navigation import to_indices, static_potential
+from crowddynamics.core.random.functions import poisson_clock
+from crowddynamics.core.random.sampling import PolygonSample
+from crowddynamics.core.steering.navmesh import NavMesh
+from crowddynamics.core.steering.navigation import static_potential_cached, \
+    distance_map, travel_time_map, speed_field, dynamic_potential, \
+    encode_direction_map, exit_potentials, \
+    interpolate_map, static_potential_tiled, lookup_direction_map, \
+    lookup_encoded_direction_map, lookup_tiled_direction_map
 from crowddynamics.core.vector.vector2D import angle_nx2
 from crowddynamics.io import HDFStore
 from crowddynamics.io import Record
+from crowddynamics.multiagent.simulation import agent_parameters
 from crowddynamics.multiagent.taskgraph import TaskNode
 
 
@@ -42,9 +59,17 @@ class Integrator(TaskNode):
         pass
 
     def update(self):
-        self.dt_prev = euler_integration(self.simulation.agent, self.dt[0], self.dt[0])
+        agent = self.simulation.agent
+        self.dt_prev = euler_integration(agent, self.dt[0], self.dt[0])
         self.time_tot += self.dt_prev
 
+        if np.any(self.simulation.periodic):
+            i = agent.indices()
+            position = agent.position[i]
+            periodic_wrap(position, *self.simulation.bounds,
+                          self.simulation.periodic)
+            agent.position[i] = position
+
 
 class Fluctuation(TaskNode):
     r"""Fluctuation"""
@@ -90,14 +115,45 @@ class Adjusting(TaskNode):
 
 
 class AgentAgentInteractions(TaskNode):
-    r"""AgentAgentInteractions"""
+    r"""AgentAgentInteractions
 
-    def __init__(self, simulation):
+    Attributes:
+        simulation (MultiAgentSimulation):
+        cell_ratio (int):
+            Number of blocks per interaction range in the block list. Values
+            larger than one are faster in dense crowds.
+        partitioning (str):
+            Choice from:
+            - ``block_list``: Uniform grid.
+            - ``quadtree``: Adaptive grid for large density contrasts. Does
+              not support periodic boundaries.
+
+    Local density and crowd pressure of the agents are computed during the
+    pass if ``agent.density_radius`` is positive. Social force model is
+    selected by ``simulation.social_force``.
+    """
+
+    def __init__(self, simulation, cell_ratio=1, partitioning='block_list'):
         super().__init__()
         self.simulation = simulation
+        self.cell_ratio = cell_ratio
+        self.partitioning = partitioning
 
     def update(self):
-        agent_agent_block_list(self.simulation.agent)
+        kernels = SOCIAL_FORCE_MODELS[self.simulation.social_force]
+        if self.partitioning == 'quadtree':
+            kernels.agent_agent_quadtree(self.simulation.agent)
+        elif np.any(self.simulation.periodic):
+            kernels.agent_agent_block_list_periodic(self.simulation.agent,
+                                                    *self.simulation.bounds,
+                                                    self.simulation.periodic,
+                                                    self.cell_ratio)
+        else:
+            kernels.agent_agent_block_list(self.simulation.agent,
+                                           self.cell_ratio)
+
+        if self.simulation.agent.density_radius > 0:
+            local_density(self.simulation.agent)
 
 
 class AgentObstacleInteractions(TaskNode):
@@ -111,49 +167,209 @@ class AgentObstacleInteractions(TaskNode):
         self.walls = shapes_to_point_pairs(self.simulation.obstacles)
 
     def update(self):
-        agent_wall(self.simulation.agent, self.walls)
+        kernels = SOCIAL_FORCE_MODELS[self.simulation.social_force]
+        kernels.agent_wall(self.simulation.agent, self.walls)
 
 
 class Navigation(TaskNode):
     r"""Handles navigation in multi-agent simulation.
 
+    Target directions of the agents are bilinearly interpolated from the
+    direction map, therefore the map can be solved on a coarse grid. Static
+    direction maps are cached on disk by the geometry of the simulation.
+
+    Dynamic algorithm updates the direction map every ``interval`` timesteps
+    from the speed field of the current positions and velocities of the
+    agents. Agents route around congested regions.
+
+    Exits algorithm has separate direction map for each exit. Agents follow
+    the direction map of the exit in ``agent.target_exit`` which is selected
+    by ``ExitSelection``.
+
+    Navmesh algorithm uses ``NavMesh`` instead of grid for very large domains.
+    Parameter ``step`` is then the maximum length of the edges of the mesh
+    along the boundaries.
+
     Attributes:
         simulation:
-        algorithm:
-        step (float): Step size for the grid.
+        algorithm (str): ``static``, ``dynamic``, ``exits`` or ``navmesh``.
+        step (float): Step size for the grid. Reference value
+            :math:`0.1\,\mathrm{m}`.
+        cache_dir (str, optional): Directory for cached direction maps.
+            Defaults to ``crowddynamics.core.steering.navigation.CACHE_DIR``.
+        interval (int): Number of timesteps between the updates of dynamic
+            direction map.
+        c0 (float): General impact strength of the agents on the speed field.
+        c1 (float): Impact of the moving direction of the agents on the speed
+            field.
+        encoding (numpy.dtype, optional): Integer type for storing the
+            direction map compressed using ``encode_direction_map``.
+            ``None`` stores the direction map uncompressed.
+        tile_size (int, optional): Static algorithm stores the encoded
+            direction map as tiles of this size in a memory-mapped file.
+            Tiles are loaded lazily where the agents are and the file is
+            shared read-only by simulations in other processes.
+        precomputation (concurrent.futures.Future, optional): Static
+            direction map being computed in a background process. Navigation
+            waits for it on the first update.
 
     """
 
-    def __init__(self, simulation):
+    def __init__(self, simulation, step=0.1, cache_dir=None,
+                 algorithm='static', interval=10, encoding=np.uint16,
+                 tile_size=None, background=False):
         super().__init__()
         self.simulation = simulation
 
-        self.step = 0.01
+        self.step = step
         self.direction_map = None
-        self.algorithm = "static"
-
-        if self.algorithm == "static":
-            self.direction_map = static_potential(self.step,
-                                                  self.simulation.domain,
-                                                  self.simulation.targets,
-                                                  self.simulation.obstacles,
-                                                  radius=0.3,
-                                                  value=0.3)
-        elif self.algorithm == "dynamic":
-            raise NotImplementedError
+        self.encoding = encoding
+        self.tile_size = tile_size
+        self.cache_dir = cache_dir
+        self.precomputation = None
+        self.algorithm = algorithm
+        self.interval = interval
+        self.iteration = 0
+        self.c0 = 1.0
+        self.c1 = 1.0
+        self.radius = 0.3
+        self.value = 0.3
+
+        if self.algorithm == "static" and background:
+            # Static potential does not depend on the agents, therefore it
+            # is solved in a background process while the agents are placed.
+            # The process writes the map into the cache from where it is
+            # loaded by ``wait``.
+            executor = ProcessPoolExecutor(max_workers=1)
+            self.precomputation = executor.submit(self.static_potential())
+            executor.shutdown(wait=False)
+        elif self.algorithm in ("static", "dynamic"):
+            self.set_static_map(self.static_potential()())
+
+        if self.algorithm == "dynamic":
+            _, self.dmap_obs, _ = distance_map(self.simulation.domain,
+                                               self.simulation.obstacles,
+                                               None, self.step)
+            _, _, phi = distance_map(self.simulation.domain,
+                                     self.simulation.targets,
+                                     self.simulation.obstacles, self.step)
+            self.speed_base = np.where(np.ma.getmaskarray(phi), 0.0, 1.0)
+            self.sources = phi.data > 0
+            self.speed = np.copy(self.speed_base)
+            _, self.tmap, _ = travel_time_map(self.step,
+                                              self.simulation.domain,
+                                              self.simulation.targets,
+                                              self.simulation.obstacles,
+                                              self.speed)
+
+        if self.algorithm == "exits":
+            self.exits = list(getattr(self.simulation.targets, 'geoms',
+                                      [self.simulation.targets]))
+            dir_maps, self.distance_maps = exit_potentials(
+                self.step,
+                self.simulation.domain,
+                self.simulation.targets,
+                self.simulation.obstacles,
+                radius=self.radius,
+                value=self.value)
+            self.direction_maps = [self.encode(d) for d in dir_maps]
+            self.direction_map = self.direction_maps[0]
+
+        if self.algorithm == "navmesh":
+            self.navmesh = NavMesh(self.simulation.domain,
+                                   self.simulation.targets,
+                                   self.simulation.obstacles,
+                                   max_edge=self.step)
+
+    def static_potential(self):
+        """Function without arguments that solves the static direction map
+        or loads it from the cache. Function can be pickled for running in
+        another process."""
+        args = (self.step, self.simulation.domain, self.simulation.targets,
+                self.simulation.obstacles)
+        kwargs = dict(radius=self.radius, value=self.value,
+                      cache_dir=self.cache_dir)
+        if self.algorithm == "static" and self.tile_size is not None:
+            return partial(static_potential_tiled, *args,
+                           tile_size=self.tile_size,
+                           dtype=self.encoding or np.uint16, **kwargs)
+        return partial(static_potential_cached, *args, **kwargs)
+
+    def set_static_map(self, static_map):
+        """Set static direction map. Tiled maps are used as is."""
+        if static_map.ndim == 4:
+            self.direction_map = static_map
         else:
-            pass
+            self.static_map = static_map
+            self.set_direction_map(static_map)
+
+    def wait(self):
+        """Wait for the static direction map computed in the background."""
+        if self.precomputation is None:
+            return
+        # Raises the exception from the background process if any.
+        self.precomputation.result()
+        self.precomputation = None
+        self.set_static_map(self.static_potential()())
+
+    def encode(self, dir_map):
+        """Compress direction map if encoding is set."""
+        if self.encoding is None:
+            return dir_map
+        return encode_direction_map(dir_map, self.encoding)
+
+    def set_direction_map(self, dir_map):
+        """Set direction map and compress it if encoding is set."""
+        self.direction_map = self.encode(dir_map)
+
+    def lookup(self, dir_map, indices):
+        """Write directions interpolated from direction map into target
+        directions of the agents at indices in place."""
+        agent = self.simulation.agent
+        if dir_map.ndim == 4:
+            lookup_tiled_direction_map(
+                dir_map, np.iinfo(dir_map.dtype).max, agent.position, indices,
+                self.step, agent.target_direction)
+        elif self.encoding is None:
+            lookup_direction_map(dir_map, agent.position, indices, self.step,
+                                 agent.target_direction)
+        else:
+            lookup_encoded_direction_map(
+                dir_map, np.iinfo(self.encoding).max, agent.position, indices,
+                self.step, agent.target_direction)
+
+    def update_dynamic(self):
+        """Update dynamic direction map."""
+        agent = self.simulation.agent
+        i = agent.indices()
+        speed = speed_field(np.copy(self.speed_base), self.step,
+                            agent.position[i], agent.velocity[i],
+                            agent.target_velocity[i, 0], agent.radius[i],
+                            self.static_map, self.c0, self.c1)
+        self.set_direction_map(dynamic_potential(
+            self.step, self.tmap, self.sources, self.speed, speed,
+            self.dmap_obs, self.radius, self.value))
+        self.speed = speed
 
     def update(self):
-        i = self.simulation.agent.indices()
-        points = self.simulation.agent.position[i]
-        # indices = self.points_to_indices(points)
-        indices = to_indices(points, self.step)
-        indices = np.fliplr(indices)
-        # http://docs.scipy.org/doc/numpy/reference/arrays.indexing.html
-        # TODO: Handle index out of bounds -> numpy.take
-        d = self.direction_map[indices[:, 0], indices[:, 1], :]
-        self.simulation.agent.target_direction[i] = d
+        self.wait()
+        if self.algorithm == "dynamic" and \
+                self.iteration % self.interval == 0:
+            self.update_dynamic()
+        self.iteration += 1
+
+        agent = self.simulation.agent
+        i = agent.indices()
+        if self.algorithm == "exits":
+            # Agents without selected exit use the first exit.
+            target_exit = np.maximum(agent.target_exit[i], 0)
+            for e, dir_map in enumerate(self.direction_maps):
+                self.lookup(dir_map, i[target_exit == e])
+        elif self.algorithm == "navmesh":
+            agent.target_direction[i] = self.navmesh.direction(
+                agent.position[i])
+        else:
+            self.lookup(self.direction_map, i)
 
 
 class Orientation(TaskNode):
@@ -170,14 +386,57 @@ class Orientation(TaskNode):
 
 
 class ExitSelection(TaskNode):
-    """Exit selection policy."""
+    r"""Exit selection policy.
 
-    def __init__(self, simulation):
+    Agents select the exit that minimizes the sum of walking time along the
+    distance map of the exit and the queueing time estimated from the number
+    of agents ahead in the queue and the capacity of the exit. Agents
+    re-evaluate their selection at the times of independent Poisson clocks
+    with mean ``interval`` between the evaluations, i.e. with probability
+    :math:`1 - \exp(-\Delta t / interval)` at each timestep.
+
+    Attributes:
+        simulation:
+        integrator (Integrator):
+        navigation (Navigation): Navigation using ``exits`` algorithm.
+        interval (float): Mean time between the evaluations in seconds.
+        d_agent (float): Width of the agent for the capacity of the exits.
+        coeff (float): Flow through single lane of the exit in agents per
+            second for the capacity of the exits.
+
+    """
+
+    def __init__(self, simulation, integrator, navigation, interval=1.0):
         super().__init__()
         self.simulation = simulation
+        self.integrator = integrator
+        self.navigation = navigation
+        self.interval = interval
+        self.d_agent = 0.5
+        self.coeff = 1.0
+        self.capacity = np.array([
+            narrow_exit_capacity(e.length, self.d_agent, None, self.coeff)
+            for e in self.navigation.exits])
 
     def update(self):
-        pass
+        agent = self.simulation.agent
+        i = agent.indices()
+        if len(i) == 0:
+            return
+
+        # Agents without exit select immediately, others on Poisson clock.
+        p = 1.0 - np.exp(-self.integrator.dt_prev / self.interval)
+        due = (agent.target_exit[i] < 0) | (np.random.random(len(i)) < p)
+        if not np.any(due):
+            return
+
+        distance = np.array([
+            interpolate_map(dmap, agent.position[i], self.navigation.step)
+            for dmap in self.navigation.distance_maps])
+        target_velocity = np.maximum(agent.target_velocity[i, 0], 1e-3)
+        selected = exit_selection(distance, agent.target_exit[i],
+                                  self.capacity, target_velocity)
+        agent.target_exit[i[due]] = selected[due]
 
 
 class Reset(TaskNode):
@@ -189,7 +448,10 @@ class Reset(TaskNode):
 
     def update(self):
         self.simulation.agent.reset_motion()
-        # self.agent.reset_neighbor()
+        if self.simulation.agent.neighbor_radius > 0:
+            self.simulation.agent.reset_neighbor()
+        if self.simulation.agent.density_radius > 0:
+            self.simulation.agent.reset_density()
 
 
 class HDFNode(TaskNode):
@@ -221,7 +483,11 @@ class HDFNode(TaskNode):
 
 
 class Contains(TaskNode):
-    """Contains"""
+    """Contains
+
+    Tracks which agents are inside a polygon and how many agents crossed its
+    boundary during the last update.
+    """
 
     def __init__(self, simulation):
         super().__init__()
@@ -229,6 +495,7 @@ class Contains(TaskNode):
 
         self.path = None
         self.inside = np.zeros(self.simulation.agent.size, np.bool8)
+        self.diff = 0
 
     def set(self, polygon):
         self.path = Path(np.asarray(polygon.exterior))
@@ -237,8 +504,209 @@ class Contains(TaskNode):
     def update(self, *args, **kwargs):
         position = self.simulation.agent.position
         inside = self.path.contains_points(position)
+        if len(inside) != len(self.inside):
+            # Agent structure has been resized
+            self.inside = np.resize(self.inside, len(inside))
         # out: True  -> False
         # in:  False -> True
         changed = self.inside ^ inside
         self.inside = inside
-        diff = np.sum(changed)
+        self.diff = np.sum(changed)
+
+
+exit_log_type = np.dtype([
+    ('index', np.int64),
+    ('time', np.float64),
+])
+
+
+class Sink(TaskNode):
+    """Removes agents that reach the target region.
+
+    Agents inside the region are deactivated, which frees their slots in the
+    agent structure, so that evacuated agents are no longer simulated. Index
+    of the agent and time of the exit are recorded to the exit log.
+
+    Attributes:
+        simulation (MultiAgentSimulation):
+        integrator (Integrator):
+            Integrator that keeps track of the simulation time.
+        path (matplotlib.path.Path):
+            Target region.
+        log (numpy.ndarray):
+            Array of ``dtype=exit_log_type``. Grows geometrically.
+        count (int):
+            Number of exits recorded in the log.
+    """
+
+    def __init__(self, simulation, integrator):
+        super().__init__()
+        self.simulation = simulation
+        self.integrator = integrator
+
+        self.path = None
+        self.log = np.zeros(16, dtype=exit_log_type)
+        self.count = 0
+
+    def set(self, polygon):
+        """Set the target region
+
+        Args:
+            polygon (Polygon):
+        """
+        self.path = Path(np.asarray(polygon.exterior))
+
+    @property
+    def exits(self):
+        """Recorded exits
+
+        Returns:
+            numpy.ndarray: Array of ``dtype=exit_log_type``.
+        """
+        return self.log[:self.count]
+
+    def record(self, indices, time):
+        """Append exits to the log."""
+        size = self.count + len(indices)
+        if size > len(self.log):
+            log = np.zeros(max(2 * len(self.log), size), dtype=exit_log_type)
+            log[:self.count] = self.log[:self.count]
+            self.log = log
+        self.log['index'][self.count:size] = indices
+        self.log['time'][self.count:size] = time
+        self.count = size
+
+    def update(self):
+        agent = self.simulation.agent
+        i = agent.indices()
+        inside = self.path.contains_points(agent.position[i])
+        if not np.any(inside):
+            return
+
+        exited = i[inside]
+        for index in exited:
+            agent.remove(index)
+        self.record(exited, self.integrator.time_tot)
+
+
+class Source(TaskNode):
+    r"""Continuous inflow of agents from a source region.
+
+    Arrivals are generated by Poisson process with given ``rate`` using
+    ``poisson_clock``. New agents are checked for overlapping only against the
+    agents near the source region using spatial hash (``MutableBlockList``),
+    so that spawning costs :math:`\mathcal{O}(\text{new agents})` instead of
+    :math:`\mathcal{O}(N)` Python operations per step. Arrivals that do not
+    fit into the source region are carried over to the next step.
+
+    Attributes:
+        simulation (MultiAgentSimulation):
+        integrator (Integrator):
+            Integrator that keeps track of the timestep.
+        rate (float):
+            Expected number of arrivals per second :math:`\lambda`.
+        pending (int):
+            Number of arrivals waiting for free space.
+    """
+
+    def __init__(self, simulation, integrator):
+        super().__init__()
+        self.simulation = simulation
+        self.integrator = integrator
+
+        self.spawn = None
+        self.sampling = None
+        self.bounds = None
+        self.parameters = None
+        self.rate = 0.0
+        self.target_direction = np.zeros(2)
+        self.orientation = 0.0
+        self.iterations_limit = 10
+        self.max_pending = 100
+        self.pending = 0
+
+    def set(self, spawn, rate, body_type, target_direction=(0.0, 0.0),
+            orientation=0.0, iterations_limit=10, max_pending=100):
+        """Set source
+
+        Args:
+            spawn (Polygon):
+                Region where new agents are placed.
+            rate (float):
+                Expected number of arrivals per second.
+            body_type (str):
+            target_direction (numpy.ndarray):
+                Initial target direction of the new agents.
+            orientation (float):
+                Initial orientation of the new agents.
+            iterations_limit (int):
+                Number of positions tried for each arrival per step.
+            max_pending (int):
+                Maximum number of arrivals waiting for free space.
+        """
+        self.spawn = spawn
+        self.sampling = PolygonSample(np.asarray(spawn.exterior))
+        self.parameters = Parameters(body_type=body_type)
+        self.rate = rate
+        self.target_direction = np.asarray(target_direction, dtype=np.float64)
+        self.orientation = orientation
+        self.iterations_limit = iterations_limit
+        self.max_pending = max_pending
+
+        # Region of the agents that can overlap with the new agents
+        margin = 2 * MAX_AGENT_RADIUS
+        minx, miny, maxx, maxy = spawn.bounds
+        self.bounds = (np.array((minx - margin, miny - margin)),
+                       np.array((maxx + margin, maxy + margin)))
+
+    def arrivals(self, dt):
+        """Number of arrivals during timestep ``dt``."""
+        if self.rate <= 0.0 or not dt > 0.0:
+            return 0
+        return sum(1 for _ in poisson_clock(1.0 / self.rate, dt))
+
+    def local_grid(self):
+        """Spatial hash of the active agents near the source region."""
+        agent = self.simulation.agent
+        grid = MutableBlockList(cell_size=2 * MAX_AGENT_RADIUS)
+        i = agent.indices()
+        lower, upper = self.bounds
+        position = agent.position[i]
+        near = np.all((position >= lower) & (position <= upper), axis=1)
+        for index in i[near]:
+            grid[agent.position[index]] = index
+        return grid
+
+    def update(self):
+        self.pending = min(self.pending + self.arrivals(self.integrator.dt_prev),
+                           self.max_pending)
+        if self.pending == 0:
+            return
+
+        agent = self.simulation.agent
+        grid = self.local_grid()
+        iterations = 0
+        while self.pending > 0 and \
+                iterations < self.iterations_limit * self.pending:
+            iterations += 1
+            position = self.sampling.draw()
+            mass, radius, r_t, r_s, r_ts, inertia_rot, max_velocity, \
+                max_angular_velocity = agent_parameters(self.parameters)
+
+            neighbours = np.array(grid[position], dtype=np.int64)
+            overlapping_agents, overlapping_obstacles = \
+                self.simulation.overlapping(neighbours, position, radius,
+                                            r_t, r_s)
+            if overlapping_agents or overlapping_obstacles:
+                continue
+
+            index = agent.add(position, mass, radius, r_t, r_s, r_ts,
+                              inertia_rot, max_velocity, max_angular_velocity)
+            if index < 0:
+                # Agent structure has reached its hard limit.
+                break
+
+            agent.set_motion(index, self.orientation, np.zeros(2), 0.0,
+                             self.target_direction, self.orientation)
+            grid[position] = index
+            self.pending -= 1
@@ -21,6 +21,33 @@ def test_hallway():
         assert True
 
 
+def test_hallway_inflow():
+    for model in models:
+        simulation = Hallway()
+        simulation.set(10, 10, 10, model, 'adult', 10.0)
+        simulation.update()
+        simulation.update()
+        assert True
+
+
+def test_hallway_periodic():
+    for model in models:
+        simulation = Hallway()
+        simulation.set(10, 10, 10, model, 'adult', periodic=True)
+        simulation.update()
+        simulation.update()
+        assert True
+
+
+def test_outdoor_helbing():
+    for model in models:
+        simulation = Outdoor()
+        simulation.set(10, 10, 10, model, 'adult', social_force='helbing')
+        simulation.update()
+        simulation.update()
+        assert simulation.social_force == 'helbing'
+
+
 def test_rounding():
     for model in models:
         simulation = Rounding()
@@ -36,4 +63,11 @@ def test_roomevacuation():
         simulation.set(10, 10, 10, model, 'adult', 'circ', 1.2, 1.5)
         simulation.update()
         simulation.update()
-        assert True
\ No newline at end of file
+        assert True
+
+def test_roomevacuation_mixed():
+    simulation = RoomEvacuation()
+    simulation.set(20, 10, 10, 'mixed', 'adult', 'circ', 1.2, 1.5, 3.0)
+    simulation.update()
+    simulation.update()
+    assert simulation.agent.mixed
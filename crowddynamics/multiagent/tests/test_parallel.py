@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from shapely.geometry import Polygon
+
+from crowddynamics.multiagent.parallel import DomainDecomposition, \
+    SharedAgent, strip_edges
+from crowddynamics.multiagent.simulation import MultiAgentSimulation
+
+
+def open_area(size, density=1.0, seed=0):
+    """Open area simulation with agents on a jittered square lattice moving
+    into random directions. Agent attributes are set directly because
+    placing large number of agents using ``add_agents`` is slow."""
+    np.random.seed(seed)
+    spacing = 1.0 / np.sqrt(density)
+    n = int(np.ceil(np.sqrt(size)))
+    width = n * spacing
+    domain = Polygon([(0, 0), (0, width), (width, width), (width, 0)])
+
+    simulation = MultiAgentSimulation()
+    simulation.init_domain(domain)
+    simulation.init_agents(size, 'circular')
+
+    agent = simulation.agent
+    i, j = np.divmod(np.arange(size), n)
+    position = np.stack(((i + 0.5) * spacing, (j + 0.5) * spacing), axis=1)
+    position += np.random.uniform(-0.1, 0.1, position.shape) * spacing
+    phi = np.random.uniform(0.0, 2 * np.pi, size)
+
+    agent.active[:] = True
+    agent.position[:] = position
+    agent.radius[:] = 0.25
+    agent.r_t[:] = 0.15
+    agent.r_s[:] = 0.1
+    agent.r_ts[:] = 0.1
+    agent.mass[:] = 80.0
+    agent.inertia_rot[:] = 4.0
+    agent.target_velocity[:] = 1.0
+    agent.target_direction[:] = np.stack((np.cos(phi), np.sin(phi)), axis=1)
+    return simulation
+
+
+def test_strip_edges():
+    position = np.random.uniform(0.0, 10.0, (1000, 2))
+    edges = strip_edges(position, 4)
+    assert len(edges) == 5
+    assert np.all(np.diff(edges) > 0)
+    counts = np.histogram(position[:, 0], edges)[0]
+    assert np.all(np.abs(counts - 250) <= 1)
+
+
+def test_shared_agent():
+    simulation = open_area(100)
+    shared = SharedAgent(simulation.agent)
+    try:
+        indices = np.arange(10, 60)
+        agent = shared.new_agent(10)
+        shared.read(indices, agent)
+        assert agent.size >= len(indices)
+        assert np.all(agent.position[:50] == simulation.agent.position[10:60])
+        assert not np.any(agent.active[50:])
+
+        agent.position[:50] += 1.0
+        shared.write(indices, agent)
+        assert np.all(shared.arrays['position'][indices] ==
+                      simulation.agent.position[indices] + 1.0)
+    finally:
+        shared.unlink()
+
+
+@pytest.mark.parametrize('workers', (1, 2, 3))
+def test_domain_decomposition(workers):
+    simulation = open_area(400)
+    position = np.copy(simulation.agent.position)
+    decomposition = DomainDecomposition(simulation, workers)
+    try:
+        decomposition.run(maxiter=5)
+    finally:
+        decomposition.close()
+
+    agent = simulation.agent
+    assert np.all(agent.active)
+    assert np.all(np.isfinite(agent.position))
+    assert np.any(agent.position != position)
+    # Agents move less than maximum velocity times elapsed time.
+    assert np.all(np.hypot(*(agent.position - position).T) < 6 * 0.01 * 2.0)
+
+
+@pytest.mark.parametrize('workers', (1, 2, 4, 8))
+def test_domain_decomposition_benchmark(benchmark, workers):
+    """Speedup versus number of workers for 200k agents."""
+    benchmark.group = 'domain_decomposition_200k'
+    simulation = open_area(200000, density=1.0)
+    decomposition = DomainDecomposition(simulation, workers)
+    try:
+        benchmark.pedantic(decomposition.run, args=(10,), rounds=3)
+    finally:
+        decomposition.close()
+    assert np.all(np.isfinite(simulation.agent.position))
@@ -0,0 +1,73 @@
+import numpy as np
+from shapely.geometry import Polygon, LineString
+
+from crowddynamics.multiagent.simulation import MultiAgentSimulation
+from crowddynamics.multiagent.tasks import Integrator, Sink, Source, \
+    Navigation
+
+
+def test_sink():
+    width, height = 10, 10
+    size = 10
+    domain = Polygon([(0, 0), (0, height), (width, height), (width, 0)])
+
+    simulation = MultiAgentSimulation()
+    simulation.init_domain(domain)
+    simulation.init_agents(size, 'circular')
+    placed = list(simulation.add_agents(size, domain, 'adult'))
+
+    integrator = Integrator(simulation)
+    sink = Sink(simulation, integrator)
+    sink.set(domain.buffer(1.0))
+    sink.update()
+
+    assert sink.count == len(placed)
+    assert set(sink.exits['index']) == set(placed)
+    assert not np.any(simulation.agent.active)
+    assert len(simulation.agent.indices()) == 0
+
+
+def test_source():
+    width, height = 10, 10
+    domain = Polygon([(0, 0), (0, height), (width, height), (width, 0)])
+
+    simulation = MultiAgentSimulation()
+    simulation.init_domain(domain)
+    simulation.init_agents(1, 'circular')
+
+    integrator = Integrator(simulation)
+    integrator.dt_prev = 1.0
+    source = Source(simulation, integrator)
+    source.set(domain, rate=20.0, body_type='adult',
+               target_direction=(1.0, 0.0))
+
+    for _ in range(3):
+        source.update()
+
+    indices = simulation.agent.indices()
+    assert len(indices) > 0
+    assert simulation.agent.size >= len(indices)
+    assert np.all(simulation.agent.target_direction[indices] == (1.0, 0.0))
+
+
+def test_navigation_background(tmpdir):
+    width, height = 10, 10
+    domain = Polygon([(0, 0), (0, height), (width, height), (width, 0)])
+
+    simulation = MultiAgentSimulation()
+    simulation.init_domain(domain)
+    simulation.init_agents(10, 'circular')
+    simulation.add_obstacle(LineString([(0, 0), (0, height)]))
+    simulation.add_target(LineString([(width, 4), (width, 6)]))
+
+    navigation = Navigation(simulation, step=0.25, cache_dir=str(tmpdir),
+                            background=True)
+    assert navigation.precomputation is not None
+    placed = list(simulation.add_agents(10, domain, 'adult'))
+    navigation.update()
+    assert navigation.precomputation is None
+
+    expected = Navigation(simulation, step=0.25, cache_dir=str(tmpdir))
+    assert np.all(navigation.direction_map == expected.direction_map)
+    directions = simulation.agent.target_direction[placed]
+    assert np.allclose(np.hypot(*directions.T), 1.0)
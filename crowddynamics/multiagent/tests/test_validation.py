@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from crowddynamics.multiagent.examples import RoomEvacuation
+
+
+def bottleneck(social_force, size=200, maxiter=2000):
+    """Evacuate agents through a bottleneck and measure flow through the door
+    and mean crowd pressure."""
+    np.random.seed(0)
+    simulation = RoomEvacuation()
+    simulation.set(size, 10.0, 10.0, 'circular', 'adult', 'circ', 1.2, 1.5,
+                   social_force=social_force)
+    simulation.agent.density_radius = 0.7
+    pressure = []
+    for _ in range(maxiter):
+        simulation.update()
+        i = simulation.agent.indices()
+        if len(i) == 0:
+            break
+        pressure.append(np.mean(simulation.agent.pressure[i]))
+    time = simulation.sink.integrator.time_tot
+    flow = simulation.sink.count / time
+    return flow, np.mean(pressure)
+
+
+@pytest.mark.parametrize('social_force', ('power_law', 'power_law_contact',
+                                          'contact'))
+def test_contact_mode_validation(benchmark, social_force):
+    """Compare flow and crowd pressure through a bottleneck between full
+    social force and contact-only modes."""
+    benchmark.group = 'contact_mode_validation'
+    flow, pressure = benchmark.pedantic(bottleneck, args=(social_force,),
+                                        rounds=1)
+    benchmark.extra_info['flow'] = flow
+    benchmark.extra_info['pressure'] = pressure
+    assert flow > 0
+    assert np.isfinite(pressure)